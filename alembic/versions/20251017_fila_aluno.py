@@ -0,0 +1,40 @@
+"""aluno responsavel pelo atendimento na fila (claim_next)
+
+Revision ID: 20251017_fila_aluno
+Revises: 20251017_fila_prioridade
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_fila_aluno"
+down_revision = "20251017_fila_prioridade"
+branch_labels = None
+depends_on = None
+
+FK = "fk_fila_atendimento_aluno_id_usuarios"
+INDEX = "ix_fila_atendimento_aluno_id"
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    cols = {c["name"] for c in insp.get_columns("fila_atendimento")}
+    if "aluno_id" in cols:
+        return
+    with op.batch_alter_table("fila_atendimento") as batch_op:
+        batch_op.add_column(sa.Column("aluno_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(FK, "usuarios", ["aluno_id"], ["id"], ondelete="SET NULL")
+        batch_op.create_index(INDEX, ["aluno_id"])
+
+
+def downgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    cols = {c["name"] for c in insp.get_columns("fila_atendimento")}
+    if "aluno_id" not in cols:
+        return
+    with op.batch_alter_table("fila_atendimento") as batch_op:
+        batch_op.drop_index(INDEX)
+        batch_op.drop_constraint(FK, type_="foreignkey")
+        batch_op.drop_column("aluno_id")
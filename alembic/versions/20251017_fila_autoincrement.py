@@ -0,0 +1,67 @@
+"""fila_atendimento com AUTOINCREMENT: ids nunca reutilizados (historico guarda o id original)
+
+Revision ID: 20251017_fila_autoincrement
+Revises: 20251017_refresh_familia
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_fila_autoincrement"
+down_revision = "20251017_refresh_familia"
+branch_labels = None
+depends_on = None
+
+TABELA = "fila_atendimento"
+
+
+def _create_sql(bind) -> str | None:
+    return bind.execute(sa.text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :t"
+    ), {"t": TABELA}).scalar()
+
+
+def _recreate(autoincrement: bool) -> None:
+    """Recria a tabela (SQLite só aceita AUTOINCREMENT na criação).
+
+    Os índices são recriados com o SQL original: a reflexão do batch não
+    preserva o WHERE do índice único parcial.
+    """
+    bind = op.get_bind()
+    indices = bind.execute(sa.text(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :t AND sql IS NOT NULL"
+    ), {"t": TABELA}).all()
+    with op.batch_alter_table(TABELA, recreate="always", table_kwargs={"sqlite_autoincrement": autoincrement}):
+        pass
+    for nome, sql in indices:
+        op.execute(f'DROP INDEX IF EXISTS "{nome}"')
+        op.execute(sql)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # PostgreSQL (SERIAL) não reutiliza ids
+    if bind.dialect.name != "sqlite":
+        return
+    sql = _create_sql(bind)
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return
+    _recreate(autoincrement=True)
+    # a sequência parte do maior id já usado, inclusive os que só existem no histórico
+    maior = bind.execute(sa.text(
+        "SELECT max(coalesce((SELECT max(id) FROM fila_atendimento), 0),"
+        " coalesce((SELECT max(id) FROM fila_atendimento_historico), 0))"
+    )).scalar()
+    op.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = :t").bindparams(t=TABELA))
+    op.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES (:t, :seq)").bindparams(t=TABELA, seq=maior))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    sql = _create_sql(bind)
+    if sql is not None and "AUTOINCREMENT" in sql.upper():
+        _recreate(autoincrement=False)
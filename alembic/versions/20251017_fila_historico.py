@@ -0,0 +1,52 @@
+"""historico (arquivo) da fila de atendimento
+
+Revision ID: 20251017_fila_historico
+Revises: 20251017_fila_unica_ativa
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20251017_fila_historico"
+down_revision = "20251017_fila_unica_ativa"
+branch_labels = None
+depends_on = None
+
+TABELA = "fila_atendimento_historico"
+INDEX = "ix_fila_historico_paciente_criado"
+
+
+# tipos já criados junto com fila_atendimento
+TIPO = postgresql.ENUM("triagem", "consulta", name="tipo_atendimento", create_type=False)
+STATUS = postgresql.ENUM("aguardando", "em_atendimento", "concluido", "cancelado", name="status_fila", create_type=False)
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    if TABELA in insp.get_table_names():
+        return
+    op.create_table(
+        TABELA,
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("paciente_id", sa.Integer(), sa.ForeignKey("pacientes.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("tipo", TIPO, nullable=False),
+        sa.Column("status", STATUS, nullable=False),
+        sa.Column("aluno_id", sa.Integer(), sa.ForeignKey("usuarios.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("prioridade", sa.Integer(), nullable=False),
+        sa.Column("observacao", sa.String(length=255), nullable=True),
+        sa.Column("criado_em", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("atualizado_em", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("arquivado_em", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(INDEX, TABELA, ["paciente_id", "criado_em", "id"])
+
+
+def downgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    if TABELA not in insp.get_table_names():
+        return
+    op.drop_index(INDEX, table_name=TABELA)
+    op.drop_table(TABELA)
@@ -0,0 +1,74 @@
+"""metricas materializadas da fila e inicio do atendimento
+
+Revision ID: 20251017_fila_metricas
+Revises: 20251017_fila_historico
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20251017_fila_metricas"
+down_revision = "20251017_fila_historico"
+branch_labels = None
+depends_on = None
+
+TABELAS_FILA = ("fila_atendimento", "fila_atendimento_historico")
+DIARIAS = "fila_metricas_diarias"
+HISTOGRAMA = "fila_metricas_histograma"
+
+# tipo já criado junto com fila_atendimento
+TIPO = postgresql.ENUM("triagem", "consulta", name="tipo_atendimento", create_type=False)
+
+
+def _columns(table: str) -> set[str]:
+    insp = sa.inspect(op.get_bind())
+    return {c["name"] for c in insp.get_columns(table)}
+
+
+def _tables() -> set[str]:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    for table in TABELAS_FILA:
+        if "iniciado_em" not in _columns(table):
+            op.add_column(table, sa.Column("iniciado_em", sa.DateTime(timezone=True), nullable=True))
+
+    existing = _tables()
+    if DIARIAS not in existing:
+        op.create_table(
+            DIARIAS,
+            sa.Column("dia", sa.Date(), primary_key=True),
+            sa.Column("tipo", TIPO, primary_key=True),
+            sa.Column("chegadas", sa.Integer(), nullable=False),
+            sa.Column("inicios", sa.Integer(), nullable=False),
+            sa.Column("conclusoes", sa.Integer(), nullable=False),
+            sa.Column("cancelamentos", sa.Integer(), nullable=False),
+            sa.Column("espera_total", sa.Float(), nullable=False),
+            sa.Column("atendimento_total", sa.Float(), nullable=False),
+            sa.Column("atendimentos_medidos", sa.Integer(), nullable=False),
+        )
+    if HISTOGRAMA not in existing:
+        op.create_table(
+            HISTOGRAMA,
+            sa.Column("dia", sa.Date(), primary_key=True),
+            sa.Column("tipo", TIPO, primary_key=True),
+            sa.Column("medida", sa.String(length=12), primary_key=True),
+            sa.Column("balde", sa.Integer(), primary_key=True),
+            sa.Column("contagem", sa.Integer(), nullable=False),
+            sqlite_with_rowid=False,
+        )
+
+
+def downgrade() -> None:
+    existing = _tables()
+    for table in (HISTOGRAMA, DIARIAS):
+        if table in existing:
+            op.drop_table(table)
+    for table in TABELAS_FILA:
+        if "iniciado_em" in _columns(table):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column("iniciado_em")
@@ -0,0 +1,43 @@
+"""prioridade na fila de atendimento e indice de ordem de atendimento
+
+Revision ID: 20251017_fila_prioridade
+Revises: 20251017_pacientes_trigramas
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_fila_prioridade"
+down_revision = "20251017_pacientes_trigramas"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_fila_tipo_status_prioridade_criado"
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    if "fila_atendimento" not in insp.get_table_names():
+        return
+    cols = {c["name"] for c in insp.get_columns("fila_atendimento")}
+    if "prioridade" not in cols:
+        # 4 = PrioridadeFila.normal
+        op.add_column("fila_atendimento", sa.Column("prioridade", sa.Integer(), nullable=False, server_default="4"))
+    indexes = {ix["name"] for ix in insp.get_indexes("fila_atendimento")}
+    if INDEX not in indexes:
+        op.create_index(INDEX, "fila_atendimento", ["tipo", "status", "prioridade", "criado_em"])
+
+
+def downgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    if "fila_atendimento" not in insp.get_table_names():
+        return
+    indexes = {ix["name"] for ix in insp.get_indexes("fila_atendimento")}
+    if INDEX in indexes:
+        op.drop_index(INDEX, table_name="fila_atendimento")
+    cols = {c["name"] for c in insp.get_columns("fila_atendimento")}
+    if "prioridade" in cols:
+        with op.batch_alter_table("fila_atendimento") as batch_op:
+            batch_op.drop_column("prioridade")
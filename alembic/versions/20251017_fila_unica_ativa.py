@@ -0,0 +1,68 @@
+"""indice unico parcial: paciente ativo uma vez por tipo de fila
+
+Revision ID: 20251017_fila_unica_ativa
+Revises: 20251017_fila_aluno
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_fila_unica_ativa"
+down_revision = "20251017_fila_aluno"
+branch_labels = None
+depends_on = None
+
+INDEX = "uq_fila_paciente_tipo_ativo"
+ATIVA = "status IN ('aguardando', 'em_atendimento')"
+
+
+def _cancel_duplicates() -> None:
+    """Cancela entradas ativas repetidas criadas pela checagem antiga (não atômica).
+
+    Mantém a que está em atendimento ou, na falta dela, a mais antiga.
+    """
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        f"SELECT id, paciente_id, tipo, status FROM fila_atendimento WHERE {ATIVA} ORDER BY id"
+    )).all()
+    keep: dict[tuple, tuple] = {}
+    cancel: list[int] = []
+    for row in rows:
+        key = (row.paciente_id, row.tipo)
+        current = keep.get(key)
+        if current is None:
+            keep[key] = row
+        elif row.status == "em_atendimento" and current.status != "em_atendimento":
+            cancel.append(current.id)
+            keep[key] = row
+        else:
+            cancel.append(row.id)
+    if cancel:
+        bind.execute(
+            sa.text("UPDATE fila_atendimento SET status = 'cancelado' WHERE id IN :ids")
+            .bindparams(sa.bindparam("ids", expanding=True)),
+            {"ids": cancel},
+        )
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    if INDEX in {ix["name"] for ix in insp.get_indexes("fila_atendimento")}:
+        return
+    _cancel_duplicates()
+    op.create_index(
+        INDEX,
+        "fila_atendimento",
+        ["paciente_id", "tipo"],
+        unique=True,
+        sqlite_where=sa.text(ATIVA),
+        postgresql_where=sa.text(ATIVA),
+    )
+
+
+def downgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    if INDEX in {ix["name"] for ix in insp.get_indexes("fila_atendimento")}:
+        op.drop_index(INDEX, table_name="fila_atendimento")
@@ -0,0 +1,35 @@
+"""contador de escritas por tipo de fila
+
+Revision ID: 20251017_fila_versoes
+Revises: 20251017_fila_autoincrement
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20251017_fila_versoes"
+down_revision = "20251017_fila_autoincrement"
+branch_labels = None
+depends_on = None
+
+TABELA = "fila_versoes"
+
+# tipo já criado junto com fila_atendimento
+TIPO = postgresql.ENUM("triagem", "consulta", name="tipo_atendimento", create_type=False)
+
+
+def upgrade() -> None:
+    if TABELA not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            TABELA,
+            sa.Column("tipo", TIPO, primary_key=True),
+            sa.Column("versao", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    if TABELA in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table(TABELA)
@@ -0,0 +1,88 @@
+"""nome normalizado (sem acentos/caixa) em pacientes e usuarios
+
+Revision ID: 20251017_nome_normalizado
+Revises: 20251017_pacientes_keyset
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+import unicodedata
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_nome_normalizado"
+down_revision = "20251017_pacientes_keyset"
+branch_labels = None
+depends_on = None
+
+TABELAS = ("pacientes", "usuarios")
+BATCH = 500
+
+
+def _normalize(nome: str | None) -> str:
+    # cópia congelada de core.texto.normalize_name
+    if not nome:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", nome)
+    sem_acentos = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+def _columns(table: str) -> set[str]:
+    insp = sa.inspect(op.get_bind())
+    return {c["name"] for c in insp.get_columns(table)}
+
+
+def _index_names(table: str) -> set[str]:
+    insp = sa.inspect(op.get_bind())
+    return {ix["name"] for ix in insp.get_indexes(table)}
+
+
+def _backfill(table: str) -> None:
+    bind = op.get_bind()
+    t = sa.table(table, sa.column("id", sa.Integer), sa.column("nome", sa.String), sa.column("nome_normalizado", sa.String))
+    rows = bind.execute(sa.select(t.c.id, t.c.nome)).all()
+    update = (
+        sa.update(t)
+        .where(t.c.id == sa.bindparam("_id"))
+        .values(nome_normalizado=sa.bindparam("_valor"))
+    )
+    for start in range(0, len(rows), BATCH):
+        chunk = rows[start:start + BATCH]
+        bind.execute(update, [{"_id": r.id, "_valor": _normalize(r.nome)} for r in chunk])
+
+
+def upgrade() -> None:
+    for table in TABELAS:
+        if "nome_normalizado" not in _columns(table):
+            op.add_column(
+                table,
+                sa.Column("nome_normalizado", sa.String(length=120), nullable=False, server_default=""),
+            )
+        _backfill(table)
+
+    existing = _index_names("pacientes")
+    if "ix_pacientes_nome_id" in existing:
+        op.drop_index("ix_pacientes_nome_id", table_name="pacientes")
+    if "ix_pacientes_nome_normalizado_id" not in existing:
+        op.create_index("ix_pacientes_nome_normalizado_id", "pacientes", ["nome_normalizado", "id"])
+
+    if "ix_usuarios_nome_normalizado" not in _index_names("usuarios"):
+        op.create_index("ix_usuarios_nome_normalizado", "usuarios", ["nome_normalizado"])
+
+
+def downgrade() -> None:
+    if "ix_usuarios_nome_normalizado" in _index_names("usuarios"):
+        op.drop_index("ix_usuarios_nome_normalizado", table_name="usuarios")
+
+    existing = _index_names("pacientes")
+    if "ix_pacientes_nome_normalizado_id" in existing:
+        op.drop_index("ix_pacientes_nome_normalizado_id", table_name="pacientes")
+    if "ix_pacientes_nome_id" not in existing:
+        op.create_index("ix_pacientes_nome_id", "pacientes", ["nome", "id"])
+
+    for table in TABELAS:
+        if "nome_normalizado" in _columns(table):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column("nome_normalizado")
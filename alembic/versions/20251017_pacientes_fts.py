@@ -0,0 +1,55 @@
+"""indice FTS5 de nomes de pacientes (SQLite)
+
+Revision ID: 20251017_pacientes_fts
+Revises: 96f7eca40376
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_pacientes_fts"
+down_revision = "96f7eca40376"
+branch_labels = None
+depends_on = None
+
+FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS pacientes_fts USING fts5(
+        nome,
+        content='pacientes',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS pacientes_fts_ai AFTER INSERT ON pacientes BEGIN
+        INSERT INTO pacientes_fts(rowid, nome) VALUES (new.id, new.nome);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pacientes_fts_ad AFTER DELETE ON pacientes BEGIN
+        INSERT INTO pacientes_fts(pacientes_fts, rowid, nome) VALUES ('delete', old.id, old.nome);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pacientes_fts_au AFTER UPDATE OF nome ON pacientes BEGIN
+        INSERT INTO pacientes_fts(pacientes_fts, rowid, nome) VALUES ('delete', old.id, old.nome);
+        INSERT INTO pacientes_fts(rowid, nome) VALUES (new.id, new.nome);
+    END""",
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    for ddl in FTS_DDL:
+        op.execute(ddl)
+    # popula o índice com os pacientes já cadastrados
+    op.execute("INSERT INTO pacientes_fts(pacientes_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS pacientes_fts_ai")
+    op.execute("DROP TRIGGER IF EXISTS pacientes_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS pacientes_fts_au")
+    op.execute("DROP TABLE IF EXISTS pacientes_fts")
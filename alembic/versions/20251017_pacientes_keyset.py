@@ -0,0 +1,45 @@
+"""indices compostos para paginacao por cursor de pacientes
+
+Revision ID: 20251017_pacientes_keyset
+Revises: 20251017_pacientes_fts
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_pacientes_keyset"
+down_revision = "20251017_pacientes_fts"
+branch_labels = None
+depends_on = None
+
+
+def _index_names(table: str) -> set[str]:
+    insp = sa.inspect(op.get_bind())
+    return {ix["name"] for ix in insp.get_indexes(table)}
+
+
+def upgrade() -> None:
+    existing = _index_names("pacientes")
+    # (nome, id) substitui o índice simples em nome
+    if "ix_pacientes_nome" in existing:
+        op.drop_index("ix_pacientes_nome", table_name="pacientes")
+    if "ix_pacientes_nome_id" not in existing:
+        op.create_index("ix_pacientes_nome_id", "pacientes", ["nome", "id"])
+    if "ix_pacientes_status_created_id" not in existing:
+        op.create_index(
+            "ix_pacientes_status_created_id",
+            "pacientes",
+            ["statusAtendimento", "created_at", "id"],
+        )
+
+
+def downgrade() -> None:
+    existing = _index_names("pacientes")
+    if "ix_pacientes_status_created_id" in existing:
+        op.drop_index("ix_pacientes_status_created_id", table_name="pacientes")
+    if "ix_pacientes_nome_id" in existing:
+        op.drop_index("ix_pacientes_nome_id", table_name="pacientes")
+    if "ix_pacientes_nome" not in existing:
+        op.create_index("ix_pacientes_nome", "pacientes", ["nome"])
@@ -0,0 +1,72 @@
+"""vocabulario de trigramas para busca aproximada de pacientes
+
+Revision ID: 20251017_pacientes_trigramas
+Revises: 20251017_nome_normalizado
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_pacientes_trigramas"
+down_revision = "20251017_nome_normalizado"
+branch_labels = None
+depends_on = None
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _trigrams(palavra: str) -> set[str]:
+    # cópia congelada de db.trigram.word_trigrams
+    padded = f"  {palavra} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def upgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    tables = set(insp.get_table_names())
+    if "pacientes_vocabulario" not in tables:
+        op.create_table(
+            "pacientes_vocabulario",
+            sa.Column("palavra", sa.String(length=120), primary_key=True),
+            sa.Column("ocorrencias", sa.Integer(), nullable=False),
+        )
+    if "pacientes_trigramas" not in tables:
+        op.create_table(
+            "pacientes_trigramas",
+            sa.Column("trigrama", sa.String(length=3), primary_key=True),
+            sa.Column(
+                "palavra",
+                sa.String(length=120),
+                sa.ForeignKey("pacientes_vocabulario.palavra", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sqlite_with_rowid=False,
+        )
+
+    # backfill a partir dos nomes normalizados
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM pacientes_vocabulario LIMIT 1")).first() is not None:
+        return
+    contagem: Counter[str] = Counter()
+    for (nome,) in bind.execute(sa.text("SELECT nome_normalizado FROM pacientes")):
+        contagem.update(set(_WORD_PATTERN.findall(nome or "")))
+    if not contagem:
+        return
+    vocabulario = sa.table("pacientes_vocabulario", sa.column("palavra"), sa.column("ocorrencias"))
+    trigramas = sa.table("pacientes_trigramas", sa.column("trigrama"), sa.column("palavra"))
+    op.bulk_insert(vocabulario, [{"palavra": p, "ocorrencias": n} for p, n in contagem.items()])
+    op.bulk_insert(trigramas, [{"trigrama": t, "palavra": p} for p in contagem for t in _trigrams(p)])
+
+
+def downgrade() -> None:
+    insp = sa.inspect(op.get_bind())
+    tables = set(insp.get_table_names())
+    if "pacientes_trigramas" in tables:
+        op.drop_table("pacientes_trigramas")
+    if "pacientes_vocabulario" in tables:
+        op.drop_table("pacientes_vocabulario")
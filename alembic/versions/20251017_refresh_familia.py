@@ -0,0 +1,50 @@
+"""familia e substituido_em em refresh_tokens (rotação com detecção de reuso)
+
+Revision ID: 20251017_refresh_familia
+Revises: 20251017_usuarios_filtro
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_refresh_familia"
+down_revision = "20251017_usuarios_filtro"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_refresh_tokens_familia"
+
+
+def _columns(table: str) -> set[str]:
+    insp = sa.inspect(op.get_bind())
+    return {c["name"] for c in insp.get_columns(table)}
+
+
+def _index_names(table: str) -> set[str]:
+    insp = sa.inspect(op.get_bind())
+    return {ix["name"] for ix in insp.get_indexes(table)}
+
+
+def upgrade() -> None:
+    colunas = _columns("refresh_tokens")
+    if "familia" not in colunas:
+        op.add_column("refresh_tokens", sa.Column("familia", sa.String(length=64), nullable=True))
+        # tokens existentes: cada um é a própria família
+        op.execute("UPDATE refresh_tokens SET familia = token_hash WHERE familia IS NULL")
+    if "substituido_em" not in colunas:
+        op.add_column("refresh_tokens", sa.Column("substituido_em", sa.DateTime(timezone=True), nullable=True))
+    if INDEX not in _index_names("refresh_tokens"):
+        op.create_index(INDEX, "refresh_tokens", ["familia"])
+
+
+def downgrade() -> None:
+    if INDEX in _index_names("refresh_tokens"):
+        op.drop_index(INDEX, table_name="refresh_tokens")
+    colunas = _columns("refresh_tokens")
+    with op.batch_alter_table("refresh_tokens") as batch:
+        if "substituido_em" in colunas:
+            batch.drop_column("substituido_em")
+        if "familia" in colunas:
+            batch.drop_column("familia")
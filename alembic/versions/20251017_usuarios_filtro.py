@@ -0,0 +1,32 @@
+"""indice composto para a listagem de usuarios por perfil/ativo
+
+Revision ID: 20251017_usuarios_filtro
+Revises: 20251017_fila_metricas
+Create Date: 2025-10-17
+"""
+from __future__ import annotations
+
+from alembic import op  # type: ignore
+import sqlalchemy as sa
+
+revision = "20251017_usuarios_filtro"
+down_revision = "20251017_fila_metricas"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_usuarios_perfil_ativo_nome"
+
+
+def _index_names(table: str) -> set[str]:
+    insp = sa.inspect(op.get_bind())
+    return {ix["name"] for ix in insp.get_indexes(table)}
+
+
+def upgrade() -> None:
+    if INDEX not in _index_names("usuarios"):
+        op.create_index(INDEX, "usuarios", ["perfil", "ativo", "nome_normalizado", "id"])
+
+
+def downgrade() -> None:
+    if INDEX in _index_names("usuarios"):
+        op.drop_index(INDEX, table_name="usuarios")
@@ -9,6 +9,11 @@ from __future__ import annotations
 from alembic import op  # type: ignore
 import sqlalchemy as sa
 
+# revision identifiers, used by Alembic.
+revision = "96f7eca40376"
+down_revision = ("20250918_migrations_consolidadas", "20250919_add_telefone")
+branch_labels = None
+depends_on = None
 
 
 def upgrade() -> None:
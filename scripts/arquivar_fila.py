@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Arquiva itens encerrados (concluídos/cancelados) da fila de atendimento.
+
+Move para ``fila_atendimento_historico`` os itens encerrados há mais de N dias,
+em lotes. Pode ser agendado (cron) além da execução automática na abertura do
+aplicativo.
+
+Execute: python scripts/arquivar_fila.py --dias 30 --lote 1000
+"""
+import sys
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+# Adicionar o diretório src ao path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root / "src"))
+
+from backend.db.database import AsyncSessionLocal
+from backend.core.config import settings
+from backend.controllers.fila_service import archive_queue
+
+
+async def main(dias: int, lote: int) -> None:
+    inicio = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        total = await archive_queue(session, dias=dias, lote=lote)
+    print(f"{total} itens arquivados em {time.perf_counter() - inicio:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dias", type=int, default=settings.fila_arquivo_dias)
+    parser.add_argument("--lote", type=int, default=settings.fila_arquivo_lote)
+    args = parser.parse_args()
+    asyncio.run(main(args.dias, args.lote))
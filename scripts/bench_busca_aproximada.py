@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca aproximada de pacientes (índice de trigramas).
+
+Gera uma base SQLite temporária com N pacientes, sorteia nomes existentes,
+introduz erros de digitação comuns ("Luis"/"Luiz", "Souza"/"Sousa") e mede
+latência e recall (paciente procurado entre os resultados) da busca exata
+(``search_patients``) e da aproximada (``fuzzy_search_patients``).
+
+Execute: python scripts/bench_busca_aproximada.py --pacientes 500000
+"""
+import sys
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+# Adicionar o diretório src ao path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root / "src"))
+
+from backend.db.database import Base, apply_sqlite_profile
+from backend.db.trigram import ensure_pacientes_trigramas
+from backend.core.texto import normalize_name
+from backend.models import Paciente
+from backend.controllers.paciente_service import search_patients, fuzzy_search_patients
+
+PRIMEIROS = [
+    "Ana", "Maria", "José", "João", "Luiz", "Luís", "Paulo", "Carlos", "Francisco", "Antônio",
+    "Marcos", "Rafael", "Felipe", "Bruno", "Gabriel", "Lucas", "Mateus", "Pedro", "Thiago", "Rodrigo",
+    "Juliana", "Fernanda", "Patrícia", "Aline", "Camila", "Amanda", "Bruna", "Letícia", "Larissa", "Vanessa",
+    "Raimundo", "Sebastião", "Cecília", "Conceição", "Heloísa", "Isabela", "Giovana", "Yasmin", "Wellington", "Cláudio",
+    "Sérgio", "Márcio", "Vinícius", "Leandro", "Fábio", "Rogério", "Douglas", "Edson", "Gustavo", "Henrique",
+    "Iara", "Jéssica", "Kátia", "Lívia", "Mônica", "Natália", "Priscila", "Renata", "Sabrina", "Tatiane",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Sousa", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+    "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira",
+    "Barbosa", "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes",
+    "Freitas", "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo", "Cavalcanti", "Monteiro", "Moura",
+    "Correia", "Pinto", "Campos", "Batista", "Vasconcelos", "Queiroz", "Figueiredo", "Magalhães", "Siqueira", "Brandão",
+    "Tavares", "Xavier", "Bezerra", "Cunha", "Farias", "Pires", "Medeiros", "Rezende", "Prado", "Guimarães",
+]
+# Trocas típicas de quem digita um nome que ouviu
+TROCAS = [("z", "s"), ("s", "z"), ("ss", "ç"), ("ç", "ss"), ("i", "y"), ("y", "i"), ("th", "t"), ("ph", "f"), ("ll", "l"), ("n", "m")]
+
+
+def gerar_nome(rng: random.Random) -> str:
+    return f"{rng.choice(PRIMEIROS)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+
+
+def errar(nome: str, rng: random.Random) -> str:
+    """Aplica um erro de digitação: troca fonética, letra omitida ou duplicada"""
+    texto = normalize_name(nome)
+    trocas = [(a, b) for a, b in TROCAS if a in texto]
+    modo = rng.random()
+    if trocas and modo < 0.6:
+        a, b = rng.choice(trocas)
+        return texto.replace(a, b, 1)
+    pos = rng.randrange(1, len(texto) - 1)
+    if modo < 0.8:
+        return texto[:pos] + texto[pos + 1:]
+    return texto[:pos] + texto[pos] + texto[pos:]
+
+
+def popular(url: str, total: int, rng: random.Random, lote: int = 5000) -> list[tuple[int, str]]:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    pacientes = []
+    with engine.begin() as conn:
+        for inicio in range(0, total, lote):
+            linhas = []
+            for pid in range(inicio + 1, min(inicio + lote, total) + 1):
+                nome = gerar_nome(rng)
+                pacientes.append((pid, nome))
+                linhas.append({
+                    "id": pid,
+                    "nome": nome,
+                    "nome_normalizado": normalize_name(nome),
+                    "cpf": f"{pid:011d}",
+                    "dataNascimento": date(1990, 1, 1),
+                    "statusAtendimento": "Aguardando Triagem",
+                })
+            conn.execute(insert(Paciente.__table__), linhas)
+        # carga em massa não passa pelo ORM: monta o vocabulário de uma vez
+        ensure_pacientes_trigramas(conn)
+    engine.dispose()
+    return pacientes
+
+
+def resumo(rotulo: str, tempos: list[float], acertos: int, total: int) -> None:
+    tempos_ms = sorted(t * 1000 for t in tempos)
+    p95 = tempos_ms[int(len(tempos_ms) * 0.95) - 1]
+    print(
+        f"{rotulo:<12} recall={acertos / total:6.1%}  "
+        f"p50={statistics.median(tempos_ms):7.2f} ms  p95={p95:7.2f} ms  max={tempos_ms[-1]:7.2f} ms"
+    )
+
+
+async def medir(url: str, pacientes: list[tuple[int, str]], consultas: int, limite: int, rng: random.Random) -> None:
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    event.listen(engine.sync_engine, "connect", apply_sqlite_profile)
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    amostra = [rng.choice(pacientes) for _ in range(consultas)]
+    termos = [errar(nome, rng) for _, nome in amostra]
+
+    async with Session() as session:
+        # aquece cache de páginas
+        await fuzzy_search_patients(session, termos[0], limit=limite)
+        for rotulo, busca in (("exata", search_patients), ("aproximada", fuzzy_search_patients)):
+            tempos, acertos = [], 0
+            for (pid, _), termo in zip(amostra, termos):
+                inicio = time.perf_counter()
+                encontrados = await busca(session, termo, limit=limite)
+                tempos.append(time.perf_counter() - inicio)
+                acertos += any(p.id == pid for p in encontrados)
+            resumo(rotulo, tempos, acertos, consultas)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pacientes", type=int, default=500_000)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        inicio = time.perf_counter()
+        pacientes = popular(url, args.pacientes, rng)
+        print(f"{args.pacientes} pacientes indexados em {time.perf_counter() - inicio:.1f} s")
+        asyncio.run(medir(url, pacientes, args.consultas, args.limite, rng))
+
+
+if __name__ == "__main__":
+    main()
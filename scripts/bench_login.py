@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark de login (authenticate_user) por configuração de hash de senha.
+
+Para cada configuração cria um usuário numa base SQLite temporária e mede a
+latência de ``authenticate_user`` (p50/p99): primeiro um login por vez, depois
+com ``--concorrencia`` logins simultâneos disputando o pool de hash. Serve para
+escolher ``APP_PASSWORD_SCHEMES``/``APP_BCRYPT_ROUNDS``/``APP_ARGON2_*`` na
+máquina de destino.
+
+Configurações: ``bcrypt:<rounds>`` ou ``argon2:<time_cost>:<memory_kib>:<paralelismo>``.
+Execute: python scripts/bench_login.py --logins 50 --concorrencia 8
+         python scripts/bench_login.py --config bcrypt:12 --config argon2:3:65536:4
+"""
+import sys
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+# Adicionar o diretório src ao path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root / "src"))
+
+from backend.db.database import Base, apply_sqlite_profile
+from backend.core import security
+from backend.models import PerfilUsuario
+from backend.controllers.usuario_service import create_user, authenticate_user, wait_pending_rehashes
+
+PADRAO = ["bcrypt:10", "bcrypt:12", "bcrypt:13", "argon2:2:19456:1", "argon2:3:65536:4"]
+SENHA = "Bench1234"
+
+
+def contexto(config: str):
+    nome, *params = config.split(":")
+    valores = [int(p) for p in params]
+    if nome == "bcrypt":
+        return security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=valores[0] if valores else None)
+    if nome == "argon2":
+        t, m, p = (valores + [None, None, None])[:3]
+        return security.build_pwd_context(
+            schemes="argon2", argon2_time_cost=t, argon2_memory_cost=m, argon2_parallelism=p
+        )
+    raise ValueError(f"Configuração desconhecida: {config}")
+
+
+def percentis(tempos: list[float]) -> str:
+    ms = sorted(t * 1000 for t in tempos)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    return f"p50={statistics.median(ms):7.1f} ms  p99={p99:7.1f} ms"
+
+
+async def login(Session, email: str) -> float:
+    async with Session() as session:
+        inicio = time.perf_counter()
+        user = await authenticate_user(session, email, SENHA)
+        duracao = time.perf_counter() - inicio
+    assert user is not None, "login falhou"
+    return duracao
+
+
+async def medir(Session, email: str, logins: int, concorrencia: int) -> tuple[list[float], list[float], float]:
+    """Latências um por vez, latências com ``concorrencia`` simultâneos e logins/s destes"""
+    await login(Session, email)  # aquece conexões e o pool de hash
+    serial = [await login(Session, email) for _ in range(logins)]
+
+    vagas = asyncio.Semaphore(concorrencia)
+
+    async def limitado() -> float:
+        async with vagas:
+            return await login(Session, email)
+
+    inicio = time.perf_counter()
+    paralelo = await asyncio.gather(*(limitado() for _ in range(logins)))
+    return serial, list(paralelo), logins / (time.perf_counter() - inicio)
+
+
+async def main_async(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        event.listen(engine.sync_engine, "connect", apply_sqlite_profile)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+        print(f"{args.logins} logins por configuração, {security.settings.password_hash_workers} threads de hash, "
+              f"{args.concorrencia} simultâneos")
+        for i, config in enumerate(args.config or PADRAO):
+            try:
+                security.pwd_context = contexto(config)
+            except (RuntimeError, ValueError) as e:
+                print(f"{config:<18} ignorada: {e}")
+                continue
+            email = f"bench{i}@exemplo.com"
+            async with Session() as session:
+                await create_user(session, nome=f"Bench {i}", email=email, senha=SENHA, perfil=PerfilUsuario.admin)
+            serial, paralelo, vazao = await medir(Session, email, args.logins, args.concorrencia)
+            await wait_pending_rehashes()
+            print(f"{config:<18} 1 por vez: {percentis(serial)}   "
+                  f"simultâneos: {percentis(paralelo)}  {vazao:6.1f} logins/s")
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", action="append", help="bcrypt:<rounds> ou argon2:<t>:<m>:<p> (repetível)")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
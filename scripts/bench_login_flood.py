@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark de login sob inundação de senhas erradas (credential stuffing).
+
+Dispara ``--taxa`` tentativas/s por ``--segundos`` a partir de uma única
+origem, misturando e-mails cadastrados e inexistentes, com e sem o limite de
+tentativas (``login_throttle``). Mede o uso de CPU do processo, quantas
+tentativas chegaram ao bcrypt e a latência de um login legítimo feito de outra
+estação durante a inundação. "CPU regime" é a segunda metade da janela, depois
+de esgotado o que o limite deixou passar. Tentativas além de ``--simultaneas``
+em curso são descartadas, como faria um servidor saturado.
+
+Execute: python scripts/bench_login_flood.py --taxa 1000 --segundos 10
+"""
+import sys
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+# Adicionar o diretório src ao path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root / "src"))
+
+from backend.db.database import Base, apply_sqlite_profile
+from backend.core import security
+from backend.core.config import settings
+from backend.models import UsuarioSistema, PerfilUsuario
+from backend.controllers import usuario_service
+from backend.controllers.login_throttle import LoginThrottle, LoginBloqueado
+
+SENHA = "Bench1234"
+ORIGEM_ATAQUE = "recepcao-1"
+ORIGEM_LEGITIMA = "recepcao-2"
+SEM_LIMITE = 10 ** 9
+
+
+def throttle(limitado: bool) -> LoginThrottle:
+    if not limitado:
+        return LoginThrottle(SEM_LIMITE, SEM_LIMITE, settings.login_throttle_janela_s, 0, settings.login_throttle_max_chaves)
+    return LoginThrottle(
+        settings.login_throttle_falhas,
+        settings.login_throttle_falhas_origem,
+        settings.login_throttle_janela_s,
+        settings.login_throttle_bloqueio_s,
+        settings.login_throttle_max_chaves,
+    )
+
+
+async def preparar(Session, usuarios: int) -> list[str]:
+    senha_hash = security.hash_password(SENHA)
+    emails = [f"usuario{i}@exemplo.com" for i in range(usuarios)]
+    async with Session() as session:
+        await session.execute(insert(UsuarioSistema), [
+            {"nome": f"Usuário {i}", "nome_normalizado": f"usuario {i}", "email": email,
+             "senha_hash": senha_hash, "perfil": PerfilUsuario.aluno, "ativo": True}
+            for i, email in enumerate(emails)
+        ])
+        await session.commit()
+    return emails
+
+
+async def cenario(Session, emails: list[str], limitado: bool, args, rng: random.Random) -> None:
+    usuario_service.login_throttle = throttle(limitado)
+    contagem = {"tentativas": 0, "recusadas": 0, "descartadas": 0}
+    vagas = asyncio.Semaphore(args.simultaneas)
+    legitimos: list[float] = []
+    loop = asyncio.get_running_loop()
+
+    async def tentativa(email: str) -> None:
+        try:
+            async with Session() as session:
+                await usuario_service.authenticate_user(session, email, "senha-errada", ORIGEM_ATAQUE)
+        except LoginBloqueado:
+            contagem["recusadas"] += 1
+        finally:
+            vagas.release()
+
+    async def login_legitimo(fim: float) -> None:
+        while loop.time() < fim:
+            async with Session() as session:
+                inicio = time.perf_counter()
+                await usuario_service.authenticate_user(session, emails[0], SENHA, ORIGEM_LEGITIMA)
+                legitimos.append(time.perf_counter() - inicio)
+            await asyncio.sleep(1.0)
+
+    async def cpu_no_meio() -> tuple[float, float]:
+        await asyncio.sleep(args.segundos / 2)
+        return time.process_time(), loop.time()
+
+    hashes_antes = security.password_hash_stats().chamadas
+    cpu_antes, inicio = time.process_time(), loop.time()
+    fim = inicio + args.segundos
+    legitimo = asyncio.create_task(login_legitimo(fim))
+    meio = asyncio.create_task(cpu_no_meio())
+    tarefas = []
+    for i in range(int(args.taxa * args.segundos)):
+        atraso = inicio + i / args.taxa - loop.time()
+        if atraso > 0:
+            await asyncio.sleep(atraso)
+        contagem["tentativas"] += 1
+        if vagas.locked():
+            contagem["descartadas"] += 1
+            continue
+        await vagas.acquire()
+        email = rng.choice(emails) if rng.random() < 0.5 else f"vazado{rng.randrange(10 ** 6)}@exemplo.com"
+        tarefas.append(asyncio.create_task(tentativa(email)))
+    await legitimo
+    agora, cpu_fim = loop.time(), time.process_time()
+    cpu_meio, instante_meio = await meio
+    uso = (cpu_fim - cpu_antes) / (agora - inicio)
+    uso_regime = (cpu_fim - cpu_meio) / (agora - instante_meio)
+    # o que ficou na fila do bcrypt não interessa mais
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await asyncio.gather(*tarefas, return_exceptions=True)
+
+    rotulo = "com limite" if limitado else "sem limite"
+    legit = f"{statistics.median(legitimos) * 1000:7.1f} ms" if legitimos else "   -   "
+    print(
+        f"{rotulo:<11} CPU {uso:6.1%} (regime {uso_regime:6.1%})  "
+        f"tentativas={contagem['tentativas']}  "
+        f"recusadas sem bcrypt={contagem['recusadas']}  descartadas={contagem['descartadas']}  "
+        f"bcrypt={security.password_hash_stats().chamadas - hashes_antes}  login legítimo p50={legit}"
+    )
+
+
+async def main_async(args) -> None:
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        event.listen(engine.sync_engine, "connect", apply_sqlite_profile)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        emails = await preparar(Session, args.usuarios)
+
+        print(f"{args.taxa} tentativas/s por {args.segundos} s, bcrypt {settings.bcrypt_rounds} rounds, "
+              f"{settings.password_hash_workers} threads de hash")
+        for limitado in (False, True):
+            await cenario(Session, emails, limitado, args, rng)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--taxa", type=int, default=1000)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--usuarios", type=int, default=200)
+    parser.add_argument("--simultaneas", type=int, default=100, help="tentativas em curso (cada uma com sua conexão)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
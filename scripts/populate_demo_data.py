@@ -24,7 +24,7 @@ try:
     HAS_FILA = True
 except ImportError:
     HAS_FILA = False
-from backend.core.security import hash_password
+from backend.core.security import hash_password_async
 
 
 async def create_clinicas(session):
@@ -61,7 +61,7 @@ async def create_usuarios(session, clinicas):
         cpf="11111111111",
         nome="Administrador do Sistema",
         email="admin@clinisys.ufsc.br",
-        senha_hash=hash_password("admin123"),
+        senha_hash=await hash_password_async("admin123"),
         perfil=PerfilUsuario.admin
     )
     session.add(admin_user)
@@ -98,12 +98,14 @@ async def create_usuarios(session, clinicas):
         }
     ]
     
-    for prof_data in professores_data:
+    # hashes em paralelo no pool de hash (cada um leva ~250 ms)
+    hashes = await asyncio.gather(*(hash_password_async("prof123") for _ in professores_data))
+    for prof_data, senha_hash in zip(professores_data, hashes):
         professor = UsuarioSistema(
             cpf=prof_data["cpf"],
             nome=prof_data["nome"],
             email=prof_data["email"],
-            senha_hash=hash_password("prof123"),
+            senha_hash=senha_hash,
             perfil=PerfilUsuario.professor
         )
         session.add(professor)
@@ -168,12 +170,13 @@ async def create_usuarios(session, clinicas):
         }
     ]
     
-    for aluno_data in alunos_data:
+    hashes = await asyncio.gather(*(hash_password_async("aluno123") for _ in alunos_data))
+    for aluno_data, senha_hash in zip(alunos_data, hashes):
         aluno = UsuarioSistema(
             cpf=aluno_data["cpf"],
             nome=aluno_data["nome"],
             email=aluno_data["email"],
-            senha_hash=hash_password("aluno123"),
+            senha_hash=senha_hash,
             perfil=PerfilUsuario.aluno
         )
         session.add(aluno)
@@ -203,12 +206,13 @@ async def create_usuarios(session, clinicas):
         }
     ]
     
-    for recep_data in recepcionistas_data:
+    hashes = await asyncio.gather(*(hash_password_async("recep123") for _ in recepcionistas_data))
+    for recep_data, senha_hash in zip(recepcionistas_data, hashes):
         recepcionista = UsuarioSistema(
             cpf=recep_data["cpf"],
             nome=recep_data["nome"],
             email=recep_data["email"],
-            senha_hash=hash_password("recep123"),
+            senha_hash=senha_hash,
             perfil=PerfilUsuario.recepcionista
         )
         session.add(recepcionista)
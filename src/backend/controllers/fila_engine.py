@@ -0,0 +1,382 @@
+"""Espelho em memória das filas de atendimento.
+
+Para cada ``TipoAtendimento`` mantém um heap dos itens aguardando, ordenado por
+(prioridade, criado_em, id) — a mesma ordem do índice
+``ix_fila_tipo_status_prioridade_criado`` — e o conjunto dos itens em
+atendimento. "Próximo paciente" custa O(log n) (amortizado) e a visão dos k
+primeiros custa O(k log k), sem reordenar a fila no banco a cada atualização.
+
+O espelho é carregado do banco na primeira consulta de cada tipo e mantido
+pelos eventos de sessão: o que foi gravado via ORM é aplicado somente após o
+commit (rollback descarta). UPDATE/DELETE em massa não passam pelos eventos:
+quem os executa chama ``apply`` com o estado devolvido pelo RETURNING.
+
+Outras estações gravam no mesmo arquivo SQLite sem passar por este processo.
+Por isso toda escrita em itens ativos avança, na própria transação, o contador
+do tipo em ``fila_versoes`` (``bump_version``; o flush do ORM o faz sozinho).
+``ensure_loaded`` lê essa única linha antes de servir do heap e recarrega
+quando ela difere da versão conhecida. Commits locais avançam a versão
+conhecida junto com o espelho, desde que nenhuma outra estação tenha gravado
+no meio; do contrário a próxima leitura recarrega.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import event, select, update, insert, inspect, text, bindparam
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.fila import FilaAtendimento, FilaVersao, TipoAtendimento, StatusFila
+from ..models.paciente import Paciente
+
+# chave de ordenação: (prioridade, criado_em, id)
+FilaKey = tuple[int, datetime, int]
+
+STATUS_ATIVOS = (StatusFila.aguardando, StatusFila.em_atendimento)
+
+_PENDING_KEY = "fila_engine_pending"
+# tipo -> (versão antes da transação, versão ao fim), ou None se o espelho não acompanha
+_VERSOES_KEY = "fila_engine_versoes"
+
+_VERSAO = FilaVersao.__table__
+# um único comando (SQLite >= 3.35 e PostgreSQL), texto fixo: sem recompilar a cada escrita
+_BUMP_SQL = text(
+    "INSERT INTO fila_versoes (tipo, versao) VALUES (:tipo, 1) "
+    "ON CONFLICT (tipo) DO UPDATE SET versao = fila_versoes.versao + 1 "
+    "RETURNING versao"
+).bindparams(bindparam("tipo", type_=_VERSAO.c.tipo.type))
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Normaliza para comparar datas com e sem fuso (SQLite devolve sem fuso)"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@dataclass(frozen=True)
+class FilaSnapshot:
+    """Estado de um item da fila relevante para a ordenação"""
+    id: int
+    tipo: TipoAtendimento
+    status: StatusFila
+    prioridade: int
+    criado_em: datetime
+    removido: bool = False
+
+    @property
+    def key(self) -> FilaKey:
+        return (int(self.prioridade), naive_utc(self.criado_em), self.id)
+
+    @classmethod
+    def of(cls, item: FilaAtendimento, removido: bool = False) -> "FilaSnapshot":
+        return cls(item.id, item.tipo, item.status, item.prioridade, item.criado_em, removido)
+
+
+class _Fila:
+    """Heap de espera com remoção preguiçosa + itens em atendimento.
+
+    Entradas do heap são ``key + (seq,)``; uma entrada só vale enquanto for a
+    registrada em ``waiting`` para o id, então reinserções não duplicam itens.
+    """
+
+    def __init__(self) -> None:
+        self.heap: list[tuple] = []
+        self.waiting: dict[int, tuple] = {}
+        self.attending: dict[int, FilaKey] = {}
+        self._seq = itertools.count()
+
+    def discard(self, fila_id: int) -> None:
+        # a entrada antiga fica no heap e é ignorada ao chegar ao topo
+        self.waiting.pop(fila_id, None)
+        self.attending.pop(fila_id, None)
+
+    def put(self, snap: FilaSnapshot) -> None:
+        current = self.waiting.get(snap.id)
+        if current is not None and not snap.removido and snap.status == StatusFila.aguardando and current[:3] == snap.key:
+            return
+        self.discard(snap.id)
+        if snap.removido:
+            return
+        if snap.status == StatusFila.aguardando:
+            entry = snap.key + (next(self._seq),)
+            self.waiting[snap.id] = entry
+            heapq.heappush(self.heap, entry)
+        elif snap.status == StatusFila.em_atendimento:
+            self.attending[snap.id] = snap.key
+
+    def _valid(self, entry: tuple) -> bool:
+        return self.waiting.get(entry[2]) is entry
+
+    def peek(self) -> Optional[FilaKey]:
+        while self.heap and not self._valid(self.heap[0]):
+            heapq.heappop(self.heap)
+        if len(self.heap) > 2 * len(self.waiting) + 64:
+            self.compact()
+        return self.heap[0][:3] if self.heap else None
+
+    def compact(self) -> None:
+        self.heap = list(self.waiting.values())
+        heapq.heapify(self.heap)
+
+    def iter_waiting(self) -> Iterator[FilaKey]:
+        """Percorre o heap em ordem sem desmontá-lo (busca best-first nos índices)"""
+        heap = self.heap
+        if not heap:
+            return
+        frontier = [(heap[0], 0)]
+        while frontier:
+            entry, i = heapq.heappop(frontier)
+            if self._valid(entry):
+                yield entry[:3]
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+
+class FilaEngine:
+    """Filas por tipo de atendimento, espelhadas do banco"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._filas: dict[TipoAtendimento, _Fila] = {}
+        # versão do banco na última carga de cada tipo (``_versao``)
+        self._versoes: dict[TipoAtendimento, int] = {}
+        # eventos recebidos enquanto o tipo está sendo carregado do banco
+        self._loading: dict[TipoAtendimento, list[FilaSnapshot]] = {}
+        # sinalizado ao fim de cada carga: chamadas concorrentes esperam por ela
+        self._cargas: dict[TipoAtendimento, asyncio.Event] = {}
+
+    def loaded(self, tipo: TipoAtendimento) -> bool:
+        return tipo in self._filas
+
+    @staticmethod
+    async def _versao(session: AsyncSession, tipo: TipoAtendimento) -> int:
+        """Contador de escritas do tipo (0 se a fila nunca foi gravada)"""
+        stmt = select(FilaVersao.versao).where(FilaVersao.tipo == tipo)
+        return (await session.scalar(stmt)) or 0
+
+    async def ensure_loaded(self, session: AsyncSession, tipo: TipoAtendimento) -> None:
+        """Garante a fila do tipo em memória e em dia com o banco (recarrega se mudou)"""
+        with self._lock:
+            carga = self._cargas.get(tipo)
+        if carga is not None:
+            await carga.wait()
+            return
+        versao = await self._versao(session, tipo)
+        with self._lock:
+            if tipo in self._filas and self._versoes.get(tipo) == versao:
+                return
+            carga = self._cargas.get(tipo)
+            if carga is None:
+                self._loading[tipo] = []
+                self._cargas[tipo] = asyncio.Event()
+        if carga is not None:
+            # outra carga começou enquanto a versão era lida
+            await carga.wait()
+            return
+        try:
+            await self._load(session, tipo, versao)
+        finally:
+            with self._lock:
+                self._loading.pop(tipo, None)
+                self._cargas.pop(tipo).set()
+
+    async def _load(self, session: AsyncSession, tipo: TipoAtendimento, versao: int) -> None:
+        # mesma transação de leitura da versão: os itens correspondem a ela
+        stmt = select(
+            FilaAtendimento.id,
+            FilaAtendimento.tipo,
+            FilaAtendimento.status,
+            FilaAtendimento.prioridade,
+            FilaAtendimento.criado_em,
+        ).where(
+            FilaAtendimento.tipo == tipo,
+            FilaAtendimento.status.in_(STATUS_ATIVOS),
+        )
+        rows = (await session.execute(stmt)).all()
+        fila = _Fila()
+        for row in rows:
+            fila.put(FilaSnapshot(*row))
+        with self._lock:
+            for snap in self._loading.get(tipo, []):
+                fila.put(snap)
+            fila.compact()
+            self._filas[tipo] = fila
+            self._versoes[tipo] = versao
+
+    async def reload(self, session: AsyncSession, tipo: Optional[TipoAtendimento] = None) -> None:
+        """Descarta e recarrega do banco (um tipo ou todos)"""
+        self.reset(tipo)
+        for t in ([tipo] if tipo else list(TipoAtendimento)):
+            await self.ensure_loaded(session, t)
+
+    def reset(self, tipo: Optional[TipoAtendimento] = None) -> None:
+        with self._lock:
+            if tipo is None:
+                self._filas.clear()
+            else:
+                self._filas.pop(tipo, None)
+
+    def apply(self, snap: FilaSnapshot) -> None:
+        """Aplica o novo estado de um item (idempotente)"""
+        with self._lock:
+            if snap.tipo in self._loading:
+                self._loading[snap.tipo].append(snap)
+            # o item pode ter mudado de tipo: remove de todas as filas
+            for tipo, fila in self._filas.items():
+                if tipo != snap.tipo:
+                    fila.discard(snap.id)
+            fila = self._filas.get(snap.tipo)
+            if fila is not None:
+                fila.put(snap)
+
+    def apply_version(self, tipo: TipoAtendimento, anterior: int, versao: int) -> None:
+        """Avança a versão conhecida após um commit local que a levou de ``anterior`` a ``versao``.
+
+        Se a versão conhecida não é ``anterior``, outra estação gravou no meio
+        (ou o tipo está carregando): a versão fica como está e a próxima
+        leitura recarrega.
+        """
+        with self._lock:
+            if tipo in self._filas and tipo not in self._loading and self._versoes.get(tipo) == anterior:
+                self._versoes[tipo] = versao
+
+    def peek(self, tipo: TipoAtendimento) -> Optional[int]:
+        """Id do próximo item aguardando, ou None"""
+        with self._lock:
+            fila = self._filas.get(tipo)
+            key = fila.peek() if fila else None
+            return key[2] if key else None
+
+    def waiting_ids(self, tipo: TipoAtendimento, limit: Optional[int] = None) -> list[int]:
+        """Ids aguardando, em ordem de atendimento (os ``limit`` primeiros)"""
+        with self._lock:
+            fila = self._filas.get(tipo)
+            if fila is None:
+                return []
+            result = []
+            for key in fila.iter_waiting():
+                if limit is not None and len(result) >= limit:
+                    break
+                result.append(key[2])
+            return result
+
+    def queue_ids(self, tipo: TipoAtendimento, limit: Optional[int] = None) -> list[int]:
+        """Itens em atendimento e aguardando, na ordem (prioridade, criado_em, id)"""
+        with self._lock:
+            fila = self._filas.get(tipo)
+            if fila is None:
+                return []
+            merged = heapq.merge(sorted(fila.attending.values()), fila.iter_waiting())
+            result = []
+            for key in merged:
+                if limit is not None and len(result) >= limit:
+                    break
+                result.append(key[2])
+            return result
+
+    def size(self, tipo: TipoAtendimento) -> int:
+        with self._lock:
+            fila = self._filas.get(tipo)
+            return len(fila.waiting) if fila else 0
+
+
+fila_engine = FilaEngine()
+
+
+# ---------------------------------------------------------------------------
+# Versão das filas no banco
+# ---------------------------------------------------------------------------
+
+def _bump(connection: Connection, tipo: TipoAtendimento) -> int:
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        return connection.execute(_BUMP_SQL, {"tipo": tipo}).scalar_one()
+    stmt = update(_VERSAO).where(_VERSAO.c.tipo == tipo).values(versao=_VERSAO.c.versao + 1)
+    if connection.execute(stmt).rowcount == 0:
+        connection.execute(insert(_VERSAO).values(tipo=tipo, versao=1))
+    return connection.execute(select(_VERSAO.c.versao).where(_VERSAO.c.tipo == tipo)).scalar_one()
+
+
+def _registrar_versoes(session: Session, tipos: Iterable[TipoAtendimento], espelhado: bool = True) -> None:
+    """Avança o contador de cada tipo na transação da sessão.
+
+    ``espelhado=False``: a escrita não chega ao espelho por ``apply`` (ex: itens
+    removidos em cascata pelo banco); o commit não avança a versão conhecida.
+    """
+    versoes: dict = session.info.setdefault(_VERSOES_KEY, {})
+    connection = session.connection()
+    for tipo in tipos:
+        versao = _bump(connection, tipo)
+        if not espelhado or (tipo in versoes and versoes[tipo] is None):
+            versoes[tipo] = None
+        else:
+            anterior = versoes[tipo][0] if tipo in versoes else versao - 1
+            versoes[tipo] = (anterior, versao)
+
+
+async def bump_version(session: AsyncSession, tipos: Iterable[TipoAtendimento]) -> None:
+    """Para escritas que não passam pelo flush (INSERT/UPDATE em massa): chamar antes do commit"""
+    tipos = set(tipos)
+    if tipos:
+        await session.run_sync(_registrar_versoes, tipos)
+
+
+# ---------------------------------------------------------------------------
+# Sincronização com o banco via eventos de sessão
+# ---------------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _collect_fila_changes(session: Session, _flush_context) -> None:
+    pending: dict[int, FilaSnapshot] = session.info.setdefault(_PENDING_KEY, {})
+    tipos: set[TipoAtendimento] = set()
+    removidos_em_cascata = False
+    for obj in session.new:
+        if isinstance(obj, FilaAtendimento):
+            pending[obj.id] = FilaSnapshot.of(obj)
+            tipos.add(obj.tipo)
+    for obj in session.dirty:
+        if isinstance(obj, FilaAtendimento) and session.is_modified(obj, include_collections=False):
+            pending[obj.id] = FilaSnapshot.of(obj)
+            tipos.add(obj.tipo)
+            # mudança de tipo: a fila de origem também mudou
+            tipos.update(inspect(obj).attrs.tipo.history.deleted)
+    for obj in session.deleted:
+        if isinstance(obj, FilaAtendimento):
+            pending[obj.id] = FilaSnapshot.of(obj, removido=True)
+            tipos.add(obj.tipo)
+        elif isinstance(obj, Paciente):
+            removidos_em_cascata = True
+    if tipos:
+        _registrar_versoes(session, tipos)
+    if removidos_em_cascata:
+        # o ON DELETE CASCADE apaga itens da fila sem passar pelo ORM
+        _registrar_versoes(session, TipoAtendimento, espelhado=False)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_fila_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        for snap in pending.values():
+            fila_engine.apply(snap)
+    versoes = session.info.pop(_VERSOES_KEY, None)
+    if versoes:
+        for tipo, faixa in versoes.items():
+            if faixa is not None:
+                fila_engine.apply_version(tipo, *faixa)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_fila_changes(session: Session, _previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_VERSOES_KEY, None)
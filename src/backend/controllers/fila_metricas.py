@@ -0,0 +1,162 @@
+"""Métricas materializadas das filas: contadores e esboços de quantis por dia.
+
+``record_events`` é chamado pelo ``fila_service`` antes do commit de cada
+transição, então as métricas andam na mesma transação do item (rollback
+desfaz as duas). Cada evento vira incrementos via UPSERT, sem ler o estado
+anterior: ``fila_metricas_diarias`` acumula contagens e somas (médias) e
+``fila_metricas_histograma`` conta amostras por balde de ``core.sketch``
+(quantis). A leitura custa duas consultas pela chave (dia, tipo), qualquer
+que seja o tamanho do histórico.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update, insert, text, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.sketch import bucket_index, quantile
+from ..models.fila import FilaMetricaDiaria, FilaMetricaHistograma, TipoAtendimento, StatusFila
+from ..views.fila_view import FilaMetricasResponse
+from .fila_engine import naive_utc
+
+MEDIDA_ESPERA = "espera"
+MEDIDA_ATENDIMENTO = "atendimento"
+
+_CONTADOR_POR_STATUS = {
+    StatusFila.aguardando: "chegadas",
+    StatusFila.em_atendimento: "inicios",
+    StatusFila.concluido: "conclusoes",
+    StatusFila.cancelado: "cancelamentos",
+}
+_SOMAS = ("chegadas", "inicios", "conclusoes", "cancelamentos", "espera_total", "atendimento_total", "atendimentos_medidos")
+
+
+@dataclass(frozen=True)
+class EventoFila:
+    """Um item entrou em ``status`` no instante ``em``"""
+    tipo: TipoAtendimento
+    status: StatusFila
+    em: datetime
+    criado_em: Optional[datetime] = None
+    iniciado_em: Optional[datetime] = None
+
+
+def dia_do_evento(em: datetime) -> date:
+    """Dia local do evento (datas sem fuso são UTC, como as do SQLite)"""
+    if em.tzinfo is None:
+        em = em.replace(tzinfo=timezone.utc)
+    return em.astimezone().date()
+
+
+def _segundos(inicio: Optional[datetime], fim: datetime) -> Optional[float]:
+    if inicio is None:
+        return None
+    return max((naive_utc(fim) - naive_utc(inicio)).total_seconds(), 0.0)
+
+
+@lru_cache(maxsize=None)
+def _upsert_sql(model, chave: tuple[str, ...], somas: tuple[str, ...]):
+    """INSERT ... ON CONFLICT DO UPDATE (mesma sintaxe no SQLite e no PostgreSQL).
+
+    Montado como texto: o ``on_conflict_do_update`` dos dialetos não tem
+    chave de cache no SQLAlchemy 2.0 e seria recompilado a cada transição.
+    """
+    table = model.__table__
+    nomes = [c.name for c in table.columns]
+    sql = (
+        f"INSERT INTO {table.name} ({', '.join(nomes)}) VALUES ({', '.join(':' + n for n in nomes)}) "
+        f"ON CONFLICT ({', '.join(chave)}) DO UPDATE SET "
+        + ", ".join(f"{c} = {table.name}.{c} + excluded.{c}" for c in somas)
+    )
+    return text(sql).bindparams(*(bindparam(c.name, type_=c.type) for c in table.columns))
+
+
+async def _upsert(session: AsyncSession, model, chave: tuple[str, ...], linhas: list[dict], somas: tuple[str, ...]) -> None:
+    """Soma ``somas`` nas linhas existentes (pela ``chave``) ou as insere"""
+    if not linhas:
+        return
+    if session.get_bind().dialect.name in ("sqlite", "postgresql"):
+        await session.execute(_upsert_sql(model, chave, somas), linhas)
+        return
+    table = model.__table__
+    for linha in linhas:
+        result = await session.execute(
+            update(table)
+            .where(*(table.c[c] == linha[c] for c in chave))
+            .values({c: table.c[c] + linha[c] for c in somas})
+        )
+        if result.rowcount == 0:
+            await session.execute(insert(table).values(**linha))
+
+
+async def record_events(session: AsyncSession, eventos: Iterable[EventoFila]) -> None:
+    """Acumula os eventos nas métricas do dia (sem commit: vai na transação do chamador)"""
+
+    contadores: dict[tuple[date, TipoAtendimento], Counter] = defaultdict(Counter)
+    baldes: Counter[tuple[date, TipoAtendimento, str, int]] = Counter()
+    for ev in eventos:
+        chave = (dia_do_evento(ev.em), ev.tipo)
+        contadores[chave][_CONTADOR_POR_STATUS[ev.status]] += 1
+        if ev.status == StatusFila.em_atendimento:
+            espera = _segundos(ev.criado_em, ev.em)
+            if espera is not None:
+                contadores[chave]["espera_total"] += espera
+                baldes[chave + (MEDIDA_ESPERA, bucket_index(espera))] += 1
+        elif ev.status == StatusFila.concluido:
+            atendimento = _segundos(ev.iniciado_em, ev.em)
+            if atendimento is not None:
+                contadores[chave]["atendimento_total"] += atendimento
+                contadores[chave]["atendimentos_medidos"] += 1
+                baldes[chave + (MEDIDA_ATENDIMENTO, bucket_index(atendimento))] += 1
+
+    await _upsert(
+        session, FilaMetricaDiaria, ("dia", "tipo"),
+        [{"dia": dia, "tipo": tipo, **{c: soma.get(c, 0) for c in _SOMAS}} for (dia, tipo), soma in contadores.items()],
+        _SOMAS,
+    )
+    await _upsert(
+        session, FilaMetricaHistograma, ("dia", "tipo", "medida", "balde"),
+        [
+            {"dia": dia, "tipo": tipo, "medida": medida, "balde": balde, "contagem": n}
+            for (dia, tipo, medida, balde), n in baldes.items()
+        ],
+        ("contagem",),
+    )
+
+
+async def read_metrics(session: AsyncSession, dia: date) -> dict[TipoAtendimento, FilaMetricasResponse]:
+    """Métricas do dia para todos os tipos (sem ``aguardando``, que vem da fila em memória)"""
+
+    metricas = {tipo: FilaMetricasResponse(tipo=tipo, dia=dia) for tipo in TipoAtendimento}
+
+    # colunas, não entidades: o identity map não enxerga os UPSERTs
+    stmt = select(*(getattr(FilaMetricaDiaria, c) for c in ("tipo",) + _SOMAS)).where(FilaMetricaDiaria.dia == dia)
+    for linha in (await session.execute(stmt)).all():
+        m = metricas[linha.tipo]
+        m.chegadas, m.inicios = linha.chegadas, linha.inicios
+        m.conclusoes, m.cancelamentos = linha.conclusoes, linha.cancelamentos
+        if linha.inicios:
+            m.espera_media = linha.espera_total / linha.inicios
+        if linha.atendimentos_medidos:
+            m.atendimento_medio = linha.atendimento_total / linha.atendimentos_medidos
+
+    histogramas: dict[tuple[TipoAtendimento, str], dict[int, int]] = defaultdict(dict)
+    stmt = select(
+        FilaMetricaHistograma.tipo, FilaMetricaHistograma.medida, FilaMetricaHistograma.balde, FilaMetricaHistograma.contagem
+    ).where(FilaMetricaHistograma.dia == dia)
+    for tipo, medida, balde, contagem in (await session.execute(stmt)).all():
+        histogramas[(tipo, medida)][balde] = contagem
+    for (tipo, medida), contagens in histogramas.items():
+        m = metricas[tipo]
+        if medida == MEDIDA_ESPERA:
+            m.espera_p50, m.espera_p90 = quantile(contagens, 0.5), quantile(contagens, 0.9)
+        elif medida == MEDIDA_ATENDIMENTO:
+            m.atendimento_p50, m.atendimento_p90 = quantile(contagens, 0.5), quantile(contagens, 0.9)
+
+    return metricas
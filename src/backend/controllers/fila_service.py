@@ -1,74 +1,147 @@
 from __future__ import annotations
 
-from typing import Optional, List
+import enum
+from typing import Optional, List, Iterable
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, update, insert as sql_insert, delete, and_, or_, tuple_, union_all, type_coerce, String
 from sqlalchemy.orm import selectinload
-from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta, timezone
 
-from ..models.fila import FilaAtendimento, TipoAtendimento, StatusFila
+from ..models.fila import FilaAtendimento, FilaAtendimentoHistorico, TipoAtendimento, StatusFila, PrioridadeFila, UQ_FILA_PACIENTE_ATIVO, FILA_ATIVA
 from ..models.paciente import Paciente
+from ..views.fila_view import FilaResponse, FilaMetricasResponse, PacienteResumido
+from ..core.config import settings
+from ..db.database import upsert_insert
+from ..core.cursor import encode_cursor, decode_cursor
+from .fila_engine import fila_engine, FilaSnapshot, bump_version
+from .fila_metricas import EventoFila, record_events, read_metrics, dia_do_evento
+
+# Ordem de atendimento (servida por ix_fila_tipo_status_prioridade_criado)
+ORDEM_FILA = (FilaAtendimento.prioridade, FilaAtendimento.criado_em, FilaAtendimento.id)
+
+# Máquina de estados: aguardando -> em_atendimento -> concluido/cancelado.
+# Desistência antes de ser chamado também cancela.
+TRANSICOES_FILA: dict[StatusFila, frozenset[StatusFila]] = {
+    StatusFila.aguardando: frozenset({StatusFila.em_atendimento, StatusFila.cancelado}),
+    StatusFila.em_atendimento: frozenset({StatusFila.concluido, StatusFila.cancelado}),
+    StatusFila.concluido: frozenset(),
+    StatusFila.cancelado: frozenset(),
+}
+
+# ids por UPDATE em lote (limite de parâmetros do SQLite)
+LOTE_TRANSICAO = 500
+
+
+class ResultadoTransicao(enum.Enum):
+    """Resultado, por item, de uma transição em lote"""
+    atualizado = "atualizado"
+    nao_encontrado = "nao_encontrado"
+    invalido = "invalido"  # status atual não permite a transição
+
+
+def _is_active_duplicate(exc: IntegrityError) -> bool:
+    """Violação do índice único parcial (paciente já ativo na fila do tipo)"""
+    message = str(exc.orig)
+    return UQ_FILA_PACIENTE_ATIVO in message or "fila_atendimento.paciente_id, fila_atendimento.tipo" in message
 
 
 async def add_to_queue(
     session: AsyncSession,
     paciente_id: int,
     tipo: TipoAtendimento,
-    observacao: Optional[str] = None
+    observacao: Optional[str] = None,
+    prioridade: PrioridadeFila = PrioridadeFila.normal
 ) -> FilaAtendimento:
-    """Adiciona paciente à fila de atendimento"""
-    
-    # Verifica se paciente já está na fila para o mesmo tipo
-    existing = await session.execute(
-        select(FilaAtendimento).where(
-            and_(
-                FilaAtendimento.paciente_id == paciente_id,
-                FilaAtendimento.tipo == tipo,
-                FilaAtendimento.status.in_([StatusFila.aguardando, StatusFila.em_atendimento])
-            )
-        )
-    )
-    
-    if existing.scalars().first():
-        raise ValueError(f"Paciente já está na fila de {tipo.value}")
+    """Adiciona paciente à fila de atendimento.
+
+    Insere direto, sem consulta prévia: a duplicidade (paciente já aguardando
+    ou em atendimento no mesmo tipo) é barrada pelo índice único parcial
+    ``uq_fila_paciente_tipo_ativo``.
+    """
     
-    fila_item = FilaAtendimento(
+    values = dict(
         paciente_id=paciente_id,
         tipo=tipo,
         status=StatusFila.aguardando,
+        prioridade=int(prioridade),
         observacao=observacao
     )
+    duplicado = ValueError(f"Paciente já está na fila de {tipo.value}")
+    
+    chegada = EventoFila(tipo, StatusFila.aguardando, datetime.now(timezone.utc))
+    
+    insert = upsert_insert(session)
+    if insert is None:
+        fila_item = FilaAtendimento(**values)
+        session.add(fila_item)
+        try:
+            await session.flush()
+        except IntegrityError as e:
+            await session.rollback()
+            if _is_active_duplicate(e):
+                raise duplicado from e
+            raise
+        await record_events(session, [chegada])
+        await session.commit()
+        return fila_item
     
-    session.add(fila_item)
+    # INSERT ... ON CONFLICT DO NOTHING RETURNING: sem linha de volta = duplicado
+    stmt = (
+        insert(FilaAtendimento)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=["paciente_id", "tipo"], index_where=FILA_ATIVA)
+        .returning(FilaAtendimento)
+    )
+    fila_item = (await session.execute(stmt)).scalars().first()
+    if fila_item is None:
+        # encerra a transação de escrita: no SQLite ela seguraria o lock do banco
+        await session.rollback()
+        raise duplicado
+    await record_events(session, [chegada])
+    await bump_version(session, [tipo])
     await session.commit()
-    await session.refresh(fila_item)
     
+    # INSERT direto não passa pelos eventos de flush
+    fila_engine.apply(FilaSnapshot.of(fila_item))
     return fila_item
 
 
+async def _load_in_order(session: AsyncSession, ids: List[int]) -> List[FilaAtendimento]:
+    """Carrega os itens pelo id (PK), preservando a ordem recebida"""
+    if not ids:
+        return []
+    stmt = (
+        select(FilaAtendimento)
+        .where(FilaAtendimento.id.in_(ids))
+        .options(selectinload(FilaAtendimento.paciente))
+    )
+    result = await session.execute(stmt)
+    by_id = {item.id: item for item in result.scalars().all()}
+    return [by_id[i] for i in ids if i in by_id]
+
+
 async def get_queue_by_type(
     session: AsyncSession,
     tipo: TipoAtendimento,
-    status: Optional[StatusFila] = None
+    status: Optional[StatusFila] = None,
+    limit: Optional[int] = None
 ) -> List[FilaAtendimento]:
-    """Busca fila por tipo de atendimento"""
-    
-    conditions = [FilaAtendimento.tipo == tipo]
+    """Busca fila por tipo de atendimento, em ordem de prioridade e chegada"""
     
-    if status:
-        conditions.append(FilaAtendimento.status == status)
-    else:
-        # Por padrão, não mostra itens cancelados ou concluídos
-        conditions.append(
-            FilaAtendimento.status.in_([StatusFila.aguardando, StatusFila.em_atendimento])
-        )
+    if status is None:
+        # Por padrão, não mostra itens cancelados ou concluídos: vem da fila em memória
+        await fila_engine.ensure_loaded(session, tipo)
+        return await _load_in_order(session, fila_engine.queue_ids(tipo, limit))
     
     stmt = (
         select(FilaAtendimento)
-        .where(and_(*conditions))
+        .where(and_(FilaAtendimento.tipo == tipo, FilaAtendimento.status == status))
         .options(selectinload(FilaAtendimento.paciente))
-        .order_by(FilaAtendimento.criado_em)
+        .order_by(*ORDEM_FILA)
     )
+    if limit is not None:
+        stmt = stmt.limit(limit)
     
     result = await session.execute(stmt)
     return result.scalars().all()
@@ -77,15 +150,117 @@ async def get_queue_by_type(
 async def get_waiting_queue(session: AsyncSession) -> List[FilaAtendimento]:
     """Busca todos os pacientes aguardando (triagem ou consulta)"""
     
+    ids: List[int] = []
+    for tipo in TipoAtendimento:
+        await fila_engine.ensure_loaded(session, tipo)
+        ids.extend(fila_engine.waiting_ids(tipo))
+    return await _load_in_order(session, ids)
+
+
+async def get_next_in_queue(
+    session: AsyncSession,
+    tipo: TipoAtendimento
+) -> Optional[FilaAtendimento]:
+    """Próximo paciente aguardando: maior prioridade, depois ordem de chegada"""
+    
+    await fila_engine.ensure_loaded(session, tipo)
+    fila_id = fila_engine.peek(tipo)
+    if fila_id is None:
+        return None
+    items = await _load_in_order(session, [fila_id])
+    return items[0] if items else None
+
+
+async def get_queue_metrics(
+    session: AsyncSession,
+    dia: Optional[date] = None
+) -> dict[TipoAtendimento, FilaMetricasResponse]:
+    """Métricas do dia por fila: movimento, espera e duração do atendimento.
+
+    Lê as métricas materializadas (``fila_metricas``) e o tamanho atual da
+    fila em memória; não percorre ``fila_atendimento`` nem o histórico.
+    """
+    
+    hoje = dia_do_evento(datetime.now(timezone.utc))
+    dia = dia or hoje
+    metricas = await read_metrics(session, dia)
+    if dia == hoje:
+        for tipo, m in metricas.items():
+            await fila_engine.ensure_loaded(session, tipo)
+            m.aguardando = fila_engine.size(tipo)
+    return metricas
+
+
+async def claim_next(
+    session: AsyncSession,
+    tipo: TipoAtendimento,
+    aluno_id: int
+) -> Optional[FilaAtendimento]:
+    """Assume o próximo paciente aguardando, de forma atômica.
+
+    Escolhe e passa o item para ``em_atendimento`` em um único UPDATE ...
+    RETURNING, condicionado a ele ainda estar aguardando; dois alunos
+    concorrentes nunca recebem o mesmo item. No PostgreSQL a seleção usa
+    ``FOR UPDATE SKIP LOCKED`` para que um não espere pelo outro; no SQLite a
+    escrita já é serializada pelo banco. Retorna None se a fila estiver vazia.
+    """
+    
+    proximo = (
+        select(FilaAtendimento.id)
+        .where(
+            FilaAtendimento.tipo == tipo,
+            FilaAtendimento.status == StatusFila.aguardando,
+        )
+        .order_by(*ORDEM_FILA)
+        .limit(1)
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        proximo = proximo.with_for_update(skip_locked=True)
+    
+    values = _transition_values(StatusFila.em_atendimento, None)
     stmt = (
-        select(FilaAtendimento)
-        .where(FilaAtendimento.status == StatusFila.aguardando)
-        .options(selectinload(FilaAtendimento.paciente))
-        .order_by(FilaAtendimento.tipo, FilaAtendimento.criado_em)
+        update(FilaAtendimento)
+        .where(
+            FilaAtendimento.id == proximo.scalar_subquery(),
+            FilaAtendimento.status == StatusFila.aguardando,
+        )
+        .values(aluno_id=aluno_id, **values)
+        .returning(FilaAtendimento)
+        .execution_options(synchronize_session=False, populate_existing=True)
     )
     
     result = await session.execute(stmt)
-    return result.scalars().all()
+    fila_item = result.scalars().first()
+    if fila_item is not None:
+        await record_events(session, [_evento(fila_item, values["atualizado_em"])])
+        await bump_version(session, [tipo])
+    await session.commit()
+    
+    if fila_item is not None:
+        # UPDATE direto não passa pelos eventos de flush
+        fila_engine.apply(FilaSnapshot.of(fila_item))
+    return fila_item
+
+
+async def update_queue_priority(
+    session: AsyncSession,
+    fila_id: int,
+    prioridade: PrioridadeFila
+) -> Optional[FilaAtendimento]:
+    """Reclassifica a prioridade de um item (ex: após a triagem)"""
+    
+    fila_item = await session.get(FilaAtendimento, fila_id)
+    
+    if not fila_item:
+        return None
+    
+    fila_item.prioridade = int(prioridade)
+    fila_item.touch()
+    
+    await session.commit()
+    await session.refresh(fila_item)
+    
+    return fila_item
 
 
 async def update_queue_status(
@@ -94,7 +269,7 @@ async def update_queue_status(
     new_status: StatusFila,
     observacao: Optional[str] = None
 ) -> Optional[FilaAtendimento]:
-    """Atualiza status de um item na fila"""
+    """Atualiza status de um item na fila, sem validar a transição (correções manuais, fora das métricas)"""
     
     fila_item = await session.get(FilaAtendimento, fila_id)
     
@@ -113,13 +288,134 @@ async def update_queue_status(
     return fila_item
 
 
+def _origens(new_status: StatusFila) -> list[StatusFila]:
+    """Status a partir dos quais ``new_status`` é permitido"""
+    return [origem for origem, destinos in TRANSICOES_FILA.items() if new_status in destinos]
+
+
+async def _update_in_batch(session: AsyncSession, stmt, em: datetime) -> list[FilaSnapshot]:
+    """Executa o UPDATE ... RETURNING, registra as métricas e a versão das filas e devolve o novo estado dos itens"""
+    stmt = stmt.returning(
+        FilaAtendimento.id,
+        FilaAtendimento.tipo,
+        FilaAtendimento.status,
+        FilaAtendimento.prioridade,
+        FilaAtendimento.criado_em,
+        FilaAtendimento.iniciado_em,
+    ).execution_options(synchronize_session="fetch")
+    rows = (await session.execute(stmt)).all()
+    await record_events(session, [_evento(row, em) for row in rows])
+    await bump_version(session, {row.tipo for row in rows})
+    return [FilaSnapshot.of(row) for row in rows]
+
+
+def _transition_values(new_status: StatusFila, observacao: Optional[str]) -> dict:
+    # valores em Python: a sessão atualiza em memória os itens já carregados
+    values = {"status": new_status, "atualizado_em": datetime.now(timezone.utc)}
+    if new_status == StatusFila.em_atendimento:
+        values["iniciado_em"] = values["atualizado_em"]
+    if observacao:
+        values["observacao"] = observacao
+    return values
+
+
+def _evento(row, em: datetime) -> EventoFila:
+    """Evento de métricas a partir do item (ou linha do RETURNING) já atualizado"""
+    return EventoFila(row.tipo, row.status, em, row.criado_em, row.iniciado_em)
+
+
+def _paciente_coluna(coluna):
+    """Coluna do paciente como subconsulta escalar, para o RETURNING"""
+    return (
+        select(coluna)
+        .where(Paciente.id == FilaAtendimento.paciente_id)
+        .scalar_subquery()
+        .label(f"paciente_{coluna.key}")
+    )
+
+
+async def transition_queue_item(
+    session: AsyncSession,
+    fila_id: int,
+    new_status: StatusFila,
+    observacao: Optional[str] = None
+) -> Optional[FilaResponse]:
+    """Muda o status de um item respeitando ``TRANSICOES_FILA``.
+
+    Validação e escrita são um único ``UPDATE ... WHERE status IN (origens)
+    RETURNING``, que já devolve o ``FilaResponse`` (com o paciente resumido);
+    não há leitura prévia nem refresh. Retorna None se o item não existir e
+    levanta ValueError se a transição não for permitida a partir do status
+    atual (inclusive quando outro usuário mudou o item antes); nos dois casos
+    a transação é desfeita antes de retornar.
+    """
+    
+    origens = _origens(new_status)
+    if not origens:
+        raise ValueError(f"Transição para {new_status.value} não é permitida")
+    
+    values = _transition_values(new_status, observacao)
+    stmt = (
+        update(FilaAtendimento)
+        .where(FilaAtendimento.id == fila_id, FilaAtendimento.status.in_(origens))
+        .values(**values)
+        .returning(
+            FilaAtendimento.id,
+            FilaAtendimento.tipo,
+            FilaAtendimento.status,
+            FilaAtendimento.prioridade,
+            FilaAtendimento.aluno_id,
+            FilaAtendimento.observacao,
+            FilaAtendimento.criado_em,
+            FilaAtendimento.atualizado_em,
+            FilaAtendimento.iniciado_em,
+            FilaAtendimento.paciente_id,
+            _paciente_coluna(Paciente.nome),
+            _paciente_coluna(Paciente.cpf),
+        )
+    )
+    row = (await session.execute(stmt)).first()
+    
+    if row is None:
+        # caminho de erro: só aqui vale a leitura extra para explicar a falha;
+        # o rollback libera a transação de escrita (lock do SQLite) nos dois casos
+        atual = await session.scalar(select(FilaAtendimento.status).where(FilaAtendimento.id == fila_id))
+        await session.rollback()
+        if atual is None:
+            return None
+        raise ValueError(f"Transição de {atual.value} para {new_status.value} não é permitida")
+    
+    await record_events(session, [_evento(row, values["atualizado_em"])])
+    await bump_version(session, [row.tipo])
+    await session.commit()
+    
+    # UPDATE direto não passa pelos eventos de flush
+    fila_engine.apply(FilaSnapshot.of(row))
+    
+    paciente = None
+    if row.paciente_id is not None:
+        paciente = PacienteResumido(id=row.paciente_id, nome=row.paciente_nome, cpf=row.paciente_cpf)
+    return FilaResponse(
+        id=row.id,
+        paciente=paciente,
+        tipo=row.tipo,
+        status=row.status,
+        prioridade=row.prioridade,
+        aluno_id=row.aluno_id,
+        observacao=row.observacao,
+        criado_em=row.criado_em,
+        atualizado_em=row.atualizado_em,
+        iniciado_em=row.iniciado_em,
+    )
+
+
 async def start_attendance(
     session: AsyncSession,
     fila_id: int
-) -> Optional[FilaAtendimento]:
+) -> Optional[FilaResponse]:
     """Marca paciente como em atendimento"""
     
-    return await update_queue_status(
+    return await transition_queue_item(
         session, 
         fila_id, 
         StatusFila.em_atendimento
@@ -130,10 +426,10 @@ async def finish_attendance(
     session: AsyncSession,
     fila_id: int,
     observacao: Optional[str] = None
-) -> Optional[FilaAtendimento]:
+) -> Optional[FilaResponse]:
     """Marca atendimento como concluído"""
     
-    return await update_queue_status(
+    return await transition_queue_item(
         session, 
         fila_id, 
         StatusFila.concluido,
@@ -145,10 +441,10 @@ async def cancel_attendance(
     session: AsyncSession,
     fila_id: int,
     observacao: Optional[str] = None
-) -> Optional[FilaAtendimento]:
+) -> Optional[FilaResponse]:
     """Cancela atendimento (ex: desistência)"""
     
-    return await update_queue_status(
+    return await transition_queue_item(
         session, 
         fila_id, 
         StatusFila.cancelado,
@@ -156,21 +452,205 @@ async def cancel_attendance(
     )
 
 
+async def transition_queue_items(
+    session: AsyncSession,
+    fila_ids: Iterable[int],
+    new_status: StatusFila,
+    observacao: Optional[str] = None
+) -> dict[int, ResultadoTransicao]:
+    """Aplica a mesma transição a vários itens, em uma única transação.
+
+    Um UPDATE por lote de ``LOTE_TRANSICAO`` ids, condicionado ao status de
+    origem como em ``transition_queue_item``. Os ids que ficaram de fora são
+    classificados com uma única consulta; itens inválidos não impedem os demais.
+    """
+    
+    ids = list(dict.fromkeys(fila_ids))
+    origens = _origens(new_status)
+    if not origens:
+        raise ValueError(f"Transição para {new_status.value} não é permitida")
+    if not ids:
+        return {}
+    
+    values = _transition_values(new_status, observacao)
+    snapshots: list[FilaSnapshot] = []
+    resultados = dict.fromkeys(ids, ResultadoTransicao.nao_encontrado)
+    try:
+        for start in range(0, len(ids), LOTE_TRANSICAO):
+            lote = ids[start:start + LOTE_TRANSICAO]
+            snapshots += await _update_in_batch(
+                session,
+                update(FilaAtendimento)
+                .where(FilaAtendimento.id.in_(lote), FilaAtendimento.status.in_(origens))
+                .values(**values),
+                values["atualizado_em"],
+            )
+        
+        for snap in snapshots:
+            resultados[snap.id] = ResultadoTransicao.atualizado
+        faltantes = [i for i, r in resultados.items() if r is ResultadoTransicao.nao_encontrado]
+        for start in range(0, len(faltantes), LOTE_TRANSICAO):
+            existentes = await session.scalars(
+                select(FilaAtendimento.id).where(FilaAtendimento.id.in_(faltantes[start:start + LOTE_TRANSICAO]))
+            )
+            for fila_id in existentes:
+                resultados[fila_id] = ResultadoTransicao.invalido
+    except BaseException:
+        # não deixa a transação de escrita (e o lock do SQLite) aberta
+        await session.rollback()
+        raise
+    
+    await session.commit()
+    for snap in snapshots:
+        fila_engine.apply(snap)
+    return resultados
+
+
+async def close_queue(
+    session: AsyncSession,
+    tipo: Optional[TipoAtendimento] = None,
+    new_status: StatusFila = StatusFila.cancelado,
+    criado_antes_de: Optional[datetime] = None,
+    observacao: Optional[str] = None
+) -> dict[int, ResultadoTransicao]:
+    """Encerramento do turno: leva à ``new_status`` todo item que ainda a admite.
+
+    Um único UPDATE filtrado (tipo e/ou criado antes de ``criado_antes_de``),
+    sem carregar os itens. Retorna o resultado de cada id alterado.
+    """
+    
+    origens = _origens(new_status)
+    if not origens:
+        raise ValueError(f"Transição para {new_status.value} não é permitida")
+    
+    stmt = update(FilaAtendimento).where(FilaAtendimento.status.in_(origens))
+    if tipo is not None:
+        stmt = stmt.where(FilaAtendimento.tipo == tipo)
+    if criado_antes_de is not None:
+        stmt = stmt.where(FilaAtendimento.criado_em < criado_antes_de)
+    
+    values = _transition_values(new_status, observacao)
+    try:
+        snapshots = await _update_in_batch(session, stmt.values(**values), values["atualizado_em"])
+    except BaseException:
+        # não deixa a transação de escrita (e o lock do SQLite) aberta
+        await session.rollback()
+        raise
+    await session.commit()
+    for snap in snapshots:
+        fila_engine.apply(snap)
+    return {snap.id: ResultadoTransicao.atualizado for snap in snapshots}
+
+
+# Colunas comuns à fila e ao histórico, na ordem de FilaResponse
+_COLUNAS_HISTORICO = (
+    "id", "tipo", "status", "prioridade", "aluno_id", "observacao", "criado_em", "atualizado_em", "iniciado_em",
+)
+
+FilaHistoricoPage = tuple[List[FilaResponse], Optional[str]]
+
+
+async def archive_queue(
+    session: AsyncSession,
+    dias: Optional[int] = None,
+    lote: Optional[int] = None
+) -> int:
+    """Move itens concluídos/cancelados há mais de ``dias`` para o histórico.
+
+    Trabalha em lotes de ``lote`` ids (INSERT ... SELECT + DELETE), com um
+    commit por lote, para não segurar a escrita do banco por muito tempo.
+    Retorna quantos itens foram arquivados.
+    """
+    
+    dias = settings.fila_arquivo_dias if dias is None else dias
+    lote = lote or settings.fila_arquivo_lote
+    corte = datetime.now(timezone.utc) - timedelta(days=dias)
+    colunas = ("paciente_id",) + _COLUNAS_HISTORICO
+    
+    candidatos = (
+        select(FilaAtendimento.id)
+        .where(
+            FilaAtendimento.status.in_([StatusFila.concluido, StatusFila.cancelado]),
+            FilaAtendimento.atualizado_em < corte,
+        )
+        .order_by(FilaAtendimento.id)
+        .limit(lote)
+    )
+    
+    total = 0
+    while True:
+        try:
+            ids = (await session.scalars(candidatos)).all()
+            if not ids:
+                return total
+            origem = select(*(getattr(FilaAtendimento, c) for c in colunas)).where(FilaAtendimento.id.in_(ids))
+            await session.execute(sql_insert(FilaAtendimentoHistorico).from_select(colunas, origem))
+            await session.execute(
+                delete(FilaAtendimento)
+                .where(FilaAtendimento.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+        except BaseException:
+            # o lote que falhou não fica pela metade nem segura o lock do SQLite;
+            # os lotes anteriores já foram gravados
+            await session.rollback()
+            raise
+        await session.commit()
+        # só itens encerrados, que não estão no espelho: nada a aplicar
+        total += len(ids)
+
+
 async def get_patient_queue_history(
     session: AsyncSession,
-    paciente_id: int
-) -> List[FilaAtendimento]:
-    """Busca histórico de filas de um paciente"""
+    paciente_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> FilaHistoricoPage:
+    """Histórico de filas de um paciente (fila atual + arquivo), do mais recente.
+
+    Paginado por cursor sobre (criado_em, id) decrescentes. O paciente é o
+    mesmo em todas as linhas: é lido uma única vez.
+    """
     
+    paciente = await session.get(Paciente, paciente_id)
+    if paciente is None:
+        return [], None
+    
+    sqlite = session.get_bind().dialect.name == "sqlite"
+    if cursor:
+        criado_em, fila_id = decode_cursor(cursor, 2)
+        if not sqlite:
+            criado_em = datetime.fromisoformat(criado_em)
+    
+    partes = []
+    for tabela in (FilaAtendimento, FilaAtendimentoHistorico):
+        # no SQLite compara o texto gravado (mesmo motivo de paciente_service._created_key)
+        chave = type_coerce(tabela.criado_em, String) if sqlite else tabela.criado_em
+        parte = (
+            select(*(getattr(tabela, c) for c in _COLUNAS_HISTORICO), chave.label("_cursor_criado"))
+            .where(tabela.paciente_id == paciente_id)
+        )
+        if cursor:
+            parte = parte.where(tuple_(chave, tabela.id) < tuple_(criado_em, fila_id))
+        partes.append(parte)
+    
+    uniao = union_all(*partes).subquery()
     stmt = (
-        select(FilaAtendimento)
-        .where(FilaAtendimento.paciente_id == paciente_id)
-        .options(selectinload(FilaAtendimento.paciente))
-        .order_by(FilaAtendimento.criado_em.desc())
+        select(uniao)
+        .order_by(uniao.c._cursor_criado.desc(), uniao.c.id.desc())
+        .limit(limit + 1)
     )
+    rows = [dict(row) for row in (await session.execute(stmt)).mappings()]
     
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]["_cursor_criado"], rows[-1]["id"]])
+    for row in rows:
+        del row["_cursor_criado"]
+    
+    resumo = PacienteResumido(id=paciente.id, nome=paciente.nome, cpf=paciente.cpf)
+    return [FilaResponse(paciente=resumo, **row) for row in rows], next_cursor
 
 
 async def remove_from_queue(
@@ -184,7 +664,10 @@ async def remove_from_queue(
     if not fila_item:
         return False
     
+    snap = FilaSnapshot.of(fila_item, removido=True)
     await session.delete(fila_item)
     await session.commit()
+    # o flush já gera o evento; aplicado também aqui por ser exclusão (idempotente)
+    fila_engine.apply(snap)
     
     return True
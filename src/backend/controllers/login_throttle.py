@@ -0,0 +1,183 @@
+"""Limite de tentativas de login em memória (janela deslizante por chave).
+
+Cada tentativa conta para duas chaves: (e-mail, origem), com limite baixo, e a
+origem sozinha, com limite alto (muitos e-mails a partir da mesma estação é
+credential stuffing). ``ORIGEM_LOCAL`` (login no próprio processo, sem
+identificar a estação) só tem o limite por e-mail: bloquear a origem trancaria
+todas as contas do processo, inclusive a do admin. A contagem é feita na entrada, antes do banco e do
+bcrypt, então nem uma rajada simultânea passa do limite; o login bem-sucedido
+devolve a tentativa. Passado o limite, a chave fica bloqueada por ``bloqueio``
+segundos e as tentativas são recusadas sem custo.
+
+A janela deslizante é aproximada por duas janelas fixas (atual e anterior),
+então cada chave ocupa alguns números, e o total de chaves é limitado com
+descarte LRU. Os bloqueios vivem só na memória do processo; com ``arquivo``
+os bloqueios ativos são gravados em JSON e recarregados na inicialização.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..core.config import settings
+
+ORIGEM_LOCAL = "local"
+
+
+class LoginBloqueado(ValueError):
+    """Tentativa recusada pelo limite; ``retry_after`` em segundos"""
+
+    def __init__(self, retry_after: float) -> None:
+        self.retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(f"Muitas tentativas de login. Tente novamente em {self.retry_after} s.")
+
+
+class _Janela:
+    """Contagem aproximada de tentativas na janela deslizante + fim do bloqueio"""
+    __slots__ = ("inicio", "atual", "anterior", "bloqueado_ate")
+
+    def __init__(self, inicio: float) -> None:
+        self.inicio = inicio
+        self.atual = 0
+        self.anterior = 0
+        self.bloqueado_ate = 0.0
+
+    def _avancar(self, agora: float, janela: float) -> None:
+        passadas = int((agora - self.inicio) // janela)
+        if passadas <= 0:
+            return
+        self.anterior = self.atual if passadas == 1 else 0
+        self.atual = 0
+        self.inicio += passadas * janela
+
+    def estimativa(self, agora: float, janela: float) -> float:
+        self._avancar(agora, janela)
+        peso = 1 - (agora - self.inicio) / janela
+        return self.atual + self.anterior * peso
+
+
+class LoginThrottle:
+    def __init__(
+        self,
+        max_falhas: int,
+        max_falhas_origem: int,
+        janela: float,
+        bloqueio: float,
+        max_chaves: int,
+        arquivo: Optional[str] = None,
+        relogio: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_falhas = max_falhas
+        self.max_falhas_origem = max_falhas_origem
+        self.janela = janela
+        self.bloqueio = bloqueio
+        self.max_chaves = max_chaves
+        self.arquivo = Path(arquivo) if arquivo else None
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self._chaves: OrderedDict[tuple, _Janela] = OrderedDict()
+        self.recusadas = 0
+        if self.arquivo is not None:
+            self._carregar()
+
+    @staticmethod
+    def _chaves_de(email: str, origem: str) -> tuple[tuple, ...]:
+        par = ("email", email.strip().lower(), origem)
+        if origem == ORIGEM_LOCAL:
+            return (par,)
+        return par, ("origem", origem)
+
+    def _limite(self, chave: tuple) -> int:
+        return self.max_falhas if chave[0] == "email" else self.max_falhas_origem
+
+    def _entrada(self, chave: tuple, agora: float, criar: bool) -> Optional[_Janela]:
+        entrada = self._chaves.get(chave)
+        if entrada is None:
+            if not criar:
+                return None
+            entrada = self._chaves[chave] = _Janela(agora)
+            while len(self._chaves) > self.max_chaves:
+                self._chaves.popitem(last=False)
+        else:
+            self._chaves.move_to_end(chave)
+        return entrada
+
+    def attempt(self, email: str, origem: str = ORIGEM_LOCAL) -> None:
+        """Registra a tentativa ou levanta ``LoginBloqueado`` (sem registrar)"""
+        agora = self._relogio()
+        chaves = self._chaves_de(email, origem)
+        with self._lock:
+            for chave in chaves:
+                entrada = self._entrada(chave, agora, criar=False)
+                if entrada is not None and entrada.bloqueado_ate > agora:
+                    self.recusadas += 1
+                    raise LoginBloqueado(entrada.bloqueado_ate - agora)
+            novo_bloqueio = False
+            for chave in chaves:
+                entrada = self._entrada(chave, agora, criar=True)
+                entrada._avancar(agora, self.janela)
+                entrada.atual += 1
+                if entrada.estimativa(agora, self.janela) > self._limite(chave):
+                    entrada.bloqueado_ate = agora + self.bloqueio
+                    novo_bloqueio = True
+            if novo_bloqueio:
+                self.recusadas += 1
+                if self.arquivo is not None:
+                    self._salvar(agora)
+                raise LoginBloqueado(self.bloqueio)
+
+    def success(self, email: str, origem: str = ORIGEM_LOCAL) -> None:
+        """Login válido zera o par (e-mail, origem) e devolve a tentativa à origem"""
+        par, *chave_origem = self._chaves_de(email, origem)
+        with self._lock:
+            self._chaves.pop(par, None)
+            entrada = self._chaves.get(chave_origem[0]) if chave_origem else None
+            if entrada is not None and entrada.atual > 0:
+                entrada.atual -= 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._chaves.clear()
+            self.recusadas = 0
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    # -- modo persistido: só os bloqueios ativos, em JSON -------------------
+
+    def _salvar(self, agora: float) -> None:
+        bloqueios = [
+            [list(chave), entrada.bloqueado_ate]
+            for chave, entrada in self._chaves.items()
+            if entrada.bloqueado_ate > agora
+        ]
+        temporario = self.arquivo.with_suffix(self.arquivo.suffix + ".tmp")
+        temporario.write_text(json.dumps(bloqueios))
+        os.replace(temporario, self.arquivo)
+
+    def _carregar(self) -> None:
+        try:
+            bloqueios = json.loads(self.arquivo.read_text())
+        except (OSError, ValueError):
+            return
+        agora = self._relogio()
+        for chave, ate in bloqueios:
+            if ate > agora:
+                entrada = self._entrada(tuple(chave), agora, criar=True)
+                entrada.bloqueado_ate = ate
+
+
+login_throttle = LoginThrottle(
+    max_falhas=settings.login_throttle_falhas,
+    max_falhas_origem=settings.login_throttle_falhas_origem,
+    janela=settings.login_throttle_janela_s,
+    bloqueio=settings.login_throttle_bloqueio_s,
+    max_chaves=settings.login_throttle_max_chaves,
+    arquivo=settings.login_throttle_arquivo or None,
+)
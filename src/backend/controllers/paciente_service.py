@@ -1,15 +1,30 @@
 from __future__ import annotations
 
+import math
+from itertools import product
 from typing import Optional, List
-from sqlalchemy import select, or_, and_, func
+from sqlalchemy import select, or_, and_, func, tuple_, type_coerce, String, DateTime
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime, timezone
 
 from ..models import Paciente, UsuarioSistema
 from ..views.paciente_view import PacienteCreate, PacienteUpdate
+from ..db.fts import pacientes_fts, fts_match, fts_match_expression, fts_rank
+from ..db.trigram import name_words, word_trigrams, similarity, similar_words_stmt
+from ..core.cursor import encode_cursor, decode_cursor
+from ..core.texto import normalize_name
 
 # Constante para evitar duplicação
 STATUS_AGUARDANDO_TRIAGEM = "Aguardando Triagem"
+CPF_DIGITS = 11
+# Similaridade mínima (Jaccard de trigramas) aceita pela busca aproximada
+FUZZY_THRESHOLD = 0.3
+# Limites da busca aproximada: variantes por palavra digitada, combinações
+# de variantes consultadas (em lotes) e linhas lidas por lote
+FUZZY_VARIANTS_PER_WORD = 6
+FUZZY_MAX_COMBINATIONS = 48
+FUZZY_COMBINATIONS_PER_QUERY = 8
+FUZZY_MAX_CANDIDATES = 1000
 
 
 async def get_patient_by_cpf(db: AsyncSession, cpf: str) -> Paciente | None:
@@ -24,34 +39,170 @@ async def get_patient_by_id(db: AsyncSession, patient_id: int) -> Paciente | Non
     return await db.get(Paciente, patient_id)
 
 
+def _is_sqlite(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def _uses_fts(db: AsyncSession) -> bool:
+    """Índice FTS5 de nomes só existe no SQLite"""
+    return _is_sqlite(db)
+
+
+def _name_filter(stmt, db: AsyncSession, nome: str):
+    """Aplica filtro por nome: FTS5 no SQLite, LIKE nos demais bancos.
+
+    Retorna None se o termo não tiver nenhuma palavra pesquisável.
+    """
+    if not _uses_fts(db):
+        termo = normalize_name(nome)
+        if not termo:
+            return None
+        return stmt.where(Paciente.nome_normalizado.contains(termo))
+    expression = fts_match_expression(nome)
+    if expression is None:
+        return None
+    return (
+        stmt.join(pacientes_fts, pacientes_fts.c.rowid == Paciente.id)
+        .where(fts_match(expression))
+    )
+
+
+def _name_search(stmt, db: AsyncSession, nome: str):
+    """Filtro por nome ordenado por relevância (FTS) ou alfabeticamente (LIKE)"""
+    stmt = _name_filter(stmt, db, nome)
+    if stmt is None:
+        return None
+    if _uses_fts(db):
+        return stmt.order_by(fts_rank, Paciente.nome_normalizado)
+    return stmt.order_by(Paciente.nome_normalizado, Paciente.id)
+
+
+def _cpf_condition(digits: str, substring: bool = False):
+    """Filtro por CPF (somente dígitos).
+
+    Por padrão usa o índice único de ``cpf`` como range scan do prefixo
+    (``cpf >= p AND cpf < p+1``). ``substring=True`` ativa o modo lento,
+    com busca em qualquer posição (``LIKE '%p%'``, varre a tabela).
+    """
+    if substring:
+        return Paciente.cpf.contains(digits)
+    if len(digits) == CPF_DIGITS:
+        return Paciente.cpf == digits
+    upper = digits[:-1] + chr(ord(digits[-1]) + 1)
+    return and_(Paciente.cpf >= digits, Paciente.cpf < upper)
+
+
 async def search_patients(
     db: AsyncSession, 
     search_term: str, 
     skip: int = 0, 
-    limit: int = 50
+    limit: int = 50,
+    cpf_substring: bool = False,
 ) -> List[Paciente]:
-    """Busca pacientes por nome ou CPF"""
+    """Busca pacientes por nome (índice FTS, por relevância) ou prefixo de CPF"""
     
     # Remove caracteres especiais do CPF para busca
     clean_search = ''.join(filter(str.isalnum, search_term))
+    if not clean_search:
+        return []
     
-    stmt = (
-        select(Paciente)
-        .where(
-            or_(
-                func.lower(Paciente.nome).contains(search_term.lower()),
-                Paciente.cpf.contains(clean_search)
-            )
+    if clean_search.isdigit():
+        if len(clean_search) == CPF_DIGITS and not cpf_substring:
+            # CPF completo: lookup exato pelo índice único
+            if skip:
+                return []
+            patient = await get_patient_by_cpf(db, clean_search)
+            return [patient] if patient else []
+        stmt = (
+            select(Paciente)
+            .where(_cpf_condition(clean_search, cpf_substring))
+            .order_by(Paciente.cpf)
         )
-        .order_by(Paciente.nome)
-        .offset(skip)
-        .limit(limit)
-    )
+    else:
+        stmt = _name_search(select(Paciente), db, search_term)
+        if stmt is None:
+            return []
     
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.offset(skip).limit(limit))
     return list(result.scalars().all())
 
 
+async def _similar_words(db: AsyncSession, palavra: str, threshold: float) -> dict[str, float]:
+    """Variantes de ``palavra`` no vocabulário de nomes, com a similaridade de cada uma"""
+    alvo = word_trigrams(palavra)
+    min_hits = max(1, math.ceil(threshold * len(alvo)))
+    result = await db.execute(similar_words_stmt(alvo, min_hits))
+    scored = [(similarity(alvo, word_trigrams(p)), p) for p in result.scalars().all()]
+    scored = sorted((item for item in scored if item[0] >= threshold), reverse=True)
+    return {p: score for score, p in scored[:FUZZY_VARIANTS_PER_WORD]}
+
+
+def _combination_filter(stmt, db: AsyncSession, combinations: list[tuple[str, ...]]):
+    """Pacientes cujo nome contém todas as palavras de alguma das combinações"""
+    if _uses_fts(db):
+        expression = " OR ".join("(" + " ".join(f'"{p}"' for p in combo) + ")" for combo in combinations)
+        return stmt.join(pacientes_fts, pacientes_fts.c.rowid == Paciente.id).where(fts_match(expression))
+    return stmt.where(or_(*[
+        and_(*[Paciente.nome_normalizado.contains(p) for p in combo]) for combo in combinations
+    ]))
+
+
+async def fuzzy_search_patients(
+    db: AsyncSession,
+    search_term: str,
+    limit: int = 20,
+    threshold: float = FUZZY_THRESHOLD,
+) -> List[Paciente]:
+    """Busca aproximada por nome, tolerante a erros de digitação ("Luiz"/"Luis").
+
+    Cada palavra digitada é trocada pelas variantes mais parecidas do
+    vocabulário de nomes (índice de trigramas); as combinações de variantes são
+    consultadas da mais para a menos parecida até completar ``limit``. Retorna
+    os pacientes em ordem decrescente de similaridade.
+    """
+    palavras = name_words(search_term)
+    if not palavras:
+        return []
+
+    variantes = []
+    for palavra in palavras:
+        similares = await _similar_words(db, palavra, threshold)
+        if similares:
+            variantes.append(similares)
+    if not variantes:
+        return []
+
+    combinations = sorted(
+        product(*[list(v) for v in variantes]),
+        key=lambda combo: -sum(v[p] for v, p in zip(variantes, combo)),
+    )[:FUZZY_MAX_COMBINATIONS]
+
+    def score(nome_normalizado: str) -> float:
+        nome = set(name_words(nome_normalizado))
+        return sum(max((s for p, s in v.items() if p in nome), default=0.0) for v in variantes) / len(variantes)
+
+    found: set[int] = set()
+    ordered: list[tuple[float, str, int]] = []
+    for start in range(0, len(combinations), FUZZY_COMBINATIONS_PER_QUERY):
+        chunk = combinations[start:start + FUZZY_COMBINATIONS_PER_QUERY]
+        stmt = _combination_filter(select(Paciente.id, Paciente.nome_normalizado), db, chunk)
+        if found:
+            stmt = stmt.where(Paciente.id.not_in(list(found)))
+        rows = (await db.execute(stmt.limit(FUZZY_MAX_CANDIDATES))).all()
+        batch = sorted((-score(row.nome_normalizado), row.nome_normalizado, row.id) for row in rows)
+        for neg_score, nome, pid in batch[:limit - len(ordered)]:
+            found.add(pid)
+            ordered.append((neg_score, nome, pid))
+        if len(ordered) >= limit:
+            break
+
+    if not ordered:
+        return []
+    result = await db.execute(select(Paciente).where(Paciente.id.in_(list(found))))
+    by_id = {p.id: p for p in result.scalars().all()}
+    return [by_id[pid] for _, _, pid in ordered if pid in by_id]
+
+
 async def check_cpf_exists_in_system(db: AsyncSession, cpf: str) -> bool:
     """Verifica se CPF já existe no sistema"""
     patient_stmt = select(Paciente.id).where(Paciente.cpf == cpf)
@@ -101,7 +252,7 @@ async def list_all_patients(db: AsyncSession, skip: int = 0, limit: int = 50) ->
     """Lista todos os pacientes"""
     stmt = (
         select(Paciente)
-        .order_by(Paciente.nome)
+        .order_by(Paciente.nome_normalizado, Paciente.id)
         .offset(skip)
         .limit(limit)
     )
@@ -153,31 +304,158 @@ async def search_patients_by_name_or_cpf(
     nome: Optional[str] = None,
     cpf: Optional[str] = None,
     skip: int = 0, 
-    limit: int = 50
+    limit: int = 50,
+    cpf_substring: bool = False,
 ) -> List[Paciente]:
     """Busca pacientes por nome e/ou CPF - versão mais específica"""
     
-    conditions = []
+    if not nome and not cpf:
+        # Se nenhum filtro foi fornecido, retorna lista vazia
+        return []
     
-    if nome:
-        conditions.append(func.lower(Paciente.nome).contains(nome.lower()))
+    stmt = select(Paciente)
     
     if cpf:
         # Remove caracteres especiais do CPF para busca
         clean_cpf = ''.join(filter(str.isdigit, cpf))
-        conditions.append(Paciente.cpf.contains(clean_cpf))
+        if not clean_cpf:
+            return []
+        stmt = stmt.where(_cpf_condition(clean_cpf, cpf_substring))
     
-    if not conditions:
-        # Se nenhum filtro foi fornecido, retorna lista vazia
-        return []
-    
-    stmt = (
-        select(Paciente)
-        .where(and_(*conditions) if len(conditions) > 1 else conditions[0])
-        .order_by(Paciente.nome)
-        .offset(skip)
-        .limit(limit)
-    )
+    if nome:
+        stmt = _name_search(stmt, db, nome)
+        if stmt is None:
+            return []
+    else:
+        stmt = stmt.order_by(Paciente.cpf)
     
-    result = await db.execute(stmt)
+    result = await db.execute(stmt.offset(skip).limit(limit))
     return list(result.scalars().all())
+
+
+# ---------------------------------------------------------------------------
+# Paginação por cursor (keyset): cada página custa o mesmo que a primeira,
+# pois continua a partir da chave da última linha em vez de usar OFFSET.
+# ---------------------------------------------------------------------------
+
+PacientePage = tuple[List[Paciente], Optional[str]]
+
+# ordem alfabética sem acentos/caixa, servida por ix_pacientes_nome_normalizado_id
+_NOME_KEY = (Paciente.nome_normalizado, Paciente.id)
+
+
+def _created_key(db: AsyncSession):
+    """Chave de ordenação por data de criação.
+
+    No SQLite compara o texto gravado pelo banco (o valor de ``now()`` não tem
+    microssegundos e não bate com o formato de bind do SQLAlchemy).
+    """
+    if _is_sqlite(db):
+        return type_coerce(Paciente.created_at, String)
+    return Paciente.created_at
+
+
+async def _keyset_page(
+    db: AsyncSession,
+    stmt,
+    keys: tuple,
+    cursor: Optional[str],
+    limit: int,
+) -> PacientePage:
+    """Executa ``stmt`` ordenado por ``keys`` a partir do cursor informado"""
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        values = [
+            datetime.fromisoformat(v) if isinstance(getattr(k, "type", None), DateTime) and isinstance(v, str) else v
+            for k, v in zip(keys, values)
+        ]
+        stmt = stmt.where(tuple_(*keys) > tuple_(*values))
+
+    labels = [key.label(f"_cursor_{i}") for i, key in enumerate(keys)]
+    stmt = stmt.add_columns(*labels).order_by(*keys).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(list(rows[-1][1:]))
+    return [row[0] for row in rows], next_cursor
+
+
+async def list_all_patients_cursor(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> PacientePage:
+    """Lista pacientes por (nome normalizado, id). Retorna (itens, próximo cursor ou None)"""
+    return await _keyset_page(db, select(Paciente), _NOME_KEY, cursor, limit)
+
+
+async def list_patients_in_triage_cursor(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> PacientePage:
+    """Lista pacientes aguardando triagem por (created_at, id)"""
+    stmt = select(Paciente).where(Paciente.statusAtendimento == STATUS_AGUARDANDO_TRIAGEM)
+    return await _keyset_page(db, stmt, (_created_key(db), Paciente.id), cursor, limit)
+
+
+async def search_patients_cursor(
+    db: AsyncSession,
+    search_term: str,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    cpf_substring: bool = False,
+) -> PacientePage:
+    """Versão paginada por cursor de ``search_patients``.
+
+    Nomes são paginados em ordem alfabética (nome normalizado, id), e não por relevância,
+    para que a chave de continuação seja estável; CPFs por ordem de CPF.
+    """
+    clean_search = ''.join(filter(str.isalnum, search_term))
+    if not clean_search:
+        return [], None
+
+    if clean_search.isdigit():
+        if len(clean_search) == CPF_DIGITS and not cpf_substring:
+            if cursor:
+                return [], None
+            patient = await get_patient_by_cpf(db, clean_search)
+            return ([patient] if patient else []), None
+        stmt = select(Paciente).where(_cpf_condition(clean_search, cpf_substring))
+        return await _keyset_page(db, stmt, (Paciente.cpf,), cursor, limit)
+
+    stmt = _name_filter(select(Paciente), db, search_term)
+    if stmt is None:
+        return [], None
+    return await _keyset_page(db, stmt, _NOME_KEY, cursor, limit)
+
+
+async def search_patients_by_name_or_cpf_cursor(
+    db: AsyncSession,
+    nome: Optional[str] = None,
+    cpf: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    cpf_substring: bool = False,
+) -> PacientePage:
+    """Versão paginada por cursor de ``search_patients_by_name_or_cpf``"""
+    if not nome and not cpf:
+        return [], None
+
+    stmt = select(Paciente)
+
+    if cpf:
+        clean_cpf = ''.join(filter(str.isdigit, cpf))
+        if not clean_cpf:
+            return [], None
+        stmt = stmt.where(_cpf_condition(clean_cpf, cpf_substring))
+
+    if nome:
+        stmt = _name_filter(stmt, db, nome)
+        if stmt is None:
+            return [], None
+        return await _keyset_page(db, stmt, _NOME_KEY, cursor, limit)
+
+    return await _keyset_page(db, stmt, (Paciente.cpf,), cursor, limit)
@@ -0,0 +1,120 @@
+"""Cache em memória de refresh tokens válidos + conjunto de revogados.
+
+``refresh_token_service`` consulta o cache antes do banco: um hash validado há
+pouco dispensa o SELECT até ``min(expira_em, ttl)``. As revogações feitas neste
+processo atualizam o cache logo após o commit (``revoke``/``revoke_user``), então
+um token revogado nunca volta a ser aceito por ele, e uma revogação que falhou
+no banco não recusa um token ainda válido. A janela de uma leitura concorrente
+(lida antes do commit, gravada no cache depois) é fechada pela marca de tempo:
+``put`` recusa dados lidos antes da revogação do hash ou do usuário.
+
+Revogações feitas por outra estação no mesmo banco só são vistas quando a
+entrada vence; por isso o ``ttl`` padrão é de poucos segundos
+(``APP_REFRESH_CACHE_TTL_S``). Alterar ``revogado`` direto no objeto também
+não passa pelo cache: revogue pelas funções do serviço.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+from ..core.config import settings
+
+
+def epoch(value: datetime) -> float:
+    """Datas sem fuso são UTC (como as devolvidas pelo SQLite)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RefreshTokenCache:
+    def __init__(self, ttl: float, max_itens: int, relogio: Callable[[], float] = time.time) -> None:
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.now = relogio
+        self._lock = threading.Lock()
+        # hash -> (válido até, colunas do token)
+        self._validos: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        # hash / usuário -> instante da revogação (mantido por ``ttl``)
+        self._revogados: dict[str, float] = {}
+        self._usuarios_revogados: dict[int, float] = {}
+        self.acertos = 0
+        self.faltas = 0
+
+    def get(self, token_hash: str) -> Optional[dict]:
+        agora = self.now()
+        with self._lock:
+            item = self._validos.get(token_hash)
+            if item is None or item[0] <= agora:
+                if item is not None:
+                    del self._validos[token_hash]
+                self.faltas += 1
+                return None
+            self._validos.move_to_end(token_hash)
+            self.acertos += 1
+            return item[1]
+
+    def is_revoked(self, token_hash: str) -> bool:
+        with self._lock:
+            return token_hash in self._revogados
+
+    def put(self, dados: dict, lido_em: float) -> None:
+        """Guarda o token lido do banco em ``lido_em`` (se não revogado desde então)"""
+        agora = self.now()
+        validade = min(epoch(dados["expira_em"]), agora + self.ttl)
+        with self._lock:
+            if dados["token_hash"] in self._revogados:
+                return
+            if self._usuarios_revogados.get(dados["usuario_id"], float("-inf")) >= lido_em:
+                return
+            if validade <= agora:
+                return
+            self._validos[dados["token_hash"]] = (validade, dados)
+            self._validos.move_to_end(dados["token_hash"])
+            while len(self._validos) > self.max_itens:
+                self._validos.popitem(last=False)
+
+    def revoke(self, hashes: Iterable[str]) -> None:
+        agora = self.now()
+        with self._lock:
+            for token_hash in hashes:
+                self._validos.pop(token_hash, None)
+                self._revogados[token_hash] = agora
+            self._prune(agora)
+
+    def revoke_user(self, usuario_id: int) -> None:
+        """Invalida tudo do usuário, inclusive leituras em andamento"""
+        agora = self.now()
+        with self._lock:
+            self._usuarios_revogados[usuario_id] = agora
+            for token_hash in [h for h, (_, d) in self._validos.items() if d["usuario_id"] == usuario_id]:
+                del self._validos[token_hash]
+            self._prune(agora)
+
+    def _prune(self, agora: float) -> None:
+        # passado o ttl, nenhuma leitura anterior à revogação pode mais chegar ao cache
+        limite = agora - self.ttl
+        for marcas in (self._revogados, self._usuarios_revogados):
+            if len(marcas) > self.max_itens:
+                for chave in [k for k, em in marcas.items() if em < limite]:
+                    del marcas[chave]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._validos.clear()
+            self._revogados.clear()
+            self._usuarios_revogados.clear()
+
+    def __len__(self) -> int:
+        return len(self._validos)
+
+
+refresh_token_cache = RefreshTokenCache(
+    ttl=settings.refresh_cache_ttl_s,
+    max_itens=settings.refresh_cache_max_itens,
+)
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import select, update, delete, or_, and_
+from sqlalchemy.orm import make_transient_to_detached
 import secrets
 import hashlib
 
 from ..models.refresh_token import RefreshToken
 from ..models.usuario import UsuarioSistema
+from ..core.config import settings
+from .refresh_token_cache import refresh_token_cache
+
+logger = logging.getLogger(__name__)
+
+_COLUNAS = ("id", "usuario_id", "token_hash", "expira_em", "criado_em", "familia")
 
 
 def _hash_token(token: str) -> str:
@@ -25,10 +35,11 @@ def _generate_token() -> str:
 async def create_refresh_token(
     session: AsyncSession,
     usuario_id: int,
-    expires_in_days: int = 30
+    expires_in_days: int = 30,
+    familia: Optional[str] = None
 ) -> tuple[str, RefreshToken]:
     """
-    Cria um novo refresh token para o usuário
+    Cria um novo refresh token para o usuário (nova família se ``familia`` for None)
     
     Returns:
         tuple: (token_plain, refresh_token_obj)
@@ -43,7 +54,8 @@ async def create_refresh_token(
         token_hash=token_hash,
         expira_em=expires_at,
         criado_em=datetime.now(timezone.utc),
-        revogado=False
+        revogado=False,
+        familia=familia or secrets.token_hex(16)
     )
     
     session.add(refresh_token)
@@ -53,13 +65,30 @@ async def create_refresh_token(
     return token_plain, refresh_token
 
 
+def _dados(refresh_token: RefreshToken) -> dict:
+    return {c: getattr(refresh_token, c) for c in _COLUNAS}
+
+
+async def _attach(session: AsyncSession, dados: dict) -> RefreshToken:
+    """Token do cache como objeto da sessão, sem SELECT (alterações viram UPDATE pelo id)"""
+    refresh_token = RefreshToken(**dados, revogado=False)
+    make_transient_to_detached(refresh_token)
+    return await session.merge(refresh_token, load=False)
+
+
 async def get_refresh_token_by_token(
     session: AsyncSession,
     token: str
 ) -> Optional[RefreshToken]:
-    """Busca refresh token pelo token (não hash)"""
+    """Busca refresh token válido pelo token (não hash); usa o cache quando possível"""
     token_hash = _hash_token(token)
-    
+    if refresh_token_cache.is_revoked(token_hash):
+        return None
+    dados = refresh_token_cache.get(token_hash)
+    if dados is not None:
+        return await _attach(session, dados)
+
+    lido_em = refresh_token_cache.now()
     stmt = select(RefreshToken).where(
         RefreshToken.token_hash == token_hash,
         RefreshToken.revogado == False,
@@ -67,55 +96,226 @@ async def get_refresh_token_by_token(
     )
     
     result = await session.execute(stmt)
-    return result.scalars().first()
+    refresh_token = result.scalars().first()
+    if refresh_token is not None:
+        refresh_token_cache.put(_dados(refresh_token), lido_em)
+    return refresh_token
 
 
 async def revoke_refresh_token(
     session: AsyncSession,
     token: str
 ) -> bool:
-    """Revoga um refresh token"""
-    refresh_token = await get_refresh_token_by_token(session, token)
-    
-    if refresh_token:
-        refresh_token.revogado = True
-        await session.commit()
-        return True
-    
-    return False
+    """Revoga um refresh token (um UPDATE, sem buscar o token antes)"""
+    token_hash = _hash_token(token)
+    result = await session.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.revogado == False,
+            RefreshToken.expira_em > datetime.now(timezone.utc)
+        )
+        .values(revogado=True)
+        .execution_options(synchronize_session="fetch")
+    )
+    await session.commit()
+    # só depois do commit: se o UPDATE falhar, o token continua valendo.
+    # Leituras anteriores ao commit que cheguem depois são recusadas pelo cache.
+    refresh_token_cache.revoke([token_hash])
+    return bool(result.rowcount)
+
+
+async def rotate_refresh_token(
+    session: AsyncSession,
+    token: str,
+    expires_in_days: int = 30
+) -> Optional[tuple[str, RefreshToken]]:
+    """Troca o refresh token pelo sucessor numa única transação.
+
+    O token é marcado como substituído por um UPDATE condicional: entre
+    rotações simultâneas do mesmo token só uma encontra a linha ainda válida.
+    Apresentar um token já substituído (reuso, sinal de token vazado) revoga a
+    família inteira, inclusive o sucessor já emitido. Retorna
+    ``(token_plain, refresh_token_obj)`` ou None.
+    """
+    token_hash = _hash_token(token)
+    agora = datetime.now(timezone.utc)
+    marcar = (
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.revogado == False,
+            RefreshToken.expira_em > agora
+        )
+        .values(revogado=True, substituido_em=agora)
+        .execution_options(synchronize_session=False)
+    )
+    dono = select(RefreshToken.usuario_id, RefreshToken.familia).where(RefreshToken.token_hash == token_hash)
+    if session.get_bind().dialect.update_returning:
+        anterior = (await session.execute(marcar.returning(RefreshToken.usuario_id, RefreshToken.familia))).first()
+    else:
+        anterior = (await session.execute(dono)).first() if (await session.execute(marcar)).rowcount else None
+
+    if anterior is None:
+        reuso = (await session.execute(dono.where(RefreshToken.substituido_em.is_not(None)))).first()
+        if reuso is not None:
+            await _revoke_family(session, reuso.usuario_id, reuso.familia or token_hash)
+        await session.rollback()
+        # o banco não o aceita: descarta uma eventual entrada antiga do cache
+        refresh_token_cache.revoke([token_hash])
+        return None
+
+    token_plain = _generate_token()
+    sucessor = RefreshToken(
+        usuario_id=anterior.usuario_id,
+        token_hash=_hash_token(token_plain),
+        expira_em=agora + timedelta(days=expires_in_days),
+        criado_em=agora,
+        revogado=False,
+        familia=anterior.familia or token_hash
+    )
+    session.add(sucessor)
+    await session.commit()
+    refresh_token_cache.revoke([token_hash])
+    return token_plain, sucessor
+
+
+async def _revoke_family(session: AsyncSession, usuario_id: int, familia: str) -> None:
+    """Revoga todos os tokens da família (UPDATE pelo índice de ``familia``)"""
+    await session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.familia == familia, RefreshToken.revogado == False)
+        .values(revogado=True)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    refresh_token_cache.revoke_user(usuario_id)
 
 
 async def revoke_all_user_tokens(
     session: AsyncSession,
     usuario_id: int
 ) -> int:
-    """Revoga todos os tokens de um usuário. Retorna quantidade revogada"""
-    stmt = select(RefreshToken).where(
-        RefreshToken.usuario_id == usuario_id,
-        RefreshToken.revogado == False
+    """Revoga todos os tokens de um usuário (um UPDATE). Retorna quantidade revogada"""
+    result = await session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.usuario_id == usuario_id, RefreshToken.revogado == False)
+        .values(revogado=True)
+        .execution_options(synchronize_session="fetch")
     )
-    
-    result = await session.execute(stmt)
-    tokens = result.scalars().all()
-    
-    count = 0
-    for token in tokens:
-        token.revogado = True
-        count += 1
-    
-    if count > 0:
-        await session.commit()
-    
-    return count
+    await session.commit()
+    # após o commit, como em revoke_refresh_token
+    refresh_token_cache.revoke_user(usuario_id)
+    return result.rowcount or 0
 
 
-async def cleanup_expired_tokens(session: AsyncSession) -> int:
-    """Remove tokens expirados do banco. Retorna quantidade removida"""
-    stmt = delete(RefreshToken).where(
-        RefreshToken.expira_em < datetime.now(timezone.utc)
+# ---------------------------------------------------------------------------
+# Limpeza em lotes: cada lote é um DELETE curto com commit próprio e uma
+# pausa antes do próximo, para não segurar a escrita do SQLite por segundos.
+# ---------------------------------------------------------------------------
+
+@dataclass
+class VarreduraStats:
+    """Progresso da limpeza de tokens (acumulado desde o início do processo)"""
+    execucoes: int = 0
+    lotes: int = 0
+    removidos: int = 0
+    em_andamento: bool = False
+    removidos_execucao: int = 0
+    ultima_execucao: Optional[datetime] = None
+    ultima_duracao_s: float = 0.0
+    maior_lote_ms: float = 0.0
+
+
+token_sweep_stats = VarreduraStats()
+
+
+def _sweep_condition(agora: datetime, incluir_revogados: bool):
+    expirado = RefreshToken.expira_em < agora
+    if not incluir_revogados:
+        return expirado
+    # substituídos por rotação ficam até expirar: enquanto o token ainda seria
+    # aceito, reapresentá-lo precisa achar a linha para revogar a família
+    retido_ate = agora - timedelta(days=settings.refresh_sweep_retencao_revogados_dias)
+    return or_(
+        expirado,
+        and_(
+            RefreshToken.revogado == True,
+            RefreshToken.substituido_em.is_(None),
+            RefreshToken.criado_em < retido_ate,
+        ),
     )
-    
-    result = await session.execute(stmt)
-    await session.commit()
-    
-    return result.rowcount or 0
+
+
+async def sweep_refresh_tokens(
+    session: AsyncSession,
+    lote: Optional[int] = None,
+    pausa: Optional[float] = None,
+    incluir_revogados: bool = True,
+) -> int:
+    """Remove tokens expirados (e revogados antigos) em lotes de ``lote`` ids.
+
+    Entre lotes espera ``pausa`` segundos, liberando o banco para os logins.
+    Retorna quantos tokens foram removidos; o progresso fica em ``token_sweep_stats``.
+    """
+    lote = lote or settings.refresh_sweep_lote
+    pausa = settings.refresh_sweep_pausa_s if pausa is None else pausa
+    candidatos = (
+        select(RefreshToken.id)
+        .where(_sweep_condition(datetime.now(timezone.utc), incluir_revogados))
+        .order_by(RefreshToken.id)
+        .limit(lote)
+    )
+
+    stats = token_sweep_stats
+    stats.em_andamento, stats.removidos_execucao = True, 0
+    inicio = time.perf_counter()
+    try:
+        while True:
+            ids = (await session.scalars(candidatos)).all()
+            if not ids:
+                return stats.removidos_execucao
+            inicio_lote = time.perf_counter()
+            await session.execute(
+                delete(RefreshToken)
+                .where(RefreshToken.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            stats.lotes += 1
+            stats.removidos += len(ids)
+            stats.removidos_execucao += len(ids)
+            stats.maior_lote_ms = max(stats.maior_lote_ms, (time.perf_counter() - inicio_lote) * 1000)
+            if len(ids) < lote:
+                return stats.removidos_execucao
+            await asyncio.sleep(pausa)
+    finally:
+        stats.em_andamento = False
+        stats.execucoes += 1
+        stats.ultima_execucao = datetime.now(timezone.utc)
+        stats.ultima_duracao_s = time.perf_counter() - inicio
+
+
+async def cleanup_expired_tokens(session: AsyncSession) -> int:
+    """Remove tokens expirados do banco (em lotes). Retorna quantidade removida"""
+    return await sweep_refresh_tokens(session, pausa=0, incluir_revogados=False)
+
+
+async def run_token_sweeper(
+    session_factory: Callable[[], AsyncSession],
+    intervalo: Optional[float] = None,
+) -> None:
+    """Executa ``sweep_refresh_tokens`` a cada ``intervalo`` segundos até ser cancelado.
+
+    Para rodar no event loop da aplicação: ``asyncio.create_task(run_token_sweeper(AsyncSessionLocal))``.
+    Uma rodada que falha é registrada no logger do módulo e não encerra o laço.
+    """
+    intervalo = settings.refresh_sweep_intervalo_s if intervalo is None else intervalo
+    while True:
+        try:
+            async with session_factory() as session:
+                await sweep_refresh_tokens(session)
+        except Exception:
+            # ex: banco ocupado; tenta de novo na próxima rodada
+            logger.exception("Erro na limpeza de refresh tokens")
+        await asyncio.sleep(intervalo)
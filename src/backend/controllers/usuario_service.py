@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from sqlalchemy import select
-from typing import Any
+import asyncio
+
+from sqlalchemy import select, update, func, inspect, tuple_
+from sqlalchemy.orm import joinedload
+from typing import Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import (
@@ -12,7 +15,10 @@ from ..models import (
     PerfilAluno,
     Clinica,
 )
-from ..core.security import hash_password, verify_password
+from ..core.security import hash_password_async, verify_password_async, password_needs_rehash
+from ..core.cursor import encode_cursor, decode_cursor
+from ..core.texto import normalize_name
+from .login_throttle import login_throttle, ORIGEM_LOCAL
 import re
 
 
@@ -21,10 +27,12 @@ def validate_password_policy(senha: str) -> None:
         raise ValueError("Senha não atende aos requisitos mínimos (>=8, letra e dígito)")
 
 
-async def get_user_by_email(db: AsyncSession, email: str) -> UsuarioSistema | None:
+async def get_user_by_email(db: AsyncSession, email: str, with_profile: bool = False) -> UsuarioSistema | None:
     stmt = select(UsuarioSistema).where(UsuarioSistema.email == email)
+    if with_profile:
+        stmt = stmt.options(*profile_load_options())
     res = await db.execute(stmt)
-    return res.scalar_one_or_none()
+    return res.unique().scalar_one_or_none()
 
 
 async def create_user(db: AsyncSession, *, nome: str, email: str, senha: str, perfil: PerfilUsuario, dados_perfil: dict | None = None, cpf: str | None = None) -> UsuarioSistema:
@@ -32,7 +40,7 @@ async def create_user(db: AsyncSession, *, nome: str, email: str, senha: str, pe
     user = UsuarioSistema(
         nome=nome,
         email=email,
-        senha_hash=hash_password(senha),
+        senha_hash=await hash_password_async(senha),
         perfil=perfil,
         cpf=cpf,
     )
@@ -66,44 +74,277 @@ async def create_user(db: AsyncSession, *, nome: str, email: str, senha: str, pe
     return user
 
 
-async def get_profile_data(db: AsyncSession, user: UsuarioSistema) -> dict | None:
+# Relacionamento de perfil por papel (admin não tem perfil específico)
+_PERFIL_RELACIONAMENTO = {
+    PerfilUsuario.professor: "perfil_professor",
+    PerfilUsuario.aluno: "perfil_aluno",
+    PerfilUsuario.recepcionista: "perfil_recepcionista",
+}
+
+
+def profile_load_options() -> tuple:
+    """Carga do perfil e da clínica junto com o usuário, no mesmo SELECT (LEFT JOINs).
+
+    joinedload em vez de selectinload: cada usuário tem no máximo um perfil,
+    então o JOIN não multiplica linhas e economiza uma consulta por tabela.
+    """
+    return (
+        joinedload(UsuarioSistema.perfil_professor).joinedload(PerfilProfessor.clinica),
+        joinedload(UsuarioSistema.perfil_aluno).joinedload(PerfilAluno.clinica),
+        joinedload(UsuarioSistema.perfil_recepcionista),
+    )
+
+
+async def get_user_with_profile(db: AsyncSession, user_id: int) -> UsuarioSistema | None:
+    """Usuário com perfil e clínica carregados (uma consulta)"""
+    stmt = select(UsuarioSistema).where(UsuarioSistema.id == user_id).options(*profile_load_options())
+    res = await db.execute(stmt)
+    return res.unique().scalar_one_or_none()
+
+
+def _clinica_data(data: dict[str, Any], perfil: PerfilProfessor | PerfilAluno) -> dict[str, Any]:
+    if perfil.clinica is not None:
+        c = perfil.clinica
+        data["clinica"] = {"id": c.id, "codigo": c.codigo, "nome": c.nome}
+    elif perfil.clinica_id:
+        data["clinica_id"] = perfil.clinica_id
+    return data
+
+
+def profile_data(user: UsuarioSistema) -> dict | None:
+    """Dados do perfil específico a partir dos relacionamentos já carregados"""
     if user.perfil == PerfilUsuario.professor:
-        res = await db.execute(select(PerfilProfessor).where(PerfilProfessor.user_id == user.id))
-        p = res.scalar_one_or_none()
-        if not p:
-            return None
-        data: dict[str, Any] = {"especialidade": p.especialidade}
-        if p.clinica_id:
-            c = await db.get(Clinica, p.clinica_id)
-            if c:
-                data["clinica"] = {"id": c.id, "codigo": c.codigo, "nome": c.nome}
-            else:
-                data["clinica_id"] = p.clinica_id
-        return data
+        p = user.perfil_professor
+        return _clinica_data({"especialidade": p.especialidade}, p) if p else None
     if user.perfil == PerfilUsuario.recepcionista:
-        res = await db.execute(select(PerfilRecepcionista).where(PerfilRecepcionista.user_id == user.id))
-        p = res.scalar_one_or_none()
+        p = user.perfil_recepcionista
         return {"telefone": p.telefone} if p else None
     if user.perfil == PerfilUsuario.aluno:
-        res = await db.execute(select(PerfilAluno).where(PerfilAluno.user_id == user.id))
-        p = res.scalar_one_or_none()
-        if not p:
-            return None
-        data: dict[str, Any] = {"matricula": p.matricula, "telefone": p.telefone}
-        if p.clinica_id:
-            c = await db.get(Clinica, p.clinica_id)
-            if c:
-                data["clinica"] = {"id": c.id, "codigo": c.codigo, "nome": c.nome}
-            else:
-                data["clinica_id"] = p.clinica_id
-        return data
+        p = user.perfil_aluno
+        return _clinica_data({"matricula": p.matricula, "telefone": p.telefone}, p) if p else None
     return None
 
 
-async def authenticate_user(db: AsyncSession, email: str, senha: str) -> UsuarioSistema | None:
-    user = await get_user_by_email(db, email)
+async def get_profile_data(db: AsyncSession, user: UsuarioSistema) -> dict | None:
+    """Como ``profile_data``; carrega o perfil (uma consulta) se ainda não veio com o usuário"""
+    relacionamento = _PERFIL_RELACIONAMENTO.get(user.perfil)
+    if relacionamento is None:
+        return None
+    if relacionamento in inspect(user).unloaded:
+        # o SELECT com joinedload preenche os atributos ainda não carregados do mesmo objeto
+        await get_user_with_profile(db, user.id)
+    return profile_data(user)
+
+
+def _profile_data_from_row(row) -> dict | None:
+    """Mesmo formato de ``get_profile_data``, a partir da linha achatada"""
+    if row.perfil == PerfilUsuario.professor and row.professor_id is not None:
+        data: dict[str, Any] = {"especialidade": row.especialidade}
+    elif row.perfil == PerfilUsuario.aluno and row.aluno_id is not None:
+        data = {"matricula": row.matricula, "telefone": row.aluno_telefone}
+    elif row.perfil == PerfilUsuario.recepcionista and row.recepcionista_id is not None:
+        return {"telefone": row.recepcionista_telefone}
+    else:
+        return None
+    if row.clinica_codigo is not None:
+        data["clinica"] = {"id": row.clinica_id, "codigo": row.clinica_codigo, "nome": row.clinica_nome}
+    elif row.clinica_id is not None:
+        data["clinica_id"] = row.clinica_id
+    return data
+
+
+def users_with_profiles_stmt():
+    """Usuários + perfil específico + clínica em um único SELECT (LEFT JOINs)"""
+    clinica_id = func.coalesce(PerfilProfessor.clinica_id, PerfilAluno.clinica_id)
+    return (
+        select(
+            UsuarioSistema.id,
+            UsuarioSistema.nome,
+            UsuarioSistema.email,
+            UsuarioSistema.perfil,
+            UsuarioSistema.cpf,
+            UsuarioSistema.ativo,
+            PerfilProfessor.user_id.label("professor_id"),
+            PerfilProfessor.especialidade,
+            PerfilAluno.user_id.label("aluno_id"),
+            PerfilAluno.matricula,
+            PerfilAluno.telefone.label("aluno_telefone"),
+            PerfilRecepcionista.user_id.label("recepcionista_id"),
+            PerfilRecepcionista.telefone.label("recepcionista_telefone"),
+            clinica_id.label("clinica_id"),
+            Clinica.codigo.label("clinica_codigo"),
+            Clinica.nome.label("clinica_nome"),
+        )
+        .outerjoin(PerfilProfessor, PerfilProfessor.user_id == UsuarioSistema.id)
+        .outerjoin(PerfilAluno, PerfilAluno.user_id == UsuarioSistema.id)
+        .outerjoin(PerfilRecepcionista, PerfilRecepcionista.user_id == UsuarioSistema.id)
+        .outerjoin(Clinica, Clinica.id == clinica_id)
+        .order_by(UsuarioSistema.nome_normalizado, UsuarioSistema.id)
+    )
+
+
+def _user_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "nome": row.nome,
+        "email": row.email,
+        "perfil": row.perfil.value,
+        "cpf": row.cpf,
+        "ativo": row.ativo,
+        "clinica_id": row.clinica_id,
+        "perfil_dados": _profile_data_from_row(row),
+    }
+
+
+async def list_users_with_profiles(db: AsyncSession) -> list[dict]:
+    """Lista usuários com dados de perfil e clínica, sem uma consulta por usuário"""
+    res = await db.execute(users_with_profiles_stmt())
+    return [_user_dict(row) for row in res.all()]
+
+
+# Paginação por cursor (keyset): continua a partir da chave da última linha.
+# Em ordem de nome, com perfil/ativo fixados a página é uma faixa contígua de
+# ix_usuarios_perfil_ativo_nome; sem filtros, de ix_usuarios_nome_normalizado.
+UsuarioPage = tuple[list[dict], Optional[str]]
+_NOME_KEY = (UsuarioSistema.nome_normalizado, UsuarioSistema.id)
+
+CPF_DIGITS = 11
+_CPF_SEPARADORES = " .-"
+
+
+def _prefix_condition(column, prefix: str):
+    """Prefixo como faixa do índice da coluna (``>= p AND < p+1``)"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (column >= prefix) & (column < upper)
+
+
+async def _keyset_page(
+    db: AsyncSession,
+    stmt,
+    keys: tuple,
+    cursor: Optional[str],
+    limit: int,
+    perfil: Optional[PerfilUsuario] = None,
+    ativo: Optional[bool] = None,
+) -> UsuarioPage:
+    """Executa ``stmt`` (usuários com perfil) filtrado e ordenado por ``keys``"""
+    if perfil is not None:
+        stmt = stmt.where(UsuarioSistema.perfil == PerfilUsuario(perfil))
+    if ativo is not None:
+        stmt = stmt.where(UsuarioSistema.ativo == ativo)
+    if cursor:
+        stmt = stmt.where(tuple_(*keys) > tuple_(*decode_cursor(cursor, len(keys))))
+
+    labels = [key.label(f"_cursor_{i}") for i, key in enumerate(keys)]
+    stmt = stmt.add_columns(*labels).order_by(None).order_by(*keys).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], label.name) for label in labels])
+    return [_user_dict(row) for row in rows], next_cursor
+
+
+async def list_users(
+    db: AsyncSession,
+    perfil: Optional[PerfilUsuario] = None,
+    ativo: Optional[bool] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> UsuarioPage:
+    """Página de usuários (com perfil e clínica) filtrada no banco.
+
+    ``search`` filtra pelo início do nome, sem acentos e caixa. Retorna
+    (itens, próximo cursor ou None).
+    """
+    stmt = users_with_profiles_stmt()
+    if search:
+        termo = normalize_name(search)
+        if termo:
+            stmt = stmt.where(_prefix_condition(UsuarioSistema.nome_normalizado, termo))
+    return await _keyset_page(db, stmt, _NOME_KEY, cursor, limit, perfil, ativo)
+
+
+async def search_users(
+    db: AsyncSession,
+    termo: str,
+    perfil: Optional[PerfilUsuario] = None,
+    ativo: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> UsuarioPage:
+    """Busca usuários por e-mail, CPF ou nome, sempre por um índice.
+
+    Termo com "@" é prefixo do e-mail (o exato vem primeiro); só dígitos e
+    separadores, CPF (exato com 11 dígitos, prefixo com menos); o resto,
+    prefixo do nome normalizado. Sem termo, equivale a ``list_users``.
+    """
+    termo = (termo or "").strip()
+    if "@" in termo:
+        stmt = users_with_profiles_stmt().where(_prefix_condition(UsuarioSistema.email, termo))
+        return await _keyset_page(db, stmt, (UsuarioSistema.email,), cursor, limit, perfil, ativo)
+
+    digits = "".join(filter(str.isdigit, termo))
+    if digits and all(c.isdigit() or c in _CPF_SEPARADORES for c in termo):
+        if len(digits) == CPF_DIGITS:
+            condition = UsuarioSistema.cpf == digits
+        else:
+            condition = _prefix_condition(UsuarioSistema.cpf, digits)
+        stmt = users_with_profiles_stmt().where(condition)
+        return await _keyset_page(db, stmt, (UsuarioSistema.cpf,), cursor, limit, perfil, ativo)
+
+    return await list_users(db, perfil=perfil, ativo=ativo, search=termo, cursor=cursor, limit=limit)
+
+
+# regravações de hash em andamento (referência forte até terminarem)
+_rehash_tasks: set[asyncio.Task] = set()
+
+
+async def _rehash_password(bind, user_id: int, senha: str, hash_antigo: str) -> None:
+    """Regrava o hash com o esquema/custo atual, fora da sessão do login.
+
+    Só troca se o hash ainda for o lido no login: uma troca de senha feita
+    nesse meio tempo prevalece.
+    """
+    novo = await hash_password_async(senha)
+    async with bind.begin() as conn:
+        await conn.execute(
+            update(UsuarioSistema)
+            .where(UsuarioSistema.id == user_id, UsuarioSistema.senha_hash == hash_antigo)
+            .values(senha_hash=novo)
+        )
+
+
+def _rehash_done(task: asyncio.Task) -> None:
+    _rehash_tasks.discard(task)
+    if not task.cancelled():
+        task.exception()  # falha não é fatal: o próximo login tenta de novo
+
+
+async def wait_pending_rehashes() -> None:
+    """Aguarda as regravações agendadas pelo login (testes e encerramento)"""
+    if _rehash_tasks:
+        await asyncio.gather(*list(_rehash_tasks), return_exceptions=True)
+
+
+async def authenticate_user(
+    db: AsyncSession, email: str, senha: str, origem: str = ORIGEM_LOCAL
+) -> UsuarioSistema | None:
+    """Usuário autenticado ou None; ``LoginBloqueado`` se excedeu as tentativas"""
+    # conta/recusa antes do banco e do bcrypt: rajadas de senha errada custam ~nada
+    login_throttle.attempt(email, origem)
+    # perfil e clínica vêm no mesmo SELECT: a tela inicial usa sem nova consulta
+    user = await get_user_by_email(db, email, with_profile=True)
     if not user or not user.ativo:
         return None
-    if not verify_password(senha, user.senha_hash):
+    if not await verify_password_async(senha, user.senha_hash):
         return None
+    login_throttle.success(email, origem)
+    if password_needs_rehash(user.senha_hash):
+        # o login não espera o novo hash (~ o custo de outra verificação)
+        task = asyncio.create_task(_rehash_password(db.bind, user.id, senha, user.senha_hash))
+        _rehash_tasks.add(task)
+        task.add_done_callback(_rehash_done)
     return user
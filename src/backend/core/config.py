@@ -5,11 +5,56 @@ class Settings(BaseSettings):
     app_name: str = "INE5608_CliniSys"
     secret_key: str = "chave-misteriosa-troca-ja"
     access_token_expire_minutes: int = 30
+    # Claims de access tokens já verificados mantidos em memória (até o exp)
+    token_claims_cache_max_itens: int = 10000
     database_url: str = "sqlite+aiosqlite:///./clinisys_uc_admin.db"
     admin_email: str = "admin@exemplo.com"
     admin_password: str = "admin123"
     admin_cpf: str = "00000000000"
 
+    # Perfil de desempenho do SQLite (aplicado em cada nova conexão)
+    sqlite_performance_profile: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_size: int = -32000  # negativo = KiB (~32 MB)
+    sqlite_mmap_size: int = 268435456  # 256 MB
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_busy_timeout: int = 5000  # ms
+
+    # Arquivamento da fila: encerrados há mais de N dias vão para o histórico
+    fila_arquivo_dias: int = 30
+    fila_arquivo_lote: int = 1000
+
+    # Threads para hash/verificação de senha (limite de hashes simultâneos)
+    password_hash_workers: int = 4
+    # Hash de senhas: o primeiro esquema gera hashes novos; os demais são
+    # aceitos e regravados no próximo login (ex: "argon2,bcrypt")
+    password_schemes: str = "bcrypt"
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536  # KiB
+    argon2_parallelism: int = 4
+    # Custo abaixo do configurado é elevado no login; acima só é reduzido se ligado
+    password_reduzir_custo: bool = False
+
+    # Limite de tentativas de login (em memória; arquivo opcional p/ bloqueios)
+    login_throttle_falhas: int = 5  # por e-mail + origem
+    login_throttle_falhas_origem: int = 20  # por origem identificada, qualquer e-mail
+    login_throttle_janela_s: int = 300
+    login_throttle_bloqueio_s: int = 900
+    login_throttle_max_chaves: int = 10000
+    login_throttle_arquivo: str = ""  # vazio = bloqueios só na memória
+
+    # Cache de refresh tokens validados: revogações feitas em outra estação
+    # (mesmo banco) só são vistas quando a entrada vence, então o ttl é curto
+    refresh_cache_ttl_s: float = 5.0
+    refresh_cache_max_itens: int = 10000
+    # Limpeza periódica de refresh tokens expirados/revogados
+    refresh_sweep_intervalo_s: int = 3600
+    refresh_sweep_lote: int = 500
+    refresh_sweep_pausa_s: float = 0.05
+    refresh_sweep_retencao_revogados_dias: int = 7
+
     class Config:
         env_prefix = "APP_"
         case_sensitive = False
@@ -0,0 +1,38 @@
+"""Tokens de continuação para paginação por chave (keyset).
+
+O token carrega os valores da chave de ordenação da última linha devolvida,
+serializados em JSON e codificados em base64 url-safe (opaco para o cliente).
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Sequence
+
+ERR_CURSOR_INVALIDO = "Cursor de paginação inválido"
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável no cursor: {type(value).__name__}")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> list[Any]:
+    """Decodifica o token; ``size`` é o número de colunas da chave esperada"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(ERR_CURSOR_INVALIDO) from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(ERR_CURSOR_INVALIDO)
+    return values
@@ -1,5 +1,12 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 import warnings
 
 # Correção para problema de compatibilidade bcrypt/passlib
@@ -17,13 +24,64 @@ from jose import jwt, JWTError
 from passlib.context import CryptContext
 
 from .config import settings
+from .sketch import bucket_index, quantile
 
 # Suprimir warnings do bcrypt/passlib
 warnings.filterwarnings("ignore", category=UserWarning, module="passlib")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = "HS256"
 
+SCHEMES_SUPORTADOS = ("argon2", "bcrypt")
+
+
+def build_pwd_context(
+    schemes: Optional[str] = None,
+    bcrypt_rounds: Optional[int] = None,
+    argon2_time_cost: Optional[int] = None,
+    argon2_memory_cost: Optional[int] = None,
+    argon2_parallelism: Optional[int] = None,
+    reduzir_custo: Optional[bool] = None,
+) -> CryptContext:
+    """Contexto de senhas conforme ``settings`` (ou os valores informados).
+
+    O primeiro esquema gera os hashes novos; os demais só verificam e ficam
+    marcados como obsoletos. Hashes com custo abaixo do configurado também
+    acusam ``needs_update`` e o login os regrava; custo acima é mantido, a
+    menos que ``reduzir_custo`` (``settings.password_reduzir_custo``) peça o
+    contrário.
+    """
+    nomes = [n.strip() for n in (schemes or settings.password_schemes).split(",") if n.strip()]
+    invalidos = [n for n in nomes if n not in SCHEMES_SUPORTADOS]
+    if not nomes or invalidos:
+        raise ValueError(f"Esquemas de senha inválidos: {invalidos or nomes}")
+    if "argon2" in nomes:
+        from passlib.hash import argon2
+        if not argon2.has_backend():
+            raise RuntimeError("Esquema argon2 requer o pacote argon2-cffi")
+
+    rounds = bcrypt_rounds or settings.bcrypt_rounds
+    time_cost = argon2_time_cost or settings.argon2_time_cost
+    # ``rounds`` fixaria também o máximo no passlib: só padrão e mínimo
+    custos = dict(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        argon2__default_rounds=time_cost,
+        argon2__min_rounds=time_cost,
+    )
+    if settings.password_reduzir_custo if reduzir_custo is None else reduzir_custo:
+        custos.update(bcrypt__max_rounds=rounds, argon2__max_rounds=time_cost)
+    return CryptContext(
+        schemes=nomes,
+        deprecated="auto",
+        argon2__type="ID",
+        argon2__memory_cost=argon2_memory_cost or settings.argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism or settings.argon2_parallelism,
+        **custos,
+    )
+
+
+pwd_context = build_pwd_context()
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -33,6 +91,125 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
+def password_needs_rehash(hashed: str) -> bool:
+    """Hash de esquema obsoleto ou custo abaixo do configurado"""
+    if not pwd_context.needs_update(hashed):
+        return False
+    if settings.password_reduzir_custo or pwd_context.default_scheme() != "argon2" or pwd_context.identify(hashed) != "argon2":
+        return True
+    # o passlib exige memory_cost igual ao configurado: memória acima não é motivo para regravar
+    handler = pwd_context.handler("argon2")
+    memoria = handler.from_string(hashed).memory_cost
+    if memoria <= handler.memory_cost:
+        return True
+    return handler.using(memory_cost=memoria).needs_update(hashed)
+
+
+# ---------------------------------------------------------------------------
+# Hash fora do event loop: o bcrypt leva ~250 ms e libera o GIL, então roda
+# num pool de threads próprio. O tamanho do pool é o limite de hashes
+# simultâneos; o excedente espera na fila do executor sem travar o loop.
+# ---------------------------------------------------------------------------
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _hash_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.password_hash_workers), thread_name_prefix="senha-hash"
+            )
+        return _executor
+
+
+@dataclass(frozen=True)
+class HashStats:
+    """Resumo das chamadas de hash/verificação (tempos em ms)"""
+    chamadas: int
+    em_execucao: int
+    pico_simultaneas: int
+    espera_p50: Optional[float]
+    espera_p90: Optional[float]
+    hash_p50: Optional[float]
+    hash_p90: Optional[float]
+
+
+class _HashMetrics:
+    """Latências de espera na fila e de execução, em baldes de ``core.sketch``"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.chamadas = 0
+            self.em_execucao = 0
+            self.pico = 0
+            self.espera: Counter[int] = Counter()
+            self.execucao: Counter[int] = Counter()
+
+    def start(self, espera_s: float) -> None:
+        with self._lock:
+            self.em_execucao += 1
+            self.pico = max(self.pico, self.em_execucao)
+            self.espera[bucket_index(espera_s * 1000)] += 1
+
+    def finish(self, execucao_s: float) -> None:
+        with self._lock:
+            self.em_execucao -= 1
+            self.chamadas += 1
+            self.execucao[bucket_index(execucao_s * 1000)] += 1
+
+    def snapshot(self) -> HashStats:
+        with self._lock:
+            return HashStats(
+                chamadas=self.chamadas,
+                em_execucao=self.em_execucao,
+                pico_simultaneas=self.pico,
+                espera_p50=quantile(self.espera, 0.5),
+                espera_p90=quantile(self.espera, 0.9),
+                hash_p50=quantile(self.execucao, 0.5),
+                hash_p90=quantile(self.execucao, 0.9),
+            )
+
+
+hash_metrics = _HashMetrics()
+
+
+async def _run_hash(fn: Callable[..., T], *args) -> T:
+    enfileirado = time.perf_counter()
+
+    def job() -> T:
+        inicio = time.perf_counter()
+        hash_metrics.start(inicio - enfileirado)
+        try:
+            return fn(*args)
+        finally:
+            hash_metrics.finish(time.perf_counter() - inicio)
+
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor(), job)
+
+
+async def hash_password_async(password: str) -> str:
+    """``hash_password`` no pool de hash, sem bloquear o event loop"""
+    return await _run_hash(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """``verify_password`` no pool de hash, sem bloquear o event loop"""
+    return await _run_hash(verify_password, plain, hashed)
+
+
+def password_hash_stats() -> HashStats:
+    return hash_metrics.snapshot()
+
+
 def create_access_token(subject: str | int, expires_delta: Optional[timedelta] = None) -> str:
     now = datetime.now(timezone.utc)
     expire = now + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
@@ -40,8 +217,87 @@ def create_access_token(subject: str | int, expires_delta: Optional[timedelta] =
     return jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
 
 
+@dataclass(frozen=True)
+class ClaimsStats:
+    acertos: int
+    faltas: int
+    itens: int
+
+
+class _ClaimsCache:
+    """Claims já verificados, pelo SHA-256 do token, até o ``exp`` de cada um.
+
+    Uma troca de ``settings.secret_key`` esvazia o cache na consulta seguinte,
+    então tokens assinados com a chave antiga voltam a ser verificados (e recusados).
+    """
+
+    def __init__(self, max_itens: int) -> None:
+        self.max_itens = max_itens
+        self._lock = threading.Lock()
+        self._itens: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._chave = settings.secret_key
+        self.acertos = 0
+        self.faltas = 0
+
+    def _conferir_chave(self) -> None:
+        if self._chave != settings.secret_key:
+            self._itens.clear()
+            self._chave = settings.secret_key
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        with self._lock:
+            self._conferir_chave()
+            item = self._itens.get(digest)
+            if item is None or item[0] <= time.time():
+                if item is not None:
+                    del self._itens[digest]
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(digest)
+            self.acertos += 1
+            return item[1]
+
+    def put(self, digest: bytes, chave: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._conferir_chave()
+            if chave != self._chave:  # verificado com a chave anterior
+                return
+            self._itens[digest] = (float(exp), claims)
+            self._itens.move_to_end(digest)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self.acertos = 0
+            self.faltas = 0
+
+    def snapshot(self) -> ClaimsStats:
+        with self._lock:
+            return ClaimsStats(acertos=self.acertos, faltas=self.faltas, itens=len(self._itens))
+
+
+claims_cache = _ClaimsCache(max_itens=settings.token_claims_cache_max_itens)
+
+
 def decode_token(token: str) -> dict | None:
+    """Claims do token válido (assinatura e ``exp``); tokens já vistos saem do cache"""
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = claims_cache.get(digest)
+    if claims is not None:
+        return dict(claims)
+    chave = settings.secret_key
     try:
-        return jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
+        claims = jwt.decode(token, chave, algorithms=[ALGORITHM])
     except JWTError:
         return None
+    claims_cache.put(digest, chave, claims)
+    return dict(claims)
+
+
+def token_claims_stats() -> ClaimsStats:
+    return claims_cache.snapshot()
@@ -0,0 +1,47 @@
+"""Esboço de quantis com erro relativo limitado (no estilo DDSketch).
+
+Cada valor positivo cai no balde ``ceil(log_gamma(x))``; o quantil estimado
+fica a no máximo ``ERRO_RELATIVO`` do valor real. Como os baldes são fixos, o
+esboço é só um mapa balde -> contagem: pode ser gravado como linhas no banco,
+incrementado com UPSERT e somado entre dias ou processos sem perda.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Mapping, Optional
+
+ERRO_RELATIVO = 0.02
+GAMMA = (1 + ERRO_RELATIVO) / (1 - ERRO_RELATIVO)
+_LOG_GAMMA = math.log(GAMMA)
+
+# valores abaixo disso (ex: < 1 s) vão todos para o balde 0
+VALOR_MINIMO = 1.0
+
+
+def bucket_index(valor: float) -> int:
+    """Balde do valor; ex: 60 s -> 103, 3600 s -> 205"""
+    if valor <= VALOR_MINIMO:
+        return 0
+    return math.ceil(math.log(valor) / _LOG_GAMMA)
+
+
+def bucket_value(indice: int) -> float:
+    """Valor representativo do balde (ponto de erro relativo mínimo)"""
+    if indice <= 0:
+        return VALOR_MINIMO
+    return 2 * GAMMA ** indice / (GAMMA + 1)
+
+
+def quantile(baldes: Mapping[int, int], q: float) -> Optional[float]:
+    """Quantil ``q`` (0..1) a partir das contagens por balde; None se vazio"""
+    total = sum(baldes.values())
+    if total <= 0:
+        return None
+    alvo = q * (total - 1)
+    acumulado = 0
+    for indice in sorted(baldes):
+        acumulado += baldes[indice]
+        if acumulado > alvo:
+            return bucket_value(indice)
+    return bucket_value(max(baldes))
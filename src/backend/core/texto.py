@@ -0,0 +1,19 @@
+"""Normalização de nomes para ordenação e busca.
+
+A chave normalizada remove acentos, ignora caixa e colapsa espaços, de modo
+que a ordenação binária do banco fique correta para nomes em português
+("Álvaro" antes de "Zé") e a busca "jose" encontre "José".
+"""
+
+from __future__ import annotations
+
+import unicodedata
+
+
+def normalize_name(nome: str | None) -> str:
+    """Ex: ``"  José  Álvaro "`` -> ``"jose alvaro"``"""
+    if not nome:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", nome)
+    sem_acentos = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
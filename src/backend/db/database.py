@@ -1,16 +1,85 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from ..core.config import settings
 
+# PRAGMAs ajustados pelo perfil de desempenho, na ordem em que são aplicados
+SQLITE_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(settings.database_url, echo=False, future=True)
+def sqlite_profile_pragmas() -> dict[str, str | int]:
+    """Valores configurados em Settings para cada PRAGMA do perfil"""
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "cache_size": settings.sqlite_cache_size,
+        "mmap_size": settings.sqlite_mmap_size,
+        "temp_store": settings.sqlite_temp_store,
+        "busy_timeout": settings.sqlite_busy_timeout,
+    }
+
+
+def apply_sqlite_profile(dbapi_connection, _connection_record=None) -> None:
+    """Aplica o perfil de desempenho a uma conexão SQLite recém-aberta"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_profile_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def engine_options(url: str) -> dict:
+    """Opções extras do engine conforme o banco.
+
+    O SQLAlchemy 2.0.32 usa NullPool para SQLite em arquivo via aiosqlite: cada
+    sessão abriria uma conexão nova (e reaplicaria o perfil de PRAGMAs). Um pool
+    pequeno mantém as conexões abertas entre transações.
+    """
+    if url.startswith("sqlite") and ":memory:" not in url and "mode=memory" not in url:
+        return {"poolclass": AsyncAdaptedQueuePool, "pool_size": 5, "max_overflow": 5}
+    return {}
+
+
+def upsert_insert(session: AsyncSession | Connection):
+    """``insert`` do dialeto, com ON CONFLICT (SQLite/PostgreSQL); None nos demais"""
+    bind = session if isinstance(session, Connection) else session.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+engine = create_async_engine(settings.database_url, echo=False, future=True, **engine_options(settings.database_url))
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+if engine.dialect.name == "sqlite" and settings.sqlite_performance_profile:
+    event.listen(engine.sync_engine, "connect", apply_sqlite_profile)
+
+
+async def get_sqlite_pragmas() -> dict[str, str]:
+    """Lê os valores efetivos dos PRAGMAs do perfil (vazio fora do SQLite)"""
+    if engine.dialect.name != "sqlite":
+        return {}
+
+    values: dict[str, str] = {}
+    async with engine.connect() as conn:
+        for name in SQLITE_PRAGMAS:
+            result = await conn.exec_driver_sql(f"PRAGMA {name}")
+            values[name] = str(result.scalar())
+    return values
+
 
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -0,0 +1,86 @@
+"""Índice FTS5 (SQLite) para busca textual de pacientes por nome.
+
+A tabela virtual ``pacientes_fts`` usa ``pacientes`` como conteúdo externo e é
+mantida por triggers; o tokenizer ``unicode61`` remove acentos e ignora caixa,
+então "jose" encontra "José".
+"""
+
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import column, table, literal_column
+from sqlalchemy.engine import Connection
+
+PACIENTES_FTS = "pacientes_fts"
+
+pacientes_fts = table(PACIENTES_FTS, column("rowid"), column("nome"))
+
+PACIENTES_FTS_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {PACIENTES_FTS} USING fts5(
+        nome,
+        content='pacientes',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {PACIENTES_FTS}_ai AFTER INSERT ON pacientes BEGIN
+        INSERT INTO {PACIENTES_FTS}(rowid, nome) VALUES (new.id, new.nome);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {PACIENTES_FTS}_ad AFTER DELETE ON pacientes BEGIN
+        INSERT INTO {PACIENTES_FTS}({PACIENTES_FTS}, rowid, nome) VALUES ('delete', old.id, old.nome);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {PACIENTES_FTS}_au AFTER UPDATE OF nome ON pacientes BEGIN
+        INSERT INTO {PACIENTES_FTS}({PACIENTES_FTS}, rowid, nome) VALUES ('delete', old.id, old.nome);
+        INSERT INTO {PACIENTES_FTS}(rowid, nome) VALUES (new.id, new.nome);
+    END""",
+)
+
+PACIENTES_FTS_DROP = (
+    f"DROP TRIGGER IF EXISTS {PACIENTES_FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {PACIENTES_FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {PACIENTES_FTS}_au",
+    f"DROP TABLE IF EXISTS {PACIENTES_FTS}",
+)
+
+PACIENTES_FTS_REBUILD = f"INSERT INTO {PACIENTES_FTS}({PACIENTES_FTS}) VALUES ('rebuild')"
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_match_expression(term: str) -> str | None:
+    """Converte o texto digitado em uma expressão MATCH de prefixos (AND implícito).
+
+    Ex: ``"mari sil"`` -> ``"mari"* "sil"*``. Retorna None se não houver termos.
+    """
+    tokens = _TOKEN_PATTERN.findall(term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def fts_match(expression: str):
+    """Condição ``pacientes_fts MATCH :expr`` para uso em select()"""
+    return literal_column(PACIENTES_FTS).op("MATCH")(expression)
+
+
+fts_rank = literal_column(f"{PACIENTES_FTS}.rank")
+
+
+def ensure_pacientes_fts(connection: Connection) -> bool:
+    """Cria índice e triggers se ainda não existirem (bancos já populados).
+
+    Retorna True quando o índice foi criado agora (e reconstruído a partir de
+    ``pacientes``). Não faz nada fora do SQLite.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (PACIENTES_FTS,)
+    ).first()
+    for ddl in PACIENTES_FTS_DDL:
+        connection.exec_driver_sql(ddl)
+    if exists:
+        return False
+    connection.exec_driver_sql(PACIENTES_FTS_REBUILD)
+    return True
@@ -0,0 +1,127 @@
+"""Atualização do schema de bancos SQLite já existentes, na inicialização do app.
+
+``create_all`` só cria as tabelas que faltam: colunas e índices novos em
+tabelas existentes (ex: ``nome_normalizado``, ``prioridade``, ``familia``)
+chegam ao banco apenas pelas migrações, e o ``alembic/env.py`` não roda com a
+URL aiosqlite do app. ``ensure_schema`` cobre esse caminho como
+``ensure_pacientes_fts``: compara o banco com os modelos e
+
+- adiciona as colunas ausentes (ALTER TABLE ADD COLUMN) e preenche as derivadas;
+- cria os índices ausentes;
+- recria as tabelas que passaram a exigir AUTOINCREMENT (ids nunca reutilizados).
+
+É idempotente e não remove nada. Fora do SQLite não faz nada: use as migrações.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from sqlalchemy import MetaData, Table, inspect, select, update, bindparam
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from .database import Base
+from ..core.texto import normalize_name
+
+LOTE = 500
+
+
+def _preencher_nome_normalizado(connection: Connection, table: Table) -> None:
+    rows = connection.execute(select(table.c.id, table.c.nome)).all()
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values(nome_normalizado=bindparam("_valor"))
+    )
+    for start in range(0, len(rows), LOTE):
+        connection.execute(stmt, [{"_id": r.id, "_valor": normalize_name(r.nome)} for r in rows[start:start + LOTE]])
+
+
+def _preencher_familia(connection: Connection, table: Table) -> None:
+    # tokens existentes: cada um é a própria família
+    connection.execute(update(table).where(table.c.familia.is_(None)).values(familia=table.c.token_hash))
+
+
+# (tabela, coluna) -> preenchimento das linhas existentes quando a coluna é criada
+PREENCHIMENTOS: dict[tuple[str, str], Callable[[Connection, Table], None]] = {
+    ("pacientes", "nome_normalizado"): _preencher_nome_normalizado,
+    ("usuarios", "nome_normalizado"): _preencher_nome_normalizado,
+    ("refresh_tokens", "familia"): _preencher_familia,
+}
+
+
+def _add_column_ddl(connection: Connection, table: Table, column) -> str:
+    ddl = str(CreateColumn(column).compile(dialect=connection.dialect))
+    if len(column.foreign_keys) == 1:
+        fk = next(iter(column.foreign_keys))
+        ddl += f" REFERENCES {fk.column.table.name} ({fk.column.name})"
+        if fk.ondelete:
+            ddl += f" ON DELETE {fk.ondelete}"
+    return f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}'
+
+
+def _create_sql(connection: Connection, nome: str) -> str:
+    return connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (nome,)
+    ).scalar() or ""
+
+
+def _recreate_autoincrement(connection: Connection, table: Table) -> None:
+    """Recria a tabela com AUTOINCREMENT (o SQLite só o aceita na criação)"""
+    metadata = MetaData()
+    for fk in table.foreign_keys:
+        fk.column.table.to_metadata(metadata)
+    nova = table.to_metadata(metadata, name=f"_{table.name}_novo")
+    colunas = ", ".join(f'"{c.name}"' for c in table.columns)
+    connection.execute(CreateTable(nova))
+    connection.exec_driver_sql(f'INSERT INTO "{nova.name}" ({colunas}) SELECT {colunas} FROM "{table.name}"')
+    connection.exec_driver_sql(f'DROP TABLE "{table.name}"')
+    connection.exec_driver_sql(f'ALTER TABLE "{nova.name}" RENAME TO "{table.name}"')
+    for index in table.indexes:
+        index.create(connection)
+    # a sequência parte do maior id já usado, inclusive os arquivados
+    maior = connection.exec_driver_sql(f'SELECT coalesce(max(id), 0) FROM "{table.name}"').scalar()
+    historico = f"{table.name}_historico"
+    if _create_sql(connection, historico):
+        maior = max(maior, connection.exec_driver_sql(f'SELECT coalesce(max(id), 0) FROM "{historico}"').scalar())
+    connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = ?", (table.name,))
+    connection.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, maior))
+
+
+def ensure_schema(connection: Connection) -> list[str]:
+    """Leva colunas, índices e AUTOINCREMENT das tabelas existentes ao estado dos modelos.
+
+    Chamar depois de ``create_all``. Retorna o que foi alterado (vazio se nada).
+    """
+    if connection.dialect.name != "sqlite":
+        return []
+    from .. import models  # noqa: F401  (registra as tabelas no metadata)
+
+    alteracoes: list[str] = []
+    insp = inspect(connection)
+    existentes = set(insp.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existentes:
+            continue
+        colunas = {c["name"] for c in insp.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in colunas:
+                continue
+            connection.exec_driver_sql(_add_column_ddl(connection, table, column))
+            preencher = PREENCHIMENTOS.get((table.name, column.name))
+            if preencher is not None:
+                preencher(connection, table)
+            alteracoes.append(f"{table.name}.{column.name}")
+
+        if table.dialect_options["sqlite"]["autoincrement"] and "AUTOINCREMENT" not in _create_sql(connection, table.name).upper():
+            _recreate_autoincrement(connection, table)
+            alteracoes.append(f"{table.name} AUTOINCREMENT")
+            continue
+
+        indices = {ix["name"] for ix in inspect(connection).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indices:
+                index.create(connection)
+                alteracoes.append(index.name)
+    return alteracoes
@@ -0,0 +1,172 @@
+"""Índice de trigramas para busca aproximada (tolerante a erros) de nomes.
+
+O índice é montado sobre o vocabulário de palavras dos nomes normalizados de
+pacientes, e não sobre cada paciente: ``pacientes_vocabulario`` guarda cada
+palavra distinta com o número de pacientes que a usam, e
+``pacientes_trigramas`` guarda os trigramas de cada palavra. Como o
+vocabulário de nomes é pequeno (milhares de palavras mesmo com centenas de
+milhares de pacientes), achar as variantes de "luiz" ou "souza" custa poucas
+linhas lidas; os pacientes que têm as variantes são então localizados pelo
+índice de palavras (FTS5 no SQLite).
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable
+
+from sqlalchemy import Table, Column, Integer, String, ForeignKey, select, insert, update, delete, func
+from sqlalchemy.engine import Connection
+
+from .database import Base, upsert_insert
+from ..core.texto import normalize_name
+
+PACIENTES_VOCABULARIO = "pacientes_vocabulario"
+PACIENTES_TRIGRAMAS = "pacientes_trigramas"
+
+pacientes_vocabulario = Table(
+    PACIENTES_VOCABULARIO,
+    Base.metadata,
+    Column("palavra", String(120), primary_key=True),
+    Column("ocorrencias", Integer, nullable=False, default=0),
+)
+
+pacientes_trigramas = Table(
+    PACIENTES_TRIGRAMAS,
+    Base.metadata,
+    Column("trigrama", String(3), primary_key=True),
+    Column(
+        "palavra",
+        String(120),
+        ForeignKey(f"{PACIENTES_VOCABULARIO}.palavra", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    sqlite_with_rowid=False,
+)
+
+# Mesmo critério de separação do tokenizer do FTS5 (letras/dígitos)
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def name_words(nome: str | None) -> list[str]:
+    """Palavras distintas do nome normalizado, na ordem em que aparecem"""
+    return list(dict.fromkeys(_WORD_PATTERN.findall(normalize_name(nome))))
+
+
+@lru_cache(maxsize=65536)
+def word_trigrams(palavra: str) -> frozenset[str]:
+    """Trigramas da palavra com dois espaços à esquerda e um à direita.
+
+    Ex: ``"luiz"`` -> ``{"  l", " lu", "lui", "uiz", "iz "}``.
+    """
+    padded = f"  {palavra} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Similaridade de Jaccard entre dois conjuntos de trigramas"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def similar_words_stmt(trigramas: Iterable[str], min_hits: int):
+    """Palavras do vocabulário com ao menos ``min_hits`` trigramas em comum"""
+    return (
+        select(pacientes_trigramas.c.palavra)
+        .where(pacientes_trigramas.c.trigrama.in_(list(trigramas)))
+        .group_by(pacientes_trigramas.c.palavra)
+        .having(func.count() >= min_hits)
+    )
+
+
+def _trigram_rows(palavras: Iterable[str]) -> list[dict]:
+    return [{"trigrama": t, "palavra": p} for p in palavras for t in word_trigrams(p)]
+
+
+def add_words(connection: Connection, palavras: list[str]) -> None:
+    """Registra um uso de cada palavra, indexando as que forem novas.
+
+    Um único UPSERT: inserções concorrentes da mesma palavra nova não colidem
+    na chave do vocabulário (o que desfaria o cadastro do paciente).
+    """
+    palavras = list(dict.fromkeys(palavras))
+    if not palavras:
+        return
+    voc = pacientes_vocabulario.c
+    insert_ = upsert_insert(connection)
+    if insert_ is None:
+        _add_words_sem_upsert(connection, palavras)
+        return
+    stmt = (
+        insert_(pacientes_vocabulario)
+        .values([{"palavra": p, "ocorrencias": 1} for p in palavras])
+        .on_conflict_do_update(index_elements=["palavra"], set_={"ocorrencias": voc.ocorrencias + 1})
+        .returning(voc.palavra, voc.ocorrencias)
+    )
+    # palavras órfãs são apagadas (remove_words): 1 uso = palavra nova
+    novas = [palavra for palavra, ocorrencias in connection.execute(stmt) if ocorrencias == 1]
+    if novas:
+        connection.execute(
+            insert_(pacientes_trigramas).on_conflict_do_nothing(),
+            _trigram_rows(novas),
+        )
+
+
+def _add_words_sem_upsert(connection: Connection, palavras: list[str]) -> None:
+    voc = pacientes_vocabulario.c
+    existing = set(connection.execute(select(voc.palavra).where(voc.palavra.in_(palavras))).scalars())
+    if existing:
+        connection.execute(
+            update(pacientes_vocabulario)
+            .where(voc.palavra.in_(existing))
+            .values(ocorrencias=voc.ocorrencias + 1)
+        )
+    novas = [p for p in palavras if p not in existing]
+    if novas:
+        connection.execute(insert(pacientes_vocabulario), [{"palavra": p, "ocorrencias": 1} for p in novas])
+        connection.execute(insert(pacientes_trigramas), _trigram_rows(novas))
+
+
+def remove_words(connection: Connection, palavras: list[str]) -> None:
+    """Desconta um uso de cada palavra e remove as que ficaram sem pacientes"""
+    if not palavras:
+        return
+    voc = pacientes_vocabulario.c
+    connection.execute(
+        update(pacientes_vocabulario)
+        .where(voc.palavra.in_(palavras))
+        .values(ocorrencias=voc.ocorrencias - 1)
+    )
+    orfas = list(connection.execute(
+        select(voc.palavra).where(voc.palavra.in_(palavras), voc.ocorrencias <= 0)
+    ).scalars())
+    if orfas:
+        connection.execute(delete(pacientes_trigramas).where(pacientes_trigramas.c.palavra.in_(orfas)))
+        connection.execute(delete(pacientes_vocabulario).where(voc.palavra.in_(orfas)))
+
+
+def ensure_pacientes_trigramas(connection: Connection) -> bool:
+    """Monta o vocabulário a partir de ``pacientes`` quando ele está vazio.
+
+    Cobre bancos que já tinham pacientes antes do índice existir. Retorna True
+    quando houve reconstrução.
+    """
+    from ..models.paciente import Paciente
+
+    if connection.execute(select(pacientes_vocabulario.c.palavra).limit(1)).first() is not None:
+        return False
+    contagem: Counter[str] = Counter()
+    for nome in connection.execute(select(Paciente.nome_normalizado)).scalars():
+        contagem.update(name_words(nome))
+    if not contagem:
+        return False
+    connection.execute(
+        insert(pacientes_vocabulario),
+        [{"palavra": p, "ocorrencias": n} for p, n in contagem.items()],
+    )
+    connection.execute(insert(pacientes_trigramas), _trigram_rows(contagem))
+    return True
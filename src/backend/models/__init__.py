@@ -8,4 +8,4 @@ from .usuario import (
 from .clinica import Clinica
 from .paciente import Paciente  # noqa: F401
 from .refresh_token import RefreshToken  # noqa: F401
-from .fila import FilaAtendimento, TipoAtendimento, StatusFila  # noqa: F401
+from .fila import FilaAtendimento, FilaAtendimentoHistorico, FilaVersao, FilaMetricaDiaria, FilaMetricaHistograma, TipoAtendimento, StatusFila, PrioridadeFila  # noqa: F401
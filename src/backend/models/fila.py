@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import enum
-from datetime import datetime, timezone
-from sqlalchemy import Integer, Enum, DateTime, ForeignKey, String, func
+from datetime import date, datetime, timezone
+from sqlalchemy import Integer, Float, Date, Enum, DateTime, ForeignKey, String, func, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..db.database import Base
@@ -21,18 +21,109 @@ class StatusFila(enum.Enum):
     cancelado = "cancelado"
 
 
+class PrioridadeFila(enum.IntEnum):
+    """Nível de prioridade (RF05): menor valor é atendido primeiro"""
+    emergencia = 1
+    urgente = 2
+    prioritario = 3  # atendimento prioritário legal (idosos, gestantes etc.)
+    normal = 4
+
+
+# Um paciente só pode estar uma vez em cada fila enquanto não for concluído/cancelado
+UQ_FILA_PACIENTE_ATIVO = "uq_fila_paciente_tipo_ativo"
+FILA_ATIVA = text("status IN ('aguardando', 'em_atendimento')")
+
+
 class FilaAtendimento(Base):
     __tablename__ = "fila_atendimento"
+    __table_args__ = (
+        # ordem de atendimento dentro de cada fila (tipo, status)
+        Index("ix_fila_tipo_status_prioridade_criado", "tipo", "status", "prioridade", "criado_em"),
+        Index(
+            UQ_FILA_PACIENTE_ATIVO, "paciente_id", "tipo",
+            unique=True, sqlite_where=FILA_ATIVA, postgresql_where=FILA_ATIVA,
+        ),
+        # ids nunca reutilizados: o histórico guarda o id original
+        {"sqlite_autoincrement": True},
+    )
+    # traz criado_em (server_default) já no INSERT, usado pela fila em memória
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     paciente_id: Mapped[int] = mapped_column(ForeignKey("pacientes.id", ondelete="CASCADE"), nullable=False, index=True)
     tipo: Mapped[TipoAtendimento] = mapped_column(Enum(TipoAtendimento, name="tipo_atendimento"), nullable=False, index=True)
     status: Mapped[StatusFila] = mapped_column(Enum(StatusFila, name="status_fila"), nullable=False, index=True, default=StatusFila.aguardando)
+    # aluno que assumiu o atendimento (claim_next)
+    aluno_id: Mapped[int | None] = mapped_column(ForeignKey("usuarios.id", ondelete="SET NULL"), nullable=True, index=True)
+    prioridade: Mapped[int] = mapped_column(Integer, nullable=False, default=PrioridadeFila.normal, server_default=str(PrioridadeFila.normal.value))
     observacao: Mapped[str | None] = mapped_column(String(255), nullable=True)
     criado_em: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
     atualizado_em: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    # início do atendimento (espera = iniciado_em - criado_em)
+    iniciado_em: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     paciente: Mapped[Paciente] = relationship()
 
     def touch(self) -> None:
-        self.atualizado_em = datetime.now(timezone.utc)
\ No newline at end of file
+        self.atualizado_em = datetime.now(timezone.utc)
+
+
+class FilaAtendimentoHistorico(Base):
+    """Itens concluídos/cancelados arquivados (``archive_queue``), com o id original.
+
+    Mantém ``fila_atendimento`` pequena: só itens ativos e encerrados recentes.
+    """
+    __tablename__ = "fila_atendimento_historico"
+    __table_args__ = (
+        Index("ix_fila_historico_paciente_criado", "paciente_id", "criado_em", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    paciente_id: Mapped[int] = mapped_column(ForeignKey("pacientes.id", ondelete="CASCADE"), nullable=False)
+    tipo: Mapped[TipoAtendimento] = mapped_column(Enum(TipoAtendimento, name="tipo_atendimento"), nullable=False)
+    status: Mapped[StatusFila] = mapped_column(Enum(StatusFila, name="status_fila"), nullable=False)
+    aluno_id: Mapped[int | None] = mapped_column(ForeignKey("usuarios.id", ondelete="SET NULL"), nullable=True)
+    prioridade: Mapped[int] = mapped_column(Integer, nullable=False)
+    observacao: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    criado_em: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    atualizado_em: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    iniciado_em: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    arquivado_em: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+
+class FilaVersao(Base):
+    """Contador de escritas por tipo de fila: toda gravação em itens ativos o avança
+    na própria transação (espelho em memória, ``fila_engine``)"""
+    __tablename__ = "fila_versoes"
+
+    tipo: Mapped[TipoAtendimento] = mapped_column(Enum(TipoAtendimento, name="tipo_atendimento"), primary_key=True)
+    versao: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class FilaMetricaDiaria(Base):
+    """Contadores por dia e tipo de fila, atualizados junto com cada transição"""
+    __tablename__ = "fila_metricas_diarias"
+
+    dia: Mapped[date] = mapped_column(Date, primary_key=True)
+    tipo: Mapped[TipoAtendimento] = mapped_column(Enum(TipoAtendimento, name="tipo_atendimento"), primary_key=True)
+    chegadas: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    inicios: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    conclusoes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cancelamentos: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # somas em segundos, para as médias
+    espera_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    atendimento_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    atendimentos_medidos: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class FilaMetricaHistograma(Base):
+    """Esboço de quantis (core.sketch) de espera/atendimento: uma linha por balde"""
+    __tablename__ = "fila_metricas_histograma"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    dia: Mapped[date] = mapped_column(Date, primary_key=True)
+    tipo: Mapped[TipoAtendimento] = mapped_column(Enum(TipoAtendimento, name="tipo_atendimento"), primary_key=True)
+    medida: Mapped[str] = mapped_column(String(12), primary_key=True)  # "espera" | "atendimento"
+    balde: Mapped[int] = mapped_column(Integer, primary_key=True)
+    contagem: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,20 +1,64 @@
 from __future__ import annotations
 
 from datetime import datetime, date
-from sqlalchemy import String, Integer, DateTime, Date, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime, Date, func, event, DDL, Index, inspect
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 from ..db.database import Base
+from ..db.fts import PACIENTES_FTS_DDL, PACIENTES_FTS_DROP
+from ..core.texto import normalize_name
+from ..db.trigram import name_words, add_words, remove_words
 
 
 class Paciente(Base):
     __tablename__ = "pacientes"
+    __table_args__ = (
+        # chaves da paginação por cursor (listagem alfabética e fila de triagem)
+        Index("ix_pacientes_nome_normalizado_id", "nome_normalizado", "id"),
+        Index("ix_pacientes_status_created_id", "statusAtendimento", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    nome: Mapped[str] = mapped_column(String(120), nullable=False, index=True)
+    nome: Mapped[str] = mapped_column(String(120), nullable=False)
+    # chave de ordenação/busca sem acentos e caixa, mantida a partir de nome
+    nome_normalizado: Mapped[str] = mapped_column(String(120), nullable=False, default="", server_default="")
     cpf: Mapped[str] = mapped_column(String(14), unique=True, nullable=False, index=True)  # Aumentado para 14 chars (com pontos e hífen)
     dataNascimento: Mapped[date] = mapped_column(Date, nullable=False)
     telefone: Mapped[str | None] = mapped_column(String(20), nullable=True)  # Adicionado campo telefone
     statusAtendimento: Mapped[str] = mapped_column(String(50), nullable=False, default="Aguardando Triagem", server_default="Aguardando Triagem")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    @validates("nome")
+    def _sync_nome_normalizado(self, _key: str, nome: str) -> str:
+        self.nome_normalizado = normalize_name(nome)
+        return nome
+
+
+# Índice FTS5 de nomes (apenas SQLite), criado/removido junto com a tabela
+for _ddl in PACIENTES_FTS_DDL:
+    event.listen(Paciente.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+for _ddl in PACIENTES_FTS_DROP:
+    event.listen(Paciente.__table__, "before_drop", DDL(_ddl).execute_if(dialect="sqlite"))
+
+
+# Vocabulário de trigramas (busca aproximada), mantido a cada flush do ORM
+@event.listens_for(Paciente, "after_insert")
+def _vocabulario_after_insert(_mapper, connection, target: Paciente) -> None:
+    add_words(connection, name_words(target.nome_normalizado))
+
+
+@event.listens_for(Paciente, "after_update")
+def _vocabulario_after_update(_mapper, connection, target: Paciente) -> None:
+    history = inspect(target).attrs.nome_normalizado.history
+    if not history.has_changes():
+        return
+    antigas = name_words(history.deleted[0]) if history.deleted else []
+    novas = name_words(target.nome_normalizado)
+    remove_words(connection, [p for p in antigas if p not in novas])
+    add_words(connection, [p for p in novas if p not in antigas])
+
+
+@event.listens_for(Paciente, "after_delete")
+def _vocabulario_after_delete(_mapper, connection, target: Paciente) -> None:
+    remove_words(connection, name_words(target.nome_normalizado))
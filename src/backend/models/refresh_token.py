@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Optional
 from sqlalchemy import Integer, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .usuario import UsuarioSistema
@@ -13,6 +14,7 @@ class RefreshToken(Base):
         Index("ix_refresh_tokens_usuario", "usuario_id"),
         Index("ix_refresh_tokens_token_hash", "token_hash", unique=True),
         Index("ix_refresh_tokens_expira_em", "expira_em"),
+        Index("ix_refresh_tokens_familia", "familia"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -21,5 +23,9 @@ class RefreshToken(Base):
     expira_em: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     criado_em: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     revogado: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default="false")
+    # tokens emitidos por rotação a partir do mesmo login compartilham a família
+    familia: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # preenchido quando o token é trocado pelo sucessor (revogado por rotação)
+    substituido_em: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     usuario: Mapped[UsuarioSistema] = relationship(backref="refresh_tokens")
\ No newline at end of file
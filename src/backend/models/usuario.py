@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import enum
 from datetime import datetime
-from sqlalchemy import String, Boolean, Enum, Integer, DateTime, func, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Boolean, Enum, Integer, DateTime, func, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from ..db.database import Base
+from ..core.texto import normalize_name
 
 USUARIOS_FK = "usuarios.id"
 
@@ -19,10 +20,16 @@ class PerfilUsuario(enum.Enum):
 
 class UsuarioSistema(Base):
     __tablename__ = "usuarios"
+    __table_args__ = (
+        # listagem administrativa filtrada por perfil/ativo em ordem alfabética
+        Index("ix_usuarios_perfil_ativo_nome", "perfil", "ativo", "nome_normalizado", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     cpf: Mapped[str | None] = mapped_column(String(14), unique=True, index=True, nullable=True)
     nome: Mapped[str] = mapped_column(String(120), nullable=False)
+    # chave de ordenação/busca sem acentos e caixa, mantida a partir de nome
+    nome_normalizado: Mapped[str] = mapped_column(String(120), nullable=False, default="", server_default="", index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     senha_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     telefone: Mapped[str | None] = mapped_column(String(20), nullable=True)  # Campo telefone geral
@@ -31,6 +38,23 @@ class UsuarioSistema(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # Perfil específico (no máximo um preenchido, conforme ``perfil``). lazy="raise":
+    # quem precisa dos dados escolhe a carga (usuario_service.profile_load_options)
+    perfil_professor: Mapped["PerfilProfessor | None"] = relationship(
+        back_populates="usuario", cascade="all, delete-orphan", passive_deletes=True, lazy="raise"
+    )
+    perfil_aluno: Mapped["PerfilAluno | None"] = relationship(
+        back_populates="usuario", cascade="all, delete-orphan", passive_deletes=True, lazy="raise"
+    )
+    perfil_recepcionista: Mapped["PerfilRecepcionista | None"] = relationship(
+        back_populates="usuario", cascade="all, delete-orphan", passive_deletes=True, lazy="raise"
+    )
+
+    @validates("nome")
+    def _sync_nome_normalizado(self, _key: str, nome: str) -> str:
+        self.nome_normalizado = normalize_name(nome)
+        return nome
+
 
 # Perfis 1:1 por papel (campos específicos), com PK = user_id
 
@@ -45,6 +69,9 @@ class PerfilProfessor(Base):
         nullable=True,
     )
 
+    usuario: Mapped[UsuarioSistema] = relationship(back_populates="perfil_professor", lazy="raise")
+    clinica: Mapped["Clinica | None"] = relationship(lazy="raise")
+
 
 class PerfilRecepcionista(Base):
     __tablename__ = "perfil_recepcionista"
@@ -52,6 +79,8 @@ class PerfilRecepcionista(Base):
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey(USUARIOS_FK, ondelete="CASCADE"), primary_key=True)
     telefone: Mapped[str | None] = mapped_column(String(30), nullable=True)
 
+    usuario: Mapped[UsuarioSistema] = relationship(back_populates="perfil_recepcionista", lazy="raise")
+
 
 class PerfilAluno(Base):
     __tablename__ = "perfil_aluno"
@@ -64,3 +93,6 @@ class PerfilAluno(Base):
         ForeignKey("clinicas.id", ondelete="SET NULL"),
         nullable=True,
     )
+
+    usuario: Mapped[UsuarioSistema] = relationship(back_populates="perfil_aluno", lazy="raise")
+    clinica: Mapped["Clinica | None"] = relationship(lazy="raise")
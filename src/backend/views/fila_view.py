@@ -1,20 +1,22 @@
 from __future__ import annotations
 
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from ..models.fila import TipoAtendimento, StatusFila
+from ..models.fila import TipoAtendimento, StatusFila, PrioridadeFila
 
 
 class FilaCreate(BaseModel):
     paciente_id: int
     tipo: TipoAtendimento
+    prioridade: PrioridadeFila = PrioridadeFila.normal
     observacao: Optional[str] = None
 
 
 class FilaUpdate(BaseModel):
     status: Optional[StatusFila] = None
+    prioridade: Optional[PrioridadeFila] = None
     observacao: Optional[str] = None
 
 
@@ -29,9 +31,12 @@ class FilaResponse(BaseModel):
     paciente: Optional[PacienteResumido] = None
     tipo: TipoAtendimento
     status: StatusFila
+    prioridade: PrioridadeFila = PrioridadeFila.normal
+    aluno_id: Optional[int] = None
     observacao: Optional[str] = None
     criado_em: datetime
     atualizado_em: datetime
+    iniciado_em: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -43,4 +48,21 @@ class FilaListResponse(BaseModel):
 
 
 class FilaStatusUpdate(BaseModel):
-    observacao: Optional[str] = None
\ No newline at end of file
+    observacao: Optional[str] = None
+
+
+class FilaMetricasResponse(BaseModel):
+    """Métricas do dia de uma fila (tempos em segundos; None sem amostras)"""
+    tipo: TipoAtendimento
+    dia: date
+    aguardando: int = 0
+    chegadas: int = 0
+    inicios: int = 0
+    conclusoes: int = 0
+    cancelamentos: int = 0
+    espera_media: Optional[float] = None
+    espera_p50: Optional[float] = None
+    espera_p90: Optional[float] = None
+    atendimento_medio: Optional[float] = None
+    atendimento_p50: Optional[float] = None
+    atendimento_p90: Optional[float] = None
@@ -0,0 +1,123 @@
+"""
+Ponte entre o Tkinter e o backend assíncrono.
+
+Mantém um único event loop rodando em uma thread dedicada durante toda a vida
+da aplicação, de forma que as conexões abertas pelo engine (aiosqlite) sejam
+reaproveitadas entre ações da interface em vez de recriadas a cada clique.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import tkinter as tk
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+# Intervalo (ms) usado para verificar, na thread do Tk, se um future terminou
+POLL_INTERVAL_MS = 15
+
+
+class AsyncBridge:
+    """Event loop de longa duração com API de submissão baseada em futures"""
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Inicia a thread do event loop (idempotente)"""
+        with self._lock:
+            if self.running:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=_run, name="clinisys-async", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """Agenda a corrotina no loop de fundo e retorna um Future thread-safe"""
+        if not self.running:
+            self.start()
+        assert self._loop is not None
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)  # type: ignore[arg-type]
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Executa a corrotina no loop de fundo e aguarda o resultado (bloqueante)"""
+        return self.submit(coro).result(timeout)
+
+    def call(
+        self,
+        widget: Any,
+        coro: Awaitable[Any],
+        on_success: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> Future:
+        """Executa a corrotina sem bloquear a interface.
+
+        O resultado é entregue na thread do Tk via ``widget.after()``: os
+        callbacks nunca rodam na thread do event loop.
+        """
+        future = self.submit(coro)
+
+        def _poll() -> None:
+            if not future.done():
+                try:
+                    widget.after(POLL_INTERVAL_MS, _poll)
+                except tk.TclError:
+                    # Janela destruída antes do término: descarta o resultado
+                    pass
+                return
+            if future.cancelled():
+                return
+            exc = future.exception()
+            if exc is not None:
+                if on_error:
+                    on_error(exc)
+                return
+            if on_success:
+                on_success(future.result())
+
+        widget.after(POLL_INTERVAL_MS, _poll)
+        return future
+
+    def shutdown(self, dispose_engine: bool = True, timeout: float = 5.0) -> None:
+        """Encerra o loop, liberando antes as conexões do engine"""
+        with self._lock:
+            if not self.running or self._loop is None:
+                return
+            loop = self._loop
+            if dispose_engine:
+                from src.backend.db.database import engine
+                try:
+                    asyncio.run_coroutine_threadsafe(engine.dispose(), loop).result(timeout)
+                except Exception as e:
+                    print(f"Erro ao liberar conexões: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            if self._thread is not None:
+                self._thread.join(timeout)
+            loop.close()
+            self._loop = None
+            self._thread = None
+
+
+_bridge = AsyncBridge()
+
+
+def get_bridge() -> AsyncBridge:
+    """Retorna a ponte compartilhada pela aplicação, iniciando-a se necessário"""
+    _bridge.start()
+    return _bridge
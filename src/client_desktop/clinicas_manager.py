@@ -6,13 +6,13 @@ Permite ao administrador criar, editar e remover clínicas
 
 from __future__ import annotations
 
-import asyncio
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional, List, Dict, Any
 
 from src.backend.db.database import AsyncSessionLocal
 from src.backend.models.clinica import Clinica
+from src.client_desktop.async_bridge import get_bridge
 from sqlalchemy import select, update, delete
 from sqlalchemy.exc import IntegrityError
 
@@ -43,7 +43,7 @@ class ClinicasApp(tk.Toplevel):
         self._center_window()
         
         # Carregar dados iniciais
-        self.run_async(self._load_clinicas())
+        self._refresh_list()
     
     def _center_window(self):
         """Centraliza a janela na tela"""
@@ -157,40 +157,29 @@ class ClinicasApp(tk.Toplevel):
         self.btn_delete.pack(side="left", padx=(0, 5))
     
     def run_async(self, coro):
-        """Executa corrotina de forma síncrona"""
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # Se já há um loop rodando, criar uma nova task
-                task = loop.create_task(coro)
-                return task
-            else:
-                return loop.run_until_complete(coro)
-        except RuntimeError:
-            # Se não há loop, criar um novo
-            return asyncio.run(coro)
+        """Executa corrotina no event loop compartilhado e aguarda o resultado"""
+        return get_bridge().run(coro)
     
-    async def _load_clinicas(self):
+    async def _load_clinicas(self) -> List[Dict[str, Any]]:
         """Carrega lista de clínicas do banco"""
-        try:
-            async with AsyncSessionLocal() as session:
-                stmt = select(Clinica).order_by(Clinica.nome)
-                result = await session.execute(stmt)
-                clinicas = result.scalars().all()
-                
-                self.clinicas_data = [
-                    {
-                        "id": c.id,
-                        "codigo": c.codigo,
-                        "nome": c.nome
-                    }
-                    for c in clinicas
-                ]
-                
-                self._update_tree()
-                
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar clínicas: {str(e)}")
+        async with AsyncSessionLocal() as session:
+            stmt = select(Clinica).order_by(Clinica.nome)
+            result = await session.execute(stmt)
+            clinicas = result.scalars().all()
+            
+            return [
+                {
+                    "id": c.id,
+                    "codigo": c.codigo,
+                    "nome": c.nome
+                }
+                for c in clinicas
+            ]
+    
+    def _on_clinicas_loaded(self, clinicas: List[Dict[str, Any]]):
+        """Recebe a lista de clínicas na thread do Tk"""
+        self.clinicas_data = clinicas
+        self._update_tree()
     
     def _update_tree(self):
         """Atualiza a árvore com dados das clínicas"""
@@ -289,12 +278,14 @@ class ClinicasApp(tk.Toplevel):
             if self.selected_clinica_id:
                 # Atualizar clínica existente
                 self.run_async(self._update_clinica(self.selected_clinica_id, codigo, nome))
+                messagebox.showinfo("Sucesso", "Clínica atualizada com sucesso!")
             else:
                 # Nova clínica
                 self.run_async(self._create_clinica(codigo, nome))
+                messagebox.showinfo("Sucesso", "Clínica criada com sucesso!")
             
             self._cancel_edit()
-            self.run_async(self._load_clinicas())
+            self._refresh_list()
             
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar clínica: {str(e)}")
@@ -306,7 +297,6 @@ class ClinicasApp(tk.Toplevel):
                 clinica = Clinica(codigo=codigo, nome=nome)
                 session.add(clinica)
                 await session.commit()
-                messagebox.showinfo("Sucesso", "Clínica criada com sucesso!")
             except IntegrityError:
                 await session.rollback()
                 raise ValueError("Código da clínica já existe")
@@ -325,8 +315,6 @@ class ClinicasApp(tk.Toplevel):
                 
                 if result.rowcount == 0:
                     raise ValueError("Clínica não encontrada")
-                
-                messagebox.showinfo("Sucesso", "Clínica atualizada com sucesso!")
             except IntegrityError:
                 await session.rollback()
                 raise ValueError("Código da clínica já existe")
@@ -344,8 +332,9 @@ class ClinicasApp(tk.Toplevel):
                               "usuários vinculados a esta clínica."):
             try:
                 self.run_async(self._remove_clinica(self.selected_clinica_id))
+                messagebox.showinfo("Sucesso", "Clínica excluída com sucesso!")
                 self._clear_details()
-                self.run_async(self._load_clinicas())
+                self._refresh_list()
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao excluir clínica: {str(e)}")
     
@@ -359,8 +348,6 @@ class ClinicasApp(tk.Toplevel):
                 
                 if result.rowcount == 0:
                     raise ValueError("Clínica não encontrada")
-                
-                messagebox.showinfo("Sucesso", "Clínica excluída com sucesso!")
             except IntegrityError:
                 await session.rollback()
                 raise ValueError("Não é possível excluir: existem usuários vinculados a esta clínica")
@@ -373,8 +360,13 @@ class ClinicasApp(tk.Toplevel):
         self.entry_codigo.focus()
     
     def _refresh_list(self):
-        """Atualiza lista de clínicas"""
-        self.run_async(self._load_clinicas())
+        """Atualiza lista de clínicas sem bloquear a janela"""
+        get_bridge().call(
+            self,
+            self._load_clinicas(),
+            on_success=self._on_clinicas_loaded,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao carregar clínicas: {str(e)}"),
+        )
 
 
 def show_clinicas_manager(master: tk.Tk):
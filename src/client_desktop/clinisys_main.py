@@ -5,7 +5,6 @@ Sistema completo para gerenciamento de clínica escola
 
 from __future__ import annotations
 
-import asyncio
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
@@ -19,6 +18,9 @@ from src.client_desktop.uc_admin_users_tk import UsersApp, init_db_and_seed
 from src.client_desktop.pacientes_tk import PacientesTab
 from src.client_desktop.login_tk import show_login_dialog
 from src.client_desktop.clinicas_manager import show_clinicas_manager
+from src.client_desktop.async_bridge import get_bridge
+from src.backend.db.database import get_sqlite_pragmas, AsyncSessionLocal
+from src.backend.controllers.refresh_token_service import run_token_sweeper
 
 
 class CliniSysApp(tk.Tk):
@@ -371,12 +373,24 @@ Funcionalidades:
 
 
 
+def _sweeper_encerrado(future) -> None:
+    """A limpeza só termina ao ser cancelada: qualquer outro fim é erro"""
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Limpeza de refresh tokens encerrada por erro: {future.exception()!r}")
+
+
 def main():
     """Função principal"""
+    # Event loop único da aplicação (reaproveita conexões entre as telas)
+    bridge = get_bridge()
+    sweeper = None
     try:
         # Inicializar banco de dados primeiro
         print("Inicializando banco de dados...")
-        asyncio.run(init_database())
+        bridge.run(init_database())
+        # Limpeza periódica de refresh tokens no mesmo loop
+        sweeper = bridge.submit(run_token_sweeper(AsyncSessionLocal))
+        sweeper.add_done_callback(_sweeper_encerrado)
         
         # Mostrar tela de login
         print("Iniciando processo de login...")
@@ -396,6 +410,10 @@ def main():
         print(f"Erro fatal: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if sweeper is not None:
+            sweeper.cancel()
+        bridge.shutdown()
 
 
 async def init_database():
@@ -403,6 +421,9 @@ async def init_database():
     try:
         await init_db_and_seed()
         print("Banco de dados inicializado com sucesso")
+        pragmas = await get_sqlite_pragmas()
+        if pragmas:
+            print("PRAGMAs SQLite efetivos: " + ", ".join(f"{k}={v}" for k, v in pragmas.items()))
     except Exception as e:
         print(f"Erro na inicialização do banco: {str(e)}")
         raise
@@ -4,14 +4,15 @@ Tela de Login para o Sistema CliniSys-Escola
 
 from __future__ import annotations
 
-import asyncio
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional, Dict, Any
 
 from src.backend.db.database import AsyncSessionLocal
 from src.backend.controllers.usuario_service import authenticate_user
+from src.backend.controllers.login_throttle import LoginBloqueado
 from src.backend.models.usuario import UsuarioSistema, PerfilUsuario
+from src.client_desktop.async_bridge import get_bridge
 
 
 class LoginDialog(tk.Toplevel):
@@ -156,37 +157,43 @@ class LoginDialog(tk.Toplevel):
             self.entry_senha.focus()
             return
         
-        # Tentar autenticar
-        try:
-            self.lbl_erro.config(text="Autenticando...")
-            self.update()
+        # Tentar autenticar sem bloquear a interface
+        self.lbl_erro.config(text="Autenticando...")
+        get_bridge().call(
+            self,
+            self._authenticate_user(email, senha),
+            on_success=self._on_authenticated,
+            on_error=self._on_auth_error,
+        )
+    
+    def _on_authenticated(self, user: Optional[UsuarioSistema]):
+        """Trata o resultado da autenticação (thread do Tk)"""
+        if user:
+            self.user_data = {
+                "id": user.id,
+                "nome": user.nome,
+                "email": user.email,
+                "perfil": user.perfil.value,
+                "ativo": user.ativo
+            }
             
-            user = asyncio.run(self._authenticate_user(email, senha))
+            if self._on_login_success:
+                self._on_login_success(self.user_data)
             
-            if user:
-                self.user_data = {
-                    "id": user.id,
-                    "nome": user.nome,
-                    "email": user.email,
-                    "perfil": user.perfil.value,
-                    "ativo": user.ativo
-                }
-                
-                if self._on_login_success:
-                    self._on_login_success(self.user_data)
-                
-                self.result = self.user_data
-                self.destroy()
-            else:
-                self.lbl_erro.config(text="Email ou senha incorretos")
-                self.entry_senha.delete(0, tk.END)
-                self.entry_email.focus()
-                
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            self.lbl_erro.config(text=f"Erro ao autenticar: {str(e)}")
+            self.result = self.user_data
+            self.destroy()
+        else:
+            self.lbl_erro.config(text="Email ou senha incorretos")
             self.entry_senha.delete(0, tk.END)
+            self.entry_email.focus()
+    
+    def _on_auth_error(self, e: BaseException):
+        """Exibe erro de autenticação (thread do Tk)"""
+        if isinstance(e, LoginBloqueado):
+            self.lbl_erro.config(text=str(e))
+        else:
+            self.lbl_erro.config(text=f"Erro ao autenticar: {str(e)}")
+        self.entry_senha.delete(0, tk.END)
     
     async def _authenticate_user(self, email: str, senha: str) -> Optional[UsuarioSistema]:
         """Autentica o usuário no banco de dados"""
@@ -198,6 +205,8 @@ class LoginDialog(tk.Toplevel):
                     raise ValueError("Usuário inativo. Contate o administrador.")
                 
                 return user
+        except LoginBloqueado:
+            raise
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -356,7 +365,7 @@ def _create_login_content(window, on_success_callback, on_cancel_callback):
     error_label.pack(pady=(0, 10))
     
     def authenticate_login():
-        """Autentica o login do usuário (versão síncrona)"""
+        """Autentica o login do usuário sem bloquear a janela"""
         email = var_email.get().strip()
         senha = var_senha.get().strip()
         
@@ -365,19 +374,16 @@ def _create_login_content(window, on_success_callback, on_cancel_callback):
             return
         
         error_label.config(text="Autenticando...")
-        window.update()
         
-        try:
-            # Usar autenticação real do backend
-            async def _authenticate():
-                async with AsyncSessionLocal() as session:
-                    user = await authenticate_user(session, email, senha)
-                    if user and not user.ativo:
-                        raise ValueError("Usuário inativo. Contate o administrador.")
-                    return user
-            
-            user = asyncio.run(_authenticate())
-            
+        # Usar autenticação real do backend
+        async def _authenticate():
+            async with AsyncSessionLocal() as session:
+                user = await authenticate_user(session, email, senha)
+                if user and not user.ativo:
+                    raise ValueError("Usuário inativo. Contate o administrador.")
+                return user
+        
+        def _on_result(user):
             if user:
                 user_data = {
                     'id': user.id,
@@ -389,11 +395,14 @@ def _create_login_content(window, on_success_callback, on_cancel_callback):
                 on_success_callback(user_data)
             else:
                 error_label.config(text="Email ou senha inválidos")
-                
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            error_label.config(text=f"Erro na autenticação: {str(e)}")
+        
+        def _on_error(e):
+            if isinstance(e, LoginBloqueado):
+                error_label.config(text=str(e))
+            else:
+                error_label.config(text=f"Erro na autenticação: {str(e)}")
+        
+        get_bridge().call(window, _authenticate(), on_success=_on_result, on_error=_on_error)
     
     def on_login():
         """Executa o login"""
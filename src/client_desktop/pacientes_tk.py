@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional, List
@@ -11,11 +10,12 @@ from src.backend.models.paciente import Paciente
 from src.backend.models.fila import FilaAtendimento, TipoAtendimento, StatusFila
 from src.backend.controllers.paciente_service import (
     create_patient,
-    search_patients,
+    search_patients_cursor,
+    fuzzy_search_patients,
     get_patient_by_id,
     update_patient,
     delete_patient,
-    list_all_patients
+    list_all_patients_cursor
 )
 from src.backend.controllers.fila_service import (
     add_to_queue,
@@ -23,9 +23,13 @@ from src.backend.controllers.fila_service import (
     get_queue_by_type
 )
 from src.backend.views.paciente_view import PacienteCreate, PacienteUpdate
+from src.client_desktop.async_bridge import get_bridge
 from sqlalchemy.exc import IntegrityError
 import re
 
+# Quantidade de pacientes carregada por página na listagem
+PAGE_SIZE = 200
+
 
 class PacienteDialog(tk.Toplevel):
     """Dialog para criar/editar pacientes"""
@@ -233,7 +237,7 @@ class PacienteDialog(tk.Toplevel):
                 status = getattr(self, 'var_status', None)
                 status_value = status.get() if status else None
                 
-                result = asyncio.run(self._update_patient(
+                result = get_bridge().run(self._update_patient(
                     self.paciente['id'],
                     nome,
                     telefone,
@@ -243,7 +247,7 @@ class PacienteDialog(tk.Toplevel):
                 # Criação
                 if data_nascimento is None:
                     raise ValueError("Data de nascimento é obrigatória")
-                result = asyncio.run(self._create_patient(nome, cpf, data_nascimento, telefone))
+                result = get_bridge().run(self._create_patient(nome, cpf, data_nascimento, telefone))
             
             self.result = result
             
@@ -306,6 +310,9 @@ class PacientesTab(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
         self.pacientes: List[dict] = []
+        self._next_cursor: Optional[str] = None
+        self._termo_atual: Optional[str] = None
+        self._consulta = 0  # descarta respostas de consultas já substituídas
         
         self._create_widgets()
         self._load_pacientes()
@@ -363,34 +370,81 @@ class PacientesTab(ttk.Frame):
         self.tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
+        # Paginação
+        frame_bottom = ttk.Frame(self)
+        frame_bottom.pack(fill="x", padx=8, pady=4)
+        self.btn_mais = ttk.Button(frame_bottom, text="Carregar mais", command=self._carregar_mais, state="disabled")
+        self.btn_mais.pack(side="right", padx=2)
+        self.lbl_total = ttk.Label(frame_bottom, text="")
+        self.lbl_total.pack(side="left", padx=2)
+        
         # Bind duplo clique para editar
         self.tree.bind("<Double-1>", lambda e: self._editar_paciente())
     
     def _load_pacientes(self):
-        """Carrega lista de pacientes"""
-        try:
-            self.pacientes = asyncio.run(self._fetch_pacientes())
+        """Carrega a primeira página de pacientes sem bloquear a interface"""
+        self._termo_atual = None
+        self._consulta += 1
+        consulta = self._consulta
+        get_bridge().call(
+            self,
+            self._fetch_pacientes(),
+            on_success=lambda page: self._on_pacientes_loaded(page, consulta=consulta),
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao carregar pacientes: {str(e)}"),
+        )
+    
+    def _on_pacientes_loaded(self, page: tuple, append: bool = False, consulta: Optional[int] = None):
+        """Recebe a página consultada na thread do Tk"""
+        if consulta is not None and consulta != self._consulta:
+            return  # resposta de uma busca/listagem já substituída
+        pacientes, self._next_cursor = page
+        if append:
+            self.pacientes.extend(pacientes)
+            self._insert_rows(pacientes)
+        else:
+            self.pacientes = pacientes
             self._update_tree()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar pacientes: {str(e)}")
+        self.btn_mais.configure(state="normal" if self._next_cursor else "disabled")
+        sufixo = "+" if self._next_cursor else ""
+        self.lbl_total.configure(text=f"{len(self.pacientes)}{sufixo} paciente(s)")
     
-    async def _fetch_pacientes(self) -> List[dict]:
-        """Busca pacientes no banco"""
+    def _carregar_mais(self):
+        """Busca a próxima página a partir do cursor atual"""
+        if not self._next_cursor:
+            return
+        cursor = self._next_cursor
+        consulta = self._consulta
+        self.btn_mais.configure(state="disabled")
+        if self._termo_atual:
+            coro = self._fetch_search_pacientes(self._termo_atual, cursor)
+        else:
+            coro = self._fetch_pacientes(cursor)
+        get_bridge().call(
+            self,
+            coro,
+            on_success=lambda page: self._on_pacientes_loaded(page, append=True, consulta=consulta),
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao carregar pacientes: {str(e)}"),
+        )
+    
+    @staticmethod
+    def _to_dicts(pacientes: List[Paciente]) -> List[dict]:
+        return [
+            {
+                "id": p.id,
+                "nome": p.nome,
+                "cpf": p.cpf,
+                "telefone": p.telefone,
+                "dataNascimento": p.dataNascimento,
+                "statusAtendimento": p.statusAtendimento
+            }
+            for p in pacientes
+        ]
+    
+    async def _fetch_pacientes(self, cursor: Optional[str] = None) -> tuple:
+        """Busca uma página de pacientes no banco"""
         async with AsyncSessionLocal() as session:
-            pacientes = await list_all_patients(session, limit=1000)
-            
-            result = []
-            for p in pacientes:
-                result.append({
-                    "id": p.id,
-                    "nome": p.nome,
-                    "cpf": p.cpf,
-                    "telefone": p.telefone,
-                    "dataNascimento": p.dataNascimento,
-                    "statusAtendimento": p.statusAtendimento
-                })
-            
-            return result
+            pacientes, next_cursor = await list_all_patients_cursor(session, cursor=cursor, limit=PAGE_SIZE)
+            return self._to_dicts(pacientes), next_cursor
     
     def _buscar_pacientes(self):
         """Busca pacientes por termo"""
@@ -399,29 +453,24 @@ class PacientesTab(ttk.Frame):
             self._load_pacientes()
             return
         
-        try:
-            self.pacientes = asyncio.run(self._fetch_search_pacientes(termo))
-            self._update_tree()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro na busca: {str(e)}")
+        self._termo_atual = termo
+        self._consulta += 1
+        consulta = self._consulta
+        get_bridge().call(
+            self,
+            self._fetch_search_pacientes(termo),
+            on_success=lambda page: self._on_pacientes_loaded(page, consulta=consulta),
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro na busca: {str(e)}"),
+        )
     
-    async def _fetch_search_pacientes(self, termo: str) -> List[dict]:
-        """Busca pacientes por termo"""
+    async def _fetch_search_pacientes(self, termo: str, cursor: Optional[str] = None) -> tuple:
+        """Busca uma página de pacientes por termo"""
         async with AsyncSessionLocal() as session:
-            pacientes = await search_patients(session, termo, limit=1000)
-            
-            result = []
-            for p in pacientes:
-                result.append({
-                    "id": p.id,
-                    "nome": p.nome,
-                    "cpf": p.cpf,
-                    "telefone": p.telefone,
-                    "dataNascimento": p.dataNascimento,
-                    "statusAtendimento": p.statusAtendimento
-                })
-            
-            return result
+            pacientes, next_cursor = await search_patients_cursor(session, termo, cursor=cursor, limit=PAGE_SIZE)
+            if not pacientes and cursor is None and not termo.replace(".", "").replace("-", "").isdigit():
+                # nada exato: sugere nomes parecidos (erros de digitação)
+                pacientes = await fuzzy_search_patients(session, termo)
+            return self._to_dicts(pacientes), next_cursor
     
     def _limpar_busca(self):
         """Limpa busca e recarrega todos"""
@@ -434,8 +483,11 @@ class PacientesTab(ttk.Frame):
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        # Adiciona pacientes
-        for paciente in self.pacientes:
+        self._insert_rows(self.pacientes)
+    
+    def _insert_rows(self, pacientes: List[dict]):
+        """Acrescenta pacientes ao final da TreeView"""
+        for paciente in pacientes:
             data_nasc = paciente["dataNascimento"]
             if hasattr(data_nasc, 'strftime'):
                 data_str = data_nasc.strftime("%d/%m/%Y")
@@ -490,7 +542,7 @@ class PacientesTab(ttk.Frame):
             return
         
         try:
-            asyncio.run(self._delete_paciente(paciente["id"]))
+            get_bridge().run(self._delete_paciente(paciente["id"]))
             messagebox.showinfo("Sucesso", "Paciente excluído com sucesso")
             self._load_pacientes()
         except Exception as e:
@@ -512,14 +564,14 @@ class PacientesTab(ttk.Frame):
 # Função para testar a interface isoladamente
 def main_pacientes():
     """Função principal para testar interface de pacientes"""
-    import asyncio
     from src.backend.db.database import engine, Base
     
     async def init_db():
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
     
-    asyncio.run(init_db())
+    bridge = get_bridge()
+    bridge.run(init_db())
     
     root = tk.Tk()
     root.title("Gerenciar Pacientes - CliniSys")
@@ -528,7 +580,10 @@ def main_pacientes():
     tab = PacientesTab(root)
     tab.pack(fill="both", expand=True)
     
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        bridge.shutdown()
 
 
 if __name__ == "__main__":
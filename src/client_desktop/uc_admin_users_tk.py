@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import asyncio
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional
 
 from src.backend.db.database import AsyncSessionLocal, engine, Base
+from src.backend.db.fts import ensure_pacientes_fts
+from src.backend.db.schema import ensure_schema
+from src.backend.db.trigram import ensure_pacientes_trigramas
 from src.backend.models.usuario import (
     UsuarioSistema,
     PerfilUsuario,
@@ -14,15 +16,20 @@ from src.backend.models.usuario import (
     PerfilAluno,
 )
 from src.backend.models.clinica import Clinica
+from src.backend.controllers.fila_service import archive_queue
 from src.backend.controllers.usuario_service import (
     create_user as svc_create_user,
     get_user_by_email as svc_get_user_by_email,
-    get_profile_data as svc_get_profile_data,
+    get_user_with_profile as svc_get_user_with_profile,
+    profile_data as svc_profile_data,
+    list_users as svc_list_users,
+    search_users as svc_search_users,
     validate_password_policy,
 )
-from src.backend.core.security import hash_password
+from src.backend.core.security import hash_password_async
 from src.client_desktop.user_profile import UserProfileDialog
-from sqlalchemy import select, update, delete
+from src.client_desktop.async_bridge import get_bridge
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
 
 NOT_FOUND_MSG = "Usuário não encontrado"
@@ -35,6 +42,11 @@ ERR_MISSING_PREFIX = "Preencha: "
 ERR_CLINICA_REQUIRED = "clinica_id é obrigatório para aluno/professor"
 ERR_CLINICA_NOT_FOUND = "Clínica informada não existe"
 
+PAGE_SIZE = 200
+# busca enquanto digita: espera a pausa na digitação e traz poucos por vez
+SEARCH_DELAY_MS = 300
+SEARCH_PAGE_SIZE = 50
+
 
 def _normalize_cpf(cpf: str | None) -> str | None:
     """Remove pontos e hífens do CPF, mantendo apenas números"""
@@ -102,6 +114,11 @@ async def _validate_and_prepare_cpf(session, current_cpf: str, new_cpf: Optional
 async def init_db_and_seed() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # bancos criados antes das colunas/índices novos (create_all não altera tabelas)
+        await conn.run_sync(ensure_schema)
+        # bancos criados antes dos índices FTS e de trigramas de pacientes
+        await conn.run_sync(ensure_pacientes_fts)
+        await conn.run_sync(ensure_pacientes_trigramas)
 
     # seed admin mínimo (não sobrescreve existente)
     from src.backend.core.config import settings
@@ -126,45 +143,40 @@ async def init_db_and_seed() -> None:
             session.add(default)
             await session.commit()
 
+        # move atendimentos encerrados antigos para o histórico
+        await archive_queue(session)
+
 
-async def list_users() -> list[dict]:
+async def list_users(
+    perfil: Optional[str] = None,
+    ativo: Optional[bool] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+) -> tuple[list[dict], Optional[str]]:
+    """Uma página de usuários filtrada no banco: (itens, próximo cursor).
+
+    Com ``search``, busca por e-mail, CPF ou início do nome.
+    """
+    per = PerfilUsuario(perfil) if perfil else None
     async with AsyncSessionLocal() as session:
-        res = await session.execute(select(UsuarioSistema).order_by(UsuarioSistema.id))
-        items = []
-        for u in res.scalars().all():
-            d = {
-                "id": u.id,
-                "nome": u.nome,
-                "email": u.email,
-                "perfil": u.perfil.value,
-                "cpf": u.cpf,
-                "ativo": u.ativo,
-                "clinica_id": None,  # Será preenchido abaixo se aplicável
-            }
-            
-            # Buscar clinica_id dos perfis específicos
-            pd = await svc_get_profile_data(session, u)
-            if pd and hasattr(pd, 'clinica_id'):
-                d["clinica_id"] = pd.clinica_id
-            
-            if pd:
-                d["perfil_dados"] = pd
-            items.append(d)
-        return items
+        if search:
+            return await svc_search_users(session, search, perfil=per, ativo=ativo, cursor=cursor, limit=limit)
+        return await svc_list_users(session, perfil=per, ativo=ativo, cursor=cursor, limit=limit)
 
 
 async def get_user_detail(user_id: int) -> dict:
     """Busca detalhes completos de um usuário específico"""
     async with AsyncSessionLocal() as session:
-        user = await session.get(UsuarioSistema, user_id)
+        user = await svc_get_user_with_profile(session, user_id)
         if not user:
             raise ValueError("Usuário não encontrado")
         
         clinica_id = None
         telefone_perfil = None
         
-        # Buscar dados dos perfis específicos
-        pd = await svc_get_profile_data(session, user)
+        # Dados dos perfis específicos (já carregados com o usuário)
+        pd = svc_profile_data(user)
         if pd:
             # Extrair clinica_id se disponível
             if "clinica" in pd and isinstance(pd["clinica"], dict):
@@ -228,7 +240,7 @@ async def create_user(nome: str, email: str, senha: str, perfil: str, cpf: str,
             u = UsuarioSistema(
                 nome=nome,
                 email=email,
-                senha_hash=hash_password(senha),
+                senha_hash=await hash_password_async(senha),
                 perfil=per,
                 cpf=cpf_normalizado,
                 telefone=telefone,  # Incluir telefone geral
@@ -276,7 +288,7 @@ async def update_user(
     clinica_id: Optional[int] = None,
 ) -> None:
     async with AsyncSessionLocal() as session:
-        u = await session.get(UsuarioSistema, user_id)
+        u = await svc_get_user_with_profile(session, user_id)
         if not u:
             raise ValueError(NOT_FOUND_MSG)
         if nome is not None:
@@ -297,41 +309,31 @@ async def update_user(
             elif perfil_changed:
                 raise ValueError(ERR_CLINICA_REQUIRED)
 
-        # Se for mudança de perfil, remove perfis antigos
+        # Se for mudança de perfil, remove perfis antigos (delete-orphan)
         if perfil_changed:
-            await session.execute(delete(PerfilProfessor).where(PerfilProfessor.user_id == user_id))
-            await session.execute(delete(PerfilAluno).where(PerfilAluno.user_id == user_id))
-            await session.execute(delete(PerfilRecepcionista).where(PerfilRecepcionista.user_id == user_id))
+            u.perfil_professor = None
+            u.perfil_aluno = None
+            u.perfil_recepcionista = None
             u.perfil = new_perfil
 
         # Cria novo perfil específico se necessário
         if new_perfil == PerfilUsuario.professor:
-            res = await session.execute(select(PerfilProfessor).where(PerfilProfessor.user_id == user_id))
-            prof = res.scalar_one_or_none()
-            if not prof:
+            if u.perfil_professor is None:
                 if clinica_id is None:
                     raise ValueError(ERR_CLINICA_REQUIRED)
-                prof = PerfilProfessor(user_id=user_id, clinica_id=clinica_id)
-                session.add(prof)
-            else:
-                if clinica_id is not None:
-                    prof.clinica_id = clinica_id
+                u.perfil_professor = PerfilProfessor(clinica_id=clinica_id)
+            elif clinica_id is not None:
+                u.perfil_professor.clinica_id = clinica_id
         elif new_perfil == PerfilUsuario.aluno:
-            res = await session.execute(select(PerfilAluno).where(PerfilAluno.user_id == user_id))
-            alu = res.scalar_one_or_none()
-            if not alu:
+            if u.perfil_aluno is None:
                 if clinica_id is None:
                     raise ValueError(ERR_CLINICA_REQUIRED)
-                alu = PerfilAluno(user_id=user_id, clinica_id=clinica_id)
-                session.add(alu)
-            else:
-                if clinica_id is not None:
-                    alu.clinica_id = clinica_id
+                u.perfil_aluno = PerfilAluno(clinica_id=clinica_id)
+            elif clinica_id is not None:
+                u.perfil_aluno.clinica_id = clinica_id
         elif new_perfil == PerfilUsuario.recepcionista:
-            res = await session.execute(select(PerfilRecepcionista).where(PerfilRecepcionista.user_id == user_id))
-            rep = res.scalar_one_or_none()
-            if not rep:
-                session.add(PerfilRecepcionista(user_id=user_id))
+            if u.perfil_recepcionista is None:
+                u.perfil_recepcionista = PerfilRecepcionista()
 
         try:
             await session.commit()
@@ -367,7 +369,7 @@ async def change_password(user_id: int, nova: str) -> None:
         u = await session.get(UsuarioSistema, user_id)
         if not u:
             raise ValueError(NOT_FOUND_MSG)
-        u.senha_hash = hash_password(nova)
+        u.senha_hash = await hash_password_async(nova)
         await session.commit()
 
 
@@ -589,6 +591,9 @@ class UsersApp(tk.Tk):
         
         # Variáveis de estado
         self.users_data = []
+        self._next_cursor: Optional[str] = None
+        self._busca_after: Optional[str] = None
+        self._consulta = 0  # descarta respostas de consultas já substituídas
         self.clinicas_data = []  # Lista de clínicas disponíveis
         self.selected_user = None
         self.edit_mode = False  # Controla se está no modo de edição
@@ -654,6 +659,15 @@ class UsersApp(tk.Tk):
         ttk.Button(filters_frame, text="Aplicar Filtros", 
                   command=self.apply_filters).pack(side=tk.LEFT)
         
+        search_frame = ttk.Frame(self.users_container)
+        search_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+        ttk.Label(search_frame, text="Buscar (nome, e-mail ou CPF):").pack(side=tk.LEFT)
+        self.var_busca = tk.StringVar()
+        entry_busca = ttk.Entry(search_frame, textvariable=self.var_busca, width=40)
+        entry_busca.pack(side=tk.LEFT, padx=(5, 0), fill=tk.X, expand=True)
+        entry_busca.bind("<Return>", lambda _e: self._buscar_agora())
+        self.var_busca.trace_add("write", lambda *_: self._agendar_busca())
+        
         # Lista de usuários
         list_frame = ttk.Frame(self.users_container)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
@@ -666,6 +680,14 @@ class UsersApp(tk.Tk):
         self.listbox.config(yscrollcommand=scrollbar.set)
         self.listbox.bind("<<ListboxSelect>>", self.on_select)
         
+        # Paginação
+        pages_frame = ttk.Frame(self.users_container)
+        pages_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+        self.btn_mais = ttk.Button(pages_frame, text="Carregar mais", command=self._carregar_mais, state="disabled")
+        self.btn_mais.pack(side=tk.RIGHT)
+        self.lbl_total = ttk.Label(pages_frame, text="")
+        self.lbl_total.pack(side=tk.LEFT)
+        
         # Container para detalhes do usuário (inicialmente oculto)
         self.details_container = ttk.LabelFrame(main_frame, text="Detalhes do Usuário")
         self.details_container.pack_forget()  # Inicialmente oculto
@@ -996,18 +1018,16 @@ class UsersApp(tk.Tk):
     async def _get_profile_data_async(self, user_id):
         """Função async para buscar dados do perfil"""
         async with AsyncSessionLocal() as session:
-            user = await session.get(UsuarioSistema, user_id)
-            if user:
-                return await svc_get_profile_data(session, user)
-            return None
+            user = await svc_get_user_with_profile(session, user_id)
+            return svc_profile_data(user) if user else None
 
     def apply_filters(self):
         """Aplica os filtros na lista de usuários"""
         self.cmd_listar()
 
     def run_async(self, coro):
-        """Run async code in a blocking way (simple MVP)."""
-        return asyncio.run(coro)
+        """Executa a corrotina no event loop compartilhado e aguarda o resultado."""
+        return get_bridge().run(coro)
 
     def bootstrap(self):
         try:
@@ -1072,43 +1092,83 @@ class UsersApp(tk.Tk):
         # Se não encontrou, limpar seleção
         self.var_clinica.set("")
 
-    def cmd_listar(self):
-        """Lista os usuários aplicando filtros"""
-        try:
-            users = self.run_async(list_users())
-            
-            # Debug dos filtros - verificar tanto StringVar quanto widget
-            perfil_var = self.var_filtro_perfil.get()
-            perfil_widget = self.cmb_filtro.get()
-            print(f"Filtro StringVar: '{perfil_var}'")
-            print(f"Filtro Widget: '{perfil_widget}'")
-            print(f"Total usuários antes: {len(users)}")
-            
-            # Usar valor do widget se StringVar estiver vazio
-            perfil = perfil_widget if perfil_widget else perfil_var
-            print(f"Filtro usado: '{perfil}'")
-            
-            # Aplicar filtros
-            if perfil and perfil != "todos":
-                users_antes = len(users)
-                users = [u for u in users if u.get("perfil") == perfil]
-                print(f"Após filtro de perfil '{perfil}': {len(users)} usuários")
-                for u in users:
-                    print(f"  - {u['nome']} ({u['perfil']})")
-                
-            if self.var_filtro_ativos.get():
-                users = [u for u in users if u.get("ativo")]
-                print(f"Após filtro de ativos: {len(users)} usuários")
-            
-            # Armazenar dados e atualizar lista
+    def _filtros(self) -> dict:
+        """Filtros da tela no formato de ``list_users``"""
+        perfil = self.cmb_filtro.get() or self.var_filtro_perfil.get()
+        busca = self.var_busca.get().strip()
+        return {
+            "perfil": None if perfil in ("", "todos") else perfil,
+            "ativo": True if self.var_filtro_ativos.get() else None,
+            "search": busca or None,
+            "limit": SEARCH_PAGE_SIZE if busca else PAGE_SIZE,
+        }
+
+    def _agendar_busca(self):
+        """Reinicia a espera a cada tecla; só consulta após a pausa"""
+        if self._busca_after is not None:
+            self.after_cancel(self._busca_after)
+        self._busca_after = self.after(SEARCH_DELAY_MS, self._buscar_agora)
+
+    def _buscar_agora(self):
+        if self._busca_after is not None:
+            self.after_cancel(self._busca_after)
+            self._busca_after = None
+        self.cmd_listar()
+
+    def cmd_listar(self, select_id: Optional[int] = None):
+        """Carrega a primeira página com os filtros atuais (sem bloquear a janela)"""
+        self._consulta += 1
+        consulta = self._consulta
+        get_bridge().call(
+            self,
+            list_users(**self._filtros()),
+            on_success=lambda page: self._on_users_loaded(page, select_id=select_id, consulta=consulta),
+            on_error=lambda e: messagebox.showerror("Erro ao listar", str(e)),
+        )
+
+    def _carregar_mais(self):
+        """Busca a próxima página a partir do cursor atual"""
+        if not self._next_cursor:
+            return
+        cursor = self._next_cursor
+        consulta = self._consulta
+        self.btn_mais.configure(state="disabled")
+        get_bridge().call(
+            self,
+            list_users(**self._filtros(), cursor=cursor),
+            on_success=lambda page: self._on_users_loaded(page, append=True, consulta=consulta),
+            on_error=lambda e: messagebox.showerror("Erro ao listar", str(e)),
+        )
+
+    def _on_users_loaded(self, page: tuple, select_id: Optional[int] = None, append: bool = False,
+                         consulta: Optional[int] = None):
+        """Preenche a lista com a página recebida (thread do Tk)"""
+        if consulta is not None and consulta != self._consulta:
+            return  # o usuário já digitou outra busca
+        users, self._next_cursor = page
+        if append:
+            self.users_data.extend(users)
+        else:
             self.users_data = users
             self.listbox.delete(0, tk.END)
-            for u in users:
-                label = f"[{u['id']}] {u['nome']} ({u['perfil']}) - {'ativo' if u['ativo'] else 'inativo'}"
-                self.listbox.insert(tk.END, label)
-                
-        except Exception as e:
-            messagebox.showerror("Erro ao listar", str(e))
+        for u in users:
+            label = f"[{u['id']}] {u['nome']} ({u['perfil']}) - {'ativo' if u['ativo'] else 'inativo'}"
+            self.listbox.insert(tk.END, label)
+        self.btn_mais.configure(state="normal" if self._next_cursor else "disabled")
+        sufixo = "+" if self._next_cursor else ""
+        self.lbl_total.configure(text=f"{len(self.users_data)}{sufixo} usuário(s)")
+
+        if select_id is not None:
+            self._select_in_listbox(select_id)
+
+    def _select_in_listbox(self, user_id: int):
+        """Seleciona o usuário informado na lista"""
+        for i in range(self.listbox.size()):
+            if self.listbox.get(i).startswith(f"[{user_id}]"):
+                self.listbox.selection_clear(0, tk.END)
+                self.listbox.selection_set(i)
+                self.listbox.see(i)
+                break
 
     def _submit_create(self, data: dict):
         return self.run_async(create_user(
@@ -1125,16 +1185,9 @@ class UsersApp(tk.Tk):
         if not dlg.result:
             return
         created = dlg.result
-        self.cmd_listar()
         try:
             new_id = created.get("id") if isinstance(created, dict) else None
-            if new_id:
-                for i in range(self.listbox.size()):
-                    if self.listbox.get(i).startswith(f"[{new_id}]"):
-                        self.listbox.selection_clear(0, tk.END)
-                        self.listbox.selection_set(i)
-                        self.listbox.see(i)
-                        break
+            self.cmd_listar(select_id=new_id)
             messagebox.showinfo("Sucesso", "Usuário criado")
         except Exception:
             pass
@@ -1256,18 +1309,8 @@ class UsersApp(tk.Tk):
             self.load_user_data(uid)
             print("Dados do usuário recarregados")
             
-            # Atualizar lista para refletir mudanças
-            self.cmd_listar()
-            print("Lista atualizada")
-            
-            # Reselecionar o usuário atualizado na lista
-            for i in range(self.listbox.size()):
-                if self.listbox.get(i).startswith(f"[{uid}]"):
-                    self.listbox.selection_clear(0, tk.END)
-                    self.listbox.selection_set(i)
-                    self.listbox.see(i)
-                    print(f"Usuário {uid} reselecionado na posição {i}")
-                    break
+            # Atualizar lista e reselecionar o usuário atualizado
+            self.cmd_listar(select_id=uid)
             
             messagebox.showinfo("Sucesso", f"Usuário atualizado com sucesso!\nCampos alterados: {', '.join(mudancas)}")
             
@@ -3,7 +3,6 @@ Tela de perfil do usuário - permite que cada usuário edite suas próprias info
 """
 from __future__ import annotations
 
-import asyncio
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional
@@ -11,22 +10,24 @@ from typing import Optional
 from src.backend.db.database import AsyncSessionLocal
 from src.backend.models.usuario import UsuarioSistema
 from src.backend.controllers.usuario_service import (
-    get_profile_data as svc_get_profile_data,
+    get_user_with_profile as svc_get_user_with_profile,
+    profile_data as svc_profile_data,
     validate_password_policy,
 )
-from src.backend.core.security import hash_password, verify_password
+from src.backend.core.security import hash_password_async, verify_password_async
+from src.client_desktop.async_bridge import get_bridge
 from sqlalchemy import select, update
 
 
 async def get_user_profile(user_id: int) -> dict:
     """Busca dados do perfil do usuário logado"""
     async with AsyncSessionLocal() as session:
-        user = await session.get(UsuarioSistema, user_id)
+        user = await svc_get_user_with_profile(session, user_id)
         if not user:
             raise ValueError("Usuário não encontrado")
         
-        # Buscar dados específicos do perfil
-        profile_data = await svc_get_profile_data(session, user)
+        # Dados específicos do perfil (já carregados com o usuário)
+        profile_data = svc_profile_data(user)
         
         return {
             "id": user.id,
@@ -50,10 +51,10 @@ async def update_user_profile(user_id: int, nome: str, email: str, telefone: Opt
         if nova_senha:
             if not senha_atual:
                 raise ValueError("Senha atual é obrigatória para alterar a senha")
-            if not verify_password(senha_atual, user.senha_hash):
+            if not await verify_password_async(senha_atual, user.senha_hash):
                 raise ValueError("Senha atual incorreta")
             validate_password_policy(nova_senha)
-            user.senha_hash = hash_password(nova_senha)
+            user.senha_hash = await hash_password_async(nova_senha)
         
         # Atualizar dados básicos
         user.nome = nome
@@ -193,17 +194,24 @@ class UserProfileDialog(tk.Toplevel):
         self.error_label.pack(pady=(10, 0))
     
     def _load_user_data(self):
-        """Carrega os dados do usuário"""
-        try:
-            self.user_data = asyncio.run(get_user_profile(self.user_id))
-            
-            self.var_nome.set(self.user_data.get("nome", ""))
-            self.var_email.set(self.user_data.get("email", ""))
-            self.var_telefone.set(self.user_data.get("telefone", ""))
-            
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar dados do usuário: {e}")
-            self.destroy()
+        """Carrega os dados do usuário sem bloquear a interface"""
+        get_bridge().call(
+            self,
+            get_user_profile(self.user_id),
+            on_success=self._on_user_data_loaded,
+            on_error=self._on_load_error,
+        )
+    
+    def _on_user_data_loaded(self, user_data: dict):
+        """Preenche o formulário com os dados carregados"""
+        self.user_data = user_data
+        self.var_nome.set(self.user_data.get("nome", ""))
+        self.var_email.set(self.user_data.get("email", ""))
+        self.var_telefone.set(self.user_data.get("telefone", ""))
+    
+    def _on_load_error(self, e: BaseException):
+        messagebox.showerror("Erro", f"Erro ao carregar dados do usuário: {e}")
+        self.destroy()
     
     def _save_profile(self):
         """Salva as alterações do perfil"""
@@ -237,7 +245,7 @@ class UserProfileDialog(tk.Toplevel):
                     raise ValueError("Nova senha e confirmação não coincidem")
             
             # Salvar alterações
-            asyncio.run(update_user_profile(
+            get_bridge().run(update_user_profile(
                 self.user_id, nome, email, telefone, 
                 senha_atual if nova_senha else None, 
                 nova_senha if nova_senha else None
@@ -328,28 +336,32 @@ class UserProfileApp(tk.Tk):
     
     def _load_user_data(self):
         """Carrega e exibe os dados do usuário"""
-        try:
-            self.user_data = asyncio.run(get_user_profile(self.user_id))
-            
-            # Atualizar subtitle
-            self.subtitle_label.config(text=f"Bem-vindo(a), {self.user_data.get('nome', 'Usuário')}!")
-            
-            # Atualizar informações
-            self.info_labels["nome"].config(text=self.user_data.get("nome", "N/A"))
-            self.info_labels["email"].config(text=self.user_data.get("email", "N/A"))
-            self.info_labels["telefone"].config(text=self.user_data.get("telefone", "Não informado"))
-            
-            perfil = self.user_data.get("perfil", "N/A")
-            perfil_map = {
-                "admin": "Administrador",
-                "professor": "Professor",
-                "aluno": "Aluno",
-                "recepcionista": "Recepcionista"
-            }
-            self.info_labels["perfil"].config(text=perfil_map.get(perfil, perfil))
-            
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar dados do usuário: {e}")
+        get_bridge().call(
+            self,
+            get_user_profile(self.user_id),
+            on_success=self._show_user_data,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao carregar dados do usuário: {e}"),
+        )
+    
+    def _show_user_data(self, user_data: dict):
+        """Exibe os dados carregados (thread do Tk)"""
+        self.user_data = user_data
+        # Atualizar subtitle
+        self.subtitle_label.config(text=f"Bem-vindo(a), {self.user_data.get('nome', 'Usuário')}!")
+        
+        # Atualizar informações
+        self.info_labels["nome"].config(text=self.user_data.get("nome", "N/A"))
+        self.info_labels["email"].config(text=self.user_data.get("email", "N/A"))
+        self.info_labels["telefone"].config(text=self.user_data.get("telefone", "Não informado"))
+        
+        perfil = self.user_data.get("perfil", "N/A")
+        perfil_map = {
+            "admin": "Administrador",
+            "professor": "Professor",
+            "aluno": "Aluno",
+            "recepcionista": "Recepcionista"
+        }
+        self.info_labels["perfil"].config(text=perfil_map.get(perfil, perfil))
     
     def _open_edit_dialog(self):
         """Abre o dialog de edição"""
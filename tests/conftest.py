@@ -6,6 +6,7 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from typing import AsyncGenerator
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.pool import NullPool
 
@@ -68,6 +69,27 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:  # type: ignore[ov
         yield sessao
 
 
+@pytest.fixture
+def contar_consultas():
+    """Aguarda a corrotina e devolve (resultado, nº de comandos SQL enviados ao banco)"""
+    sync_engine = engine_test.sync_engine
+
+    async def contando(coro):
+        statements = []
+
+        def contar(*_args):
+            statements.append(1)
+
+        event.listen(sync_engine, "before_cursor_execute", contar)
+        try:
+            result = await coro
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", contar)
+        return result, len(statements)
+
+    return contando
+
+
 @pytest_asyncio.fixture
 async def cliente() -> AsyncGenerator[AsyncClient, None]:
     transport = ASGITransport(app=app)
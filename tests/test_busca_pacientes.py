@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import pytest
+from datetime import date
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.models import Paciente
+from src.backend.controllers import paciente_service
+from src.backend.views.paciente_view import PacienteUpdate
+from src.backend.db.trigram import pacientes_vocabulario, pacientes_trigramas, word_trigrams
+
+
+@pytest.mark.asyncio
+async def test_busca_nome_ignora_acentos_e_caixa(db_session: AsyncSession):
+    db_session.add_all([
+        Paciente(nome="José Álvaro Conceição", cpf="90000000001", dataNascimento=date(1990, 1, 1)),
+        Paciente(nome="Joselito Prado", cpf="90000000002", dataNascimento=date(1991, 1, 1)),
+    ])
+    await db_session.commit()
+
+    encontrados = await paciente_service.search_patients(db_session, "jose conceicao")
+    assert [p.cpf for p in encontrados] == ["90000000001"]
+
+    # prefixo de palavra casa os dois nomes
+    por_prefixo = await paciente_service.search_patients(db_session, "JOSE")
+    assert {"90000000001", "90000000002"} <= {p.cpf for p in por_prefixo}
+
+
+@pytest.mark.asyncio
+async def test_indice_acompanha_update_e_delete(db_session: AsyncSession):
+    paciente = Paciente(nome="Berenice Tavares", cpf="90000000003", dataNascimento=date(1980, 5, 5))
+    db_session.add(paciente)
+    await db_session.commit()
+
+    await paciente_service.update_patient(db_session, paciente.id, PacienteUpdate(nome="Berenice Moura"))
+    assert await paciente_service.search_patients(db_session, "tavares") == []
+    assert [p.id for p in await paciente_service.search_patients(db_session, "moura")] == [paciente.id]
+
+    await paciente_service.delete_patient(db_session, paciente.id)
+    assert await paciente_service.search_patients(db_session, "berenice") == []
+
+
+@pytest.mark.asyncio
+async def test_busca_cpf_por_prefixo_e_exata(db_session: AsyncSession):
+    db_session.add_all([
+        Paciente(nome="Prefixo Um", cpf="81700000001", dataNascimento=date(1990, 1, 1)),
+        Paciente(nome="Prefixo Dois", cpf="81700000002", dataNascimento=date(1990, 1, 1)),
+        Paciente(nome="Meio Cpf", cpf="90817000000", dataNascimento=date(1990, 1, 1)),
+    ])
+    await db_session.commit()
+
+    prefixo = await paciente_service.search_patients(db_session, "817.000")
+    assert [p.cpf for p in prefixo] == ["81700000001", "81700000002"]
+
+    exato = await paciente_service.search_patients(db_session, "817.000.000-02")
+    assert [p.cpf for p in exato] == ["81700000002"]
+
+    # busca em qualquer posição só no modo lento explícito
+    lento = await paciente_service.search_patients(db_session, "817000", cpf_substring=True)
+    assert "90817000000" in {p.cpf for p in lento}
+
+
+@pytest.mark.asyncio
+async def test_paginacao_por_cursor_percorre_sem_repetir(db_session: AsyncSession):
+    db_session.add_all([
+        Paciente(nome=f"Cursor Paciente {i:02d}", cpf=f"7770000{i:04d}", dataNascimento=date(1990, 1, 1))
+        for i in range(7)
+    ])
+    await db_session.commit()
+
+    vistos: list[str] = []
+    cursor = None
+    while True:
+        pagina, cursor = await paciente_service.search_patients_cursor(
+            db_session, "cursor paciente", cursor=cursor, limit=3
+        )
+        vistos.extend(p.nome for p in pagina)
+        if cursor is None:
+            break
+    assert vistos == [f"Cursor Paciente {i:02d}" for i in range(7)]
+
+    with pytest.raises(ValueError):
+        await paciente_service.list_all_patients_cursor(db_session, cursor="invalido", limit=3)
+
+
+@pytest.mark.asyncio
+async def test_listagem_ordena_nomes_sem_acento_e_caixa(db_session: AsyncSession):
+    db_session.add_all([
+        Paciente(nome="Zélia Ordem", cpf="66600000001", dataNascimento=date(1990, 1, 1)),
+        Paciente(nome="Álvaro Ordem", cpf="66600000002", dataNascimento=date(1990, 1, 1)),
+        Paciente(nome="amanda Ordem", cpf="66600000003", dataNascimento=date(1990, 1, 1)),
+    ])
+    await db_session.commit()
+
+    nomes = [p.nome for p in await paciente_service.list_all_patients(db_session, limit=1000) if p.cpf.startswith("666")]
+    assert nomes == ["Álvaro Ordem", "amanda Ordem", "Zélia Ordem"]
+
+    alvaro = await paciente_service.get_patient_by_cpf(db_session, "66600000002")
+    await paciente_service.update_patient(db_session, alvaro.id, PacienteUpdate(nome="Ômar Ordem"))
+    assert alvaro.nome_normalizado == "omar ordem"
+
+
+@pytest.mark.asyncio
+async def test_busca_aproximada_tolera_erros_de_grafia(db_session: AsyncSession):
+    db_session.add_all([
+        Paciente(nome="Luiz Fernando Souza", cpf="55500000001", dataNascimento=date(1990, 1, 1)),
+        Paciente(nome="Luís Sousa", cpf="55500000002", dataNascimento=date(1990, 1, 1)),
+        Paciente(nome="Heitor Bragança", cpf="55500000003", dataNascimento=date(1990, 1, 1)),
+    ])
+    await db_session.commit()
+
+    assert await paciente_service.search_patients(db_session, "luis souza") == []
+
+    encontrados = await paciente_service.fuzzy_search_patients(db_session, "luis souza")
+    cpfs = [p.cpf for p in encontrados]
+    assert set(cpfs[:2]) == {"55500000001", "55500000002"}
+    assert "55500000003" not in cpfs
+
+    # vocabulário acompanha update e delete
+    heitor = await paciente_service.get_patient_by_cpf(db_session, "55500000003")
+    await paciente_service.update_patient(db_session, heitor.id, PacienteUpdate(nome="Heitor Braga"))
+    assert [p.cpf for p in await paciente_service.fuzzy_search_patients(db_session, "eitor brada")] == ["55500000003"]
+    await paciente_service.delete_patient(db_session, heitor.id)
+    assert await paciente_service.fuzzy_search_patients(db_session, "heitor braga") == []
+
+
+@pytest.mark.asyncio
+async def test_vocabulario_conta_usos_da_mesma_palavra(db_session: AsyncSession):
+    palavra = "quizumba"
+    db_session.add_all([
+        Paciente(nome=f"Ana {palavra.title()}", cpf="55600000001", dataNascimento=date(1990, 1, 1)),
+        Paciente(nome=f"Bia {palavra.title()}", cpf="55600000002", dataNascimento=date(1990, 1, 1)),
+    ])
+    await db_session.commit()
+
+    voc = pacientes_vocabulario.c
+    assert await db_session.scalar(select(voc.ocorrencias).where(voc.palavra == palavra)) == 2
+    trigramas = await db_session.scalar(
+        select(func.count()).select_from(pacientes_trigramas).where(pacientes_trigramas.c.palavra == palavra)
+    )
+    assert trigramas == len(word_trigrams(palavra))
@@ -0,0 +1,424 @@
+from __future__ import annotations
+
+import asyncio
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import select, update, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.models import Paciente, FilaAtendimento, TipoAtendimento, StatusFila, PrioridadeFila, UsuarioSistema, PerfilUsuario
+from src.backend.controllers import fila_service
+from src.backend.controllers.fila_engine import fila_engine
+from src.backend.controllers.fila_metricas import EventoFila, record_events, dia_do_evento
+
+
+async def _pacientes(db_session: AsyncSession, prefixo: str, n: int) -> list[Paciente]:
+    pacientes = [
+        Paciente(nome=f"Fila {prefixo} {i}", cpf=f"{prefixo}{i:08d}", dataNascimento=date(1980, 1, 1))
+        for i in range(n)
+    ]
+    db_session.add_all(pacientes)
+    await db_session.commit()
+    return pacientes
+
+
+@pytest.mark.asyncio
+async def test_fila_ordena_por_prioridade_e_chegada(db_session: AsyncSession):
+    fila_engine.reset()
+    p = await _pacientes(db_session, "441", 4)
+    tipo = TipoAtendimento.triagem
+
+    normal = await fila_service.add_to_queue(db_session, p[0].id, tipo)
+    urgente = await fila_service.add_to_queue(db_session, p[1].id, tipo, prioridade=PrioridadeFila.urgente)
+    normal2 = await fila_service.add_to_queue(db_session, p[2].id, tipo)
+    emergencia = await fila_service.add_to_queue(db_session, p[3].id, tipo, prioridade=PrioridadeFila.emergencia)
+
+    fila = await fila_service.get_queue_by_type(db_session, tipo)
+    assert [f.id for f in fila] == [emergencia.id, urgente.id, normal.id, normal2.id]
+    assert (await fila_service.get_next_in_queue(db_session, tipo)).id == emergencia.id
+
+    # mudanças commitadas refletem na fila em memória
+    await fila_service.start_attendance(db_session, emergencia.id)
+    await fila_service.update_queue_priority(db_session, normal2.id, PrioridadeFila.emergencia)
+    assert (await fila_service.get_next_in_queue(db_session, tipo)).id == normal2.id
+    assert [f.id for f in await fila_service.get_waiting_queue(db_session)] == [normal2.id, urgente.id, normal.id]
+
+    await fila_service.finish_attendance(db_session, emergencia.id)
+    await fila_service.remove_from_queue(db_session, normal2.id)
+    assert [f.id for f in await fila_service.get_queue_by_type(db_session, tipo, limit=1)] == [urgente.id]
+
+    # o espelho bate com a consulta direta no banco
+    por_sql = await fila_service.get_queue_by_type(db_session, tipo, status=StatusFila.aguardando)
+    fila_engine.reset()
+    recarregada = await fila_service.get_queue_by_type(db_session, tipo)
+    assert [f.id for f in recarregada] == [f.id for f in por_sql] == [urgente.id, normal.id]
+
+
+@pytest.mark.asyncio
+async def test_rollback_nao_altera_fila_em_memoria(db_session: AsyncSession):
+    fila_engine.reset()
+    (p,) = await _pacientes(db_session, "442", 1)
+    item = await fila_service.add_to_queue(db_session, p.id, TipoAtendimento.consulta)
+    item_id = item.id
+    await fila_service.get_queue_by_type(db_session, TipoAtendimento.consulta)
+
+    item.status = StatusFila.cancelado
+    await db_session.flush()
+    await db_session.rollback()
+
+    assert fila_engine.peek(TipoAtendimento.consulta) == item_id
+
+
+@pytest.mark.asyncio
+async def test_claim_next_nunca_entrega_o_mesmo_item(db_session: AsyncSession):
+    fila_engine.reset()
+    aluno = UsuarioSistema(nome="Aluno Claim", email="claim@exemplo.com", senha_hash="x", perfil=PerfilUsuario.aluno)
+    db_session.add(aluno)
+    pacientes = await _pacientes(db_session, "443", 5)
+    tipo = TipoAtendimento.consulta
+    # itens deixados na fila por outros testes
+    antes = len(await fila_service.get_queue_by_type(db_session, tipo, status=StatusFila.aguardando))
+    for i, p in enumerate(pacientes):
+        prioridade = PrioridadeFila.urgente if i == 3 else PrioridadeFila.normal
+        await fila_service.add_to_queue(db_session, p.id, tipo, prioridade=prioridade)
+    await fila_service.get_queue_by_type(db_session, tipo)
+
+    async def claim():
+        async with AsyncSession(bind=db_session.bind, expire_on_commit=False) as sessao:
+            item = await fila_service.claim_next(sessao, tipo, aluno.id)
+            return item and (item.id, item.paciente_id, item.status, item.aluno_id)
+
+    claims = await asyncio.gather(*[claim() for _ in range(antes + 7)])
+    obtidos = [c for c in claims if c]
+    assert len(obtidos) == antes + 5 and claims.count(None) == 2
+    assert len({c[0] for c in obtidos}) == antes + 5
+    assert {p.id for p in pacientes} <= {c[1] for c in obtidos}
+    assert all(c[2] == StatusFila.em_atendimento and c[3] == aluno.id for c in obtidos)
+    # espelho em memória acompanha os claims
+    assert fila_engine.peek(tipo) is None
+
+
+@pytest.mark.asyncio
+async def test_paciente_ativo_uma_vez_por_fila(db_session: AsyncSession):
+    fila_engine.reset()
+    a, b = await _pacientes(db_session, "444", 2)
+    a_id, b_id = a.id, b.id  # o rollback do duplicado expira os objetos
+
+    item_id = (await fila_service.add_to_queue(db_session, a_id, TipoAtendimento.triagem)).id
+    with pytest.raises(ValueError):
+        await fila_service.add_to_queue(db_session, a_id, TipoAtendimento.triagem)
+    assert not db_session.in_transaction()  # não segura o lock de escrita
+    # outra fila e, após cancelar, a mesma fila continuam permitidas
+    await fila_service.add_to_queue(db_session, a_id, TipoAtendimento.consulta)
+    await fila_service.cancel_attendance(db_session, item_id)
+    await fila_service.add_to_queue(db_session, a_id, TipoAtendimento.triagem)
+
+    # recepcionistas concorrentes: só um insere
+    async def enfileirar():
+        async with AsyncSession(bind=db_session.bind, expire_on_commit=False) as sessao:
+            try:
+                return await fila_service.add_to_queue(sessao, b_id, TipoAtendimento.triagem)
+            except ValueError:
+                return None
+
+    resultados = await asyncio.gather(*[enfileirar() for _ in range(4)])
+    assert sum(r is not None for r in resultados) == 1
+
+
+@pytest.mark.asyncio
+async def test_transicoes_seguem_maquina_de_estados(db_session: AsyncSession):
+    fila_engine.reset()
+    p = await _pacientes(db_session, "445", 2)
+    nome = p[0].nome
+    tipo = TipoAtendimento.consulta
+    item_id = (await fila_service.add_to_queue(db_session, p[0].id, tipo)).id
+    outro_id = (await fila_service.add_to_queue(db_session, p[1].id, tipo)).id
+    assert await fila_service.get_queue_by_type(db_session, tipo)
+
+    with pytest.raises(ValueError):
+        await fila_service.finish_attendance(db_session, item_id)
+    assert not db_session.in_transaction()  # falha libera o lock de escrita
+
+    item = await db_session.get(FilaAtendimento, item_id)
+    iniciado = await fila_service.start_attendance(db_session, item_id)
+    assert iniciado.status == StatusFila.em_atendimento
+    assert iniciado.paciente.nome == nome
+    assert item.status == StatusFila.em_atendimento  # objeto da sessão acompanha o UPDATE
+    with pytest.raises(ValueError):
+        await fila_service.start_attendance(db_session, item_id)
+
+    concluido = await fila_service.finish_attendance(db_session, item_id, "alta")
+    assert (concluido.status, concluido.observacao) == (StatusFila.concluido, "alta")
+    with pytest.raises(ValueError):
+        await fila_service.cancel_attendance(db_session, item_id)
+
+    # desistência de quem ainda aguardava
+    assert (await fila_service.cancel_attendance(db_session, outro_id)).status == StatusFila.cancelado
+    assert await fila_service.start_attendance(db_session, 999_999) is None
+    assert not db_session.in_transaction()
+    assert not {item_id, outro_id} & set(fila_engine.queue_ids(tipo))
+
+
+@pytest.mark.asyncio
+async def test_transicoes_em_lote(db_session: AsyncSession):
+    fila_engine.reset()
+    p = await _pacientes(db_session, "446", 5)
+    tipo = TipoAtendimento.triagem
+    itens = [await fila_service.add_to_queue(db_session, paciente.id, tipo) for paciente in p]
+    ids = [item.id for item in itens]
+    await fila_service.get_queue_by_type(db_session, tipo)
+    await fila_service.start_attendance(db_session, ids[0])
+
+    resultados = await fila_service.transition_queue_items(
+        db_session, [ids[0], ids[1], 999_999], StatusFila.em_atendimento
+    )
+    R = fila_service.ResultadoTransicao
+    assert resultados == {ids[0]: R.invalido, ids[1]: R.atualizado, 999_999: R.nao_encontrado}
+    assert itens[1].status == StatusFila.em_atendimento
+    assert await fila_service.transition_queue_items(db_session, [999_998], StatusFila.cancelado) == {999_998: R.nao_encontrado}
+    assert not db_session.in_transaction()
+
+    # fim do turno: cancela o que sobrou, aguardando ou em atendimento
+    fechados = await fila_service.close_queue(db_session, tipo, observacao="fim do turno")
+    assert set(ids) <= set(fechados)
+    assert all(r is R.atualizado for r in fechados.values())
+    assert all(item.status == StatusFila.cancelado for item in itens)
+    assert fila_engine.queue_ids(tipo) == []
+    assert await fila_service.close_queue(db_session, tipo) == {}
+
+
+@pytest.mark.asyncio
+async def test_arquivamento_e_historico_paginado(db_session: AsyncSession):
+    fila_engine.reset()
+    (p,) = await _pacientes(db_session, "447", 1)
+    ids = []
+    for tipo in (TipoAtendimento.triagem, TipoAtendimento.consulta, TipoAtendimento.triagem):
+        item = await fila_service.add_to_queue(db_session, p.id, tipo)
+        await fila_service.cancel_attendance(db_session, item.id)
+        ids.append(item.id)
+    ativo = await fila_service.add_to_queue(db_session, p.id, TipoAtendimento.consulta)
+
+    # encerrados "há 40 dias" vão para o histórico em lotes; o ativo fica
+    await db_session.execute(
+        update(FilaAtendimento)
+        .where(FilaAtendimento.id.in_(ids))
+        .values(atualizado_em=datetime.now(timezone.utc) - timedelta(days=40))
+    )
+    await db_session.commit()
+    assert await fila_service.archive_queue(db_session, dias=30, lote=2) == 3
+    assert await db_session.scalar(select(func.count()).where(FilaAtendimento.id.in_(ids))) == 0
+    assert await fila_service.archive_queue(db_session, dias=30) == 0
+
+    # histórico une fila e arquivo, do mais recente, sem repetir entre páginas
+    vistos, cursor = [], None
+    while True:
+        page, cursor = await fila_service.get_patient_queue_history(db_session, p.id, cursor=cursor, limit=3)
+        vistos += page
+        if cursor is None:
+            break
+    assert [h.id for h in vistos] == [ativo.id] + ids[::-1]
+    assert all(h.paciente.id == p.id for h in vistos)
+    assert [h.status for h in vistos[1:]] == [StatusFila.cancelado] * 3
+
+
+@pytest.mark.asyncio
+async def test_metricas_da_fila(db_session: AsyncSession):
+    fila_engine.reset()
+    tipo = TipoAtendimento.consulta
+    antes = (await fila_service.get_queue_metrics(db_session))[tipo]
+
+    p = await _pacientes(db_session, "448", 3)
+    itens = [await fila_service.add_to_queue(db_session, paciente.id, tipo) for paciente in p]
+    await fila_service.start_attendance(db_session, itens[0].id)
+    await fila_service.finish_attendance(db_session, itens[0].id)
+    await fila_service.cancel_attendance(db_session, itens[1].id)
+
+    agora = (await fila_service.get_queue_metrics(db_session))[tipo]
+    assert (agora.chegadas - antes.chegadas, agora.inicios - antes.inicios) == (3, 1)
+    assert (agora.conclusoes - antes.conclusoes, agora.cancelamentos - antes.cancelamentos) == (1, 1)
+    assert agora.aguardando == antes.aguardando + 1
+    assert agora.espera_p50 is not None and agora.atendimento_p90 is not None
+
+    # esboço: quantis com erro relativo de até 2%, num dia só deste teste
+    dia = datetime(2001, 5, 10, 15, tzinfo=timezone.utc)
+    eventos = [
+        EventoFila(tipo, StatusFila.em_atendimento, dia, criado_em=dia - timedelta(minutes=m))
+        for m in range(1, 101)
+    ]
+    await record_events(db_session, eventos)
+    await record_events(db_session, eventos[:10])
+    await db_session.commit()
+    m = (await fila_service.get_queue_metrics(db_session, dia_do_evento(dia)))[tipo]
+    assert m.inicios == 110 and m.aguardando == 0
+    assert m.espera_media == pytest.approx((5050 + 55) * 60 / 110)
+    assert m.espera_p50 == pytest.approx(45 * 60, rel=0.02)
+    assert m.espera_p90 == pytest.approx(89 * 60, rel=0.02)
+
+
+@pytest.mark.asyncio
+async def test_fila_em_memoria_ve_escritas_de_outra_estacao(db_session: AsyncSession):
+    fila_engine.reset()
+    p = await _pacientes(db_session, "449", 3)
+    tipo = TipoAtendimento.triagem
+    primeiro = await fila_service.add_to_queue(db_session, p[0].id, tipo)
+    assert primeiro.id in [f.id for f in await fila_service.get_queue_by_type(db_session, tipo)]
+
+    # outra estação: escreve direto no banco, sem passar pelos eventos deste processo,
+    # e avança o contador do tipo na mesma transação (como faz bump_version lá)
+    async with AsyncSession(bind=db_session.bind) as outra:
+        await outra.execute(
+            FilaAtendimento.__table__.insert().values(
+                paciente_id=p[1].id, tipo=tipo, status=StatusFila.aguardando,
+                prioridade=int(PrioridadeFila.emergencia),
+            )
+        )
+        await outra.execute(
+            update(FilaAtendimento)
+            .where(FilaAtendimento.id == primeiro.id)
+            .values(status=StatusFila.cancelado, atualizado_em=datetime.now(timezone.utc))
+        )
+        await outra.execute(text("UPDATE fila_versoes SET versao = versao + 1 WHERE tipo = :tipo"), {"tipo": tipo.name})
+        await outra.commit()
+    externo = await db_session.scalar(select(FilaAtendimento.id).where(FilaAtendimento.paciente_id == p[1].id))
+
+    assert (await fila_service.get_next_in_queue(db_session, tipo)).id == externo
+    ids = [f.id for f in await fila_service.get_queue_by_type(db_session, tipo)]
+    assert externo in ids and primeiro.id not in ids
+
+
+@pytest.mark.asyncio
+async def test_escritas_locais_nao_recarregam_a_fila(db_session: AsyncSession, monkeypatch):
+    fila_engine.reset()
+    p = await _pacientes(db_session, "453", 3)
+    tipo = TipoAtendimento.consulta
+    primeiro = await fila_service.add_to_queue(db_session, p[0].id, tipo)
+    await fila_service.get_queue_by_type(db_session, tipo)
+
+    cargas = []
+    load = fila_engine._load
+
+    async def contando(*args):
+        cargas.append(args[1])
+        await load(*args)
+
+    monkeypatch.setattr(fila_engine, "_load", contando)
+    segundo = await fila_service.add_to_queue(db_session, p[1].id, tipo, prioridade=PrioridadeFila.urgente)
+    await fila_service.update_queue_priority(db_session, primeiro.id, PrioridadeFila.emergencia)
+    await fila_service.start_attendance(db_session, segundo.id)
+
+    assert {primeiro.id, segundo.id} <= {f.id for f in await fila_service.get_queue_by_type(db_session, tipo)}
+    assert primeiro.id in fila_engine.waiting_ids(tipo) and segundo.id not in fila_engine.waiting_ids(tipo)
+    assert cargas == []
+
+
+@pytest.mark.asyncio
+async def test_cargas_concorrentes_esperam_a_carga_em_andamento(db_session: AsyncSession):
+    p = await _pacientes(db_session, "450", 2)
+    tipo = TipoAtendimento.consulta
+    for paciente in p:
+        await fila_service.add_to_queue(db_session, paciente.id, tipo)
+    fila_engine.reset()
+
+    async def fila():
+        async with AsyncSession(bind=db_session.bind) as sessao:
+            await fila_engine.ensure_loaded(sessao, tipo)
+            return fila_engine.queue_ids(tipo)
+
+    resultados = await asyncio.gather(*[fila() for _ in range(5)])
+    assert all(r == resultados[0] and len(r) >= 2 for r in resultados)
+
+
+@pytest.mark.asyncio
+async def test_escritas_em_massa_atualizam_o_espelho(db_session: AsyncSession):
+    fila_engine.reset()
+    p = await _pacientes(db_session, "451", 4)
+    tipo = TipoAtendimento.triagem
+    ids = [(await fila_service.add_to_queue(db_session, paciente.id, tipo)).id for paciente in p]
+    await fila_service.get_queue_by_type(db_session, tipo)
+
+    # sem nova consulta ao banco: só o que cada operação aplicou ao espelho
+    await fila_service.remove_from_queue(db_session, ids[0])
+    assert ids[0] not in fila_engine.queue_ids(tipo)
+    await fila_service.transition_queue_items(db_session, ids[1:3], StatusFila.em_atendimento)
+    assert set(ids[1:3]) <= set(fila_engine.queue_ids(tipo)) and not set(ids[1:3]) & set(fila_engine.waiting_ids(tipo))
+    await fila_service.close_queue(db_session, tipo)
+    assert not set(ids) & set(fila_engine.queue_ids(tipo))
+
+
+@pytest.mark.asyncio
+async def test_ids_da_fila_nao_sao_reutilizados_apos_arquivar(db_session: AsyncSession):
+    fila_engine.reset()
+    a, b = await _pacientes(db_session, "452", 2)
+    a_id, b_id = a.id, b.id
+    tipo = TipoAtendimento.consulta
+    arquivado = await fila_service.add_to_queue(db_session, a_id, tipo)
+    await fila_service.cancel_attendance(db_session, arquivado.id)
+    maior = await fila_service.add_to_queue(db_session, b_id, tipo)
+    await db_session.execute(
+        update(FilaAtendimento)
+        .where(FilaAtendimento.id == arquivado.id)
+        .values(atualizado_em=datetime.now(timezone.utc) - timedelta(days=40))
+    )
+    await db_session.commit()
+    assert await fila_service.archive_queue(db_session, dias=30) >= 1
+
+    # sem AUTOINCREMENT o SQLite devolveria o id do maior item apagado
+    await fila_service.remove_from_queue(db_session, maior.id)
+    novo = await fila_service.add_to_queue(db_session, b_id, tipo)
+    assert novo.id > maior.id
+
+    historico, _ = await fila_service.get_patient_queue_history(db_session, a_id)
+    assert [h.id for h in historico] == [arquivado.id]
+
+
+@pytest.mark.asyncio
+async def test_encerramento_que_falha_desfaz_a_transacao(db_session: AsyncSession, monkeypatch):
+    fila_engine.reset()
+    p = await _pacientes(db_session, "454", 2)
+    tipo = TipoAtendimento.consulta
+    ids = [(await fila_service.add_to_queue(db_session, paciente.id, tipo)).id for paciente in p]
+
+    async def falha(*_):
+        raise RuntimeError("métricas indisponíveis")
+
+    monkeypatch.setattr(fila_service, "record_events", falha)
+    with pytest.raises(RuntimeError):
+        await fila_service.close_queue(db_session, tipo)
+    assert not db_session.in_transaction()
+
+    status = await db_session.scalars(select(FilaAtendimento.status).where(FilaAtendimento.id.in_(ids)))
+    assert set(status) == {StatusFila.aguardando}
+
+
+@pytest.mark.asyncio
+async def test_arquivamento_que_falha_desfaz_o_lote(db_session: AsyncSession, monkeypatch):
+    fila_engine.reset()
+    (p,) = await _pacientes(db_session, "455", 1)
+    p_id = p.id
+    item = await fila_service.add_to_queue(db_session, p_id, TipoAtendimento.triagem)
+    item_id = item.id
+    await fila_service.cancel_attendance(db_session, item_id)
+    await db_session.execute(
+        update(FilaAtendimento)
+        .where(FilaAtendimento.id == item_id)
+        .values(atualizado_em=datetime.now(timezone.utc) - timedelta(days=40))
+    )
+    await db_session.commit()
+
+    execute = db_session.execute
+
+    async def falha_no_delete(stmt, *args, **kwargs):
+        if stmt.is_delete:
+            raise RuntimeError("disco cheio")
+        return await execute(stmt, *args, **kwargs)
+
+    monkeypatch.setattr(db_session, "execute", falha_no_delete)
+    with pytest.raises(RuntimeError):
+        await fila_service.archive_queue(db_session, dias=30)
+    monkeypatch.undo()
+    assert not db_session.in_transaction()
+
+    # o INSERT no histórico foi desfeito junto: o item segue só na fila
+    assert await db_session.get(FilaAtendimento, item_id) is not None
+    historico, _ = await fila_service.get_patient_queue_history(db_session, p_id)
+    assert [h.id for h in historico] == [item_id]
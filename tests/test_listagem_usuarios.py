@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.models import (
+    UsuarioSistema, PerfilUsuario, PerfilProfessor, PerfilAluno, PerfilRecepcionista, Clinica,
+)
+from src.backend.controllers import usuario_service
+
+
+async def _criar_usuarios(db_session: AsyncSession, prefixo: str, n: int, clinica: Clinica) -> None:
+    for i in range(n):
+        perfil = (PerfilUsuario.aluno, PerfilUsuario.professor, PerfilUsuario.recepcionista)[i % 3]
+        user = UsuarioSistema(
+            nome=f"Lista {prefixo} {i}", email=f"lista{prefixo}{i}@exemplo.com", senha_hash="x", perfil=perfil,
+        )
+        db_session.add(user)
+        await db_session.flush()
+        if perfil == PerfilUsuario.aluno:
+            db_session.add(PerfilAluno(user_id=user.id, matricula=f"{prefixo}{i}", telefone="48", clinica_id=clinica.id))
+        elif perfil == PerfilUsuario.professor:
+            db_session.add(PerfilProfessor(user_id=user.id, especialidade="Clínica", clinica_id=clinica.id))
+        else:
+            db_session.add(PerfilRecepcionista(user_id=user.id, telefone="49"))
+    await db_session.commit()
+
+
+async def _listar_contando(db_session: AsyncSession, contar_consultas) -> tuple[list[dict], int]:
+    return await contar_consultas(usuario_service.list_users_with_profiles(db_session))
+
+
+@pytest.mark.asyncio
+async def test_listagem_de_usuarios_sem_n_mais_1(db_session: AsyncSession, contar_consultas):
+    clinica = Clinica(codigo="LIST-01", nome="Clínica Lista")
+    db_session.add(clinica)
+    await db_session.commit()
+
+    await _criar_usuarios(db_session, "a", 3, clinica)
+    poucos, consultas_poucos = await _listar_contando(db_session, contar_consultas)
+    await _criar_usuarios(db_session, "b", 30, clinica)
+    muitos, consultas_muitos = await _listar_contando(db_session, contar_consultas)
+
+    assert len(muitos) == len(poucos) + 30
+    assert consultas_poucos == consultas_muitos == 1
+
+    # mesmos dados que get_profile_data devolve usuário a usuário
+    por_email = {u["email"]: u for u in muitos}
+    for i in range(3):
+        item = por_email[f"listab{i}@exemplo.com"]
+        user = await db_session.get(UsuarioSistema, item["id"])
+        assert item["perfil_dados"] == await usuario_service.get_profile_data(db_session, user)
+    assert por_email["listab0@exemplo.com"]["clinica_id"] == clinica.id
+    assert por_email["listab2@exemplo.com"]["clinica_id"] is None
+
+
+@pytest.mark.asyncio
+async def test_perfil_e_clinica_carregados_junto_com_usuario(db_session: AsyncSession, contar_consultas):
+    clinica = Clinica(codigo="LIST-02", nome="Clínica Perfil")
+    db_session.add(clinica)
+    await db_session.commit()
+    await _criar_usuarios(db_session, "c", 3, clinica)
+
+    for i in range(3):
+        email = f"listac{i}@exemplo.com"
+        # usuário + perfil + clínica em um único SELECT, qualquer que seja o papel
+        user, consultas = await contar_consultas(usuario_service.get_user_by_email(db_session, email, with_profile=True))
+        assert consultas == 1
+        dados = usuario_service.profile_data(user)
+        assert dados is not None
+        if user.perfil != PerfilUsuario.recepcionista:
+            assert dados["clinica"] == {"id": clinica.id, "codigo": "LIST-02", "nome": "Clínica Perfil"}
+
+    # usuário carregado sem o perfil: get_profile_data completa com uma consulta
+    db_session.expunge_all()
+    user = await usuario_service.get_user_by_email(db_session, "listac0@exemplo.com")
+    dados, consultas = await contar_consultas(usuario_service.get_profile_data(db_session, user))
+    assert consultas == 1 and dados["matricula"] == "c0"
+
+
+@pytest.mark.asyncio
+async def test_listagem_filtrada_e_paginada_no_banco(db_session: AsyncSession, contar_consultas):
+    clinica = Clinica(codigo="LIST-03", nome="Clínica Páginas")
+    db_session.add(clinica)
+    await db_session.commit()
+    await _criar_usuarios(db_session, "d", 12, clinica)
+    inativo = await usuario_service.get_user_by_email(db_session, "listad0@exemplo.com")
+    inativo.ativo = False
+    await db_session.commit()
+
+    # percorre as páginas pelo cursor: ordem por nome, sem repetir nem pular
+    vistos, cursor, consultas = [], None, set()
+    while True:
+        (pagina, cursor), n = await contar_consultas(usuario_service.list_users(
+            db_session, perfil=PerfilUsuario.aluno, ativo=True, search="lista d", cursor=cursor, limit=2,
+        ))
+        consultas.add(n)
+        vistos.extend(pagina)
+        if cursor is None:
+            break
+    assert consultas == {1}
+    assert [u["email"] for u in vistos] == [f"listad{i}@exemplo.com" for i in (3, 6, 9)]
+    assert all(u["perfil"] == "aluno" and u["ativo"] for u in vistos)
+    assert vistos[0]["perfil_dados"] == {"matricula": "d3", "telefone": "48", "clinica": {
+        "id": clinica.id, "codigo": "LIST-03", "nome": "Clínica Páginas"}}
+
+    todos, _ = await usuario_service.list_users(db_session, search="LISTA D", limit=50)
+    assert len(todos) == 12
+    assert {u["email"] for u in todos} >= {"listad0@exemplo.com"}
+
+    with pytest.raises(ValueError):
+        await usuario_service.list_users(db_session, cursor="invalido")
+
+
+@pytest.mark.asyncio
+async def test_busca_por_email_cpf_e_nome(db_session: AsyncSession):
+    clinica = Clinica(codigo="LIST-04", nome="Clínica Busca")
+    db_session.add(clinica)
+    await db_session.commit()
+    await _criar_usuarios(db_session, "e", 6, clinica)
+    for i in range(6):
+        user = await usuario_service.get_user_by_email(db_session, f"listae{i}@exemplo.com")
+        user.cpf = f"9870001234{i}"
+    await db_session.commit()
+
+    async def emails(termo, **kwargs):
+        itens, _ = await usuario_service.search_users(db_session, termo, **kwargs)
+        return [u["email"] for u in itens]
+
+    # e-mail: exato e prefixo (o exato vem primeiro)
+    assert await emails("listae3@exemplo.com") == ["listae3@exemplo.com"]
+    assert await emails("listae") == []  # sem "@" é busca por nome
+    assert (await emails("listae1@"))[0] == "listae1@exemplo.com"
+
+    # CPF: exato com 11 dígitos, prefixo com menos, com ou sem pontuação
+    assert await emails("987.000.123-42") == ["listae2@exemplo.com"]
+    assert len(await emails("987.000")) == 6
+    assert await emails("987000", perfil=PerfilUsuario.professor) == ["listae1@exemplo.com", "listae4@exemplo.com"]
+
+    # nome: prefixo sem acentos e caixa
+    assert len(await emails("LISTA E")) == 6
+
+    # paginação pela chave da busca, sem repetir
+    vistos, cursor = [], None
+    while True:
+        itens, cursor = await usuario_service.search_users(db_session, "9870001", cursor=cursor, limit=4)
+        vistos.extend(u["cpf"] for u in itens)
+        if cursor is None:
+            break
+    assert vistos == [f"9870001234{i}" for i in range(6)]
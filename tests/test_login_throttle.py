@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.core import security
+from src.backend.models import PerfilUsuario
+from src.backend.controllers import usuario_service
+from src.backend.controllers.login_throttle import LoginThrottle, LoginBloqueado
+
+
+class Relogio:
+    def __init__(self) -> None:
+        self.agora = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+def _throttle(relogio: Relogio, **kwargs) -> LoginThrottle:
+    limites = dict(max_falhas=3, max_falhas_origem=10, janela=60, bloqueio=120, max_chaves=100)
+    limites.update(kwargs)
+    return LoginThrottle(**limites, relogio=relogio)
+
+
+def test_bloqueia_par_e_origem_e_libera_apos_o_bloqueio():
+    relogio = Relogio()
+    throttle = _throttle(relogio)
+
+    for _ in range(3):
+        throttle.attempt("Ana@Exemplo.com", "recepcao")
+    with pytest.raises(LoginBloqueado) as exc:
+        throttle.attempt("ana@exemplo.com", "recepcao")  # e-mail sem caixa
+    assert exc.value.retry_after == 120
+    throttle.attempt("ana@exemplo.com", "outra-estacao")  # outra origem segue livre
+
+    # muitos e-mails pela mesma origem: bloqueia a origem inteira
+    for i in range(6):
+        throttle.attempt(f"u{i}@exemplo.com", "recepcao")
+    with pytest.raises(LoginBloqueado):
+        throttle.attempt("qualquer@exemplo.com", "recepcao")
+    with pytest.raises(LoginBloqueado):
+        throttle.attempt("outro@exemplo.com", "recepcao")
+    assert throttle.recusadas == 3
+
+    relogio.agora += 121
+    throttle.attempt("ana@exemplo.com", "recepcao")
+
+
+def test_janela_deslizante_esquece_tentativas_antigas_e_sucesso_devolve():
+    relogio = Relogio()
+    throttle = _throttle(relogio)
+    throttle.attempt("bia@exemplo.com")
+    throttle.attempt("bia@exemplo.com")
+    relogio.agora += 110  # quase duas janelas depois: pouco peso das antigas
+    throttle.attempt("bia@exemplo.com")
+    throttle.attempt("bia@exemplo.com")
+
+    throttle.success("bia@exemplo.com")
+    for _ in range(3):
+        throttle.attempt("bia@exemplo.com")
+
+    # logins válidos não consomem o limite da origem
+    for i in range(30):
+        throttle.attempt(f"ok{i}@exemplo.com", "recepcao")
+        throttle.success(f"ok{i}@exemplo.com", "recepcao")
+    throttle.attempt("mais@exemplo.com", "recepcao")
+
+
+def test_tamanho_limitado_com_descarte_lru():
+    throttle = _throttle(Relogio(), max_chaves=10, max_falhas_origem=10_000)
+    for i in range(100):
+        throttle.attempt(f"u{i}@exemplo.com", "recepcao")
+    assert len(throttle) == 10
+    # a chave da origem é tocada a cada tentativa e não sai
+    assert ("origem", "recepcao") in throttle._chaves
+
+
+def test_modo_persistido_recarrega_bloqueios(tmp_path):
+    relogio = Relogio()
+    arquivo = tmp_path / "bloqueios.json"
+    throttle = _throttle(relogio, arquivo=str(arquivo))
+    with pytest.raises(LoginBloqueado):
+        for _ in range(4):
+            throttle.attempt("caio@exemplo.com")
+
+    reiniciado = _throttle(relogio, arquivo=str(arquivo))
+    with pytest.raises(LoginBloqueado):
+        reiniciado.attempt("caio@exemplo.com")
+    relogio.agora += 121
+    _throttle(relogio, arquivo=str(arquivo)).attempt("caio@exemplo.com")
+
+
+@pytest.mark.asyncio
+async def test_login_bloqueado_nao_consulta_bcrypt(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(security, "pwd_context", security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=4))
+    monkeypatch.setattr(usuario_service, "login_throttle", _throttle(Relogio()))
+    await usuario_service.create_user(
+        db_session, nome="Throttle", email="throttle@exemplo.com", senha="Senha123", perfil=PerfilUsuario.admin,
+    )
+
+    for _ in range(3):
+        assert await usuario_service.authenticate_user(db_session, "throttle@exemplo.com", "errada") is None
+    antes = security.password_hash_stats().chamadas
+    # a 4ª tentativa já é recusada, mesmo com a senha certa
+    for senha in ("errada", "Senha123"):
+        with pytest.raises(LoginBloqueado):
+            await usuario_service.authenticate_user(db_session, "throttle@exemplo.com", senha)
+    assert security.password_hash_stats().chamadas == antes
+
+
+@pytest.mark.asyncio
+async def test_limite_da_origem_nao_tranca_outras_contas(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(security, "pwd_context", security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=4))
+    monkeypatch.setattr(usuario_service, "login_throttle", _throttle(Relogio()))
+    await usuario_service.create_user(
+        db_session, nome="Throttle Admin", email="throttle.admin@exemplo.com", senha="Senha123", perfil=PerfilUsuario.admin,
+    )
+
+    # desktop (ORIGEM_LOCAL): muitos e-mails errados não bloqueiam o processo inteiro
+    for i in range(15):
+        assert await usuario_service.authenticate_user(db_session, f"nao{i}@exemplo.com", "errada") is None
+    assert await usuario_service.authenticate_user(db_session, "throttle.admin@exemplo.com", "Senha123") is not None
+
+    # estação identificada: a rajada bloqueia só aquela origem
+    with pytest.raises(LoginBloqueado):
+        for i in range(15):
+            await usuario_service.authenticate_user(db_session, f"nao{i}@exemplo.com", "errada", "recepcao")
+    with pytest.raises(LoginBloqueado):
+        await usuario_service.authenticate_user(db_session, "throttle.admin@exemplo.com", "Senha123", "recepcao")
+    assert await usuario_service.authenticate_user(db_session, "throttle.admin@exemplo.com", "Senha123", "consultorio") is not None
+    await usuario_service.wait_pending_rehashes()
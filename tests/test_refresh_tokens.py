@@ -1,7 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.backend.models import UsuarioSistema, PerfilUsuario
+from src.backend.models.refresh_token import RefreshToken
+from src.backend.controllers import refresh_token_service
+from src.backend.controllers.refresh_token_cache import RefreshTokenCache
 
 
 @pytest.mark.asyncio
@@ -50,3 +61,189 @@ async def test_criacao_usuario_senha_fraca(cliente: AsyncClient, usuario_admin):
     assert resp.status_code == 400
     detalhe = resp.json().get("detail")
     assert "Senha" in detalhe
+
+
+async def _usuario(db_session: AsyncSession, email: str) -> UsuarioSistema:
+    user = UsuarioSistema(nome="Refresh Cache", email=email, senha_hash="x", perfil=PerfilUsuario.aluno)
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_refresh_validado_vem_do_cache_e_revogacao_vale_na_hora(db_session: AsyncSession, contar_consultas):
+    user = await _usuario(db_session, "refresh.cache@exemplo.com")
+    token, criado = await refresh_token_service.create_refresh_token(db_session, user.id)
+
+    primeiro, consultas = await contar_consultas(refresh_token_service.get_refresh_token_by_token(db_session, token))
+    assert primeiro.id == criado.id and consultas == 1
+    db_session.expunge_all()
+    segundo, consultas = await contar_consultas(refresh_token_service.get_refresh_token_by_token(db_session, token))
+    assert consultas == 0
+    assert (segundo.id, segundo.usuario_id, segundo.revogado) == (criado.id, user.id, False)
+
+    assert await refresh_token_service.revoke_refresh_token(db_session, token) is True
+    revogado, consultas = await contar_consultas(refresh_token_service.get_refresh_token_by_token(db_session, token))
+    assert revogado is None and consultas == 0
+    assert (await db_session.get(RefreshToken, criado.id, populate_existing=True)).revogado is True
+    assert await refresh_token_service.revoke_refresh_token(db_session, token) is False
+
+
+@pytest.mark.asyncio
+async def test_revogacao_que_falha_no_banco_nao_recusa_o_token(db_session: AsyncSession, monkeypatch):
+    user = await _usuario(db_session, "refresh.falha@exemplo.com")
+    token, _ = await refresh_token_service.create_refresh_token(db_session, user.id)
+    assert await refresh_token_service.get_refresh_token_by_token(db_session, token) is not None
+
+    async def banco_ocupado():
+        raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+    with monkeypatch.context() as m:
+        m.setattr(db_session, "commit", banco_ocupado)
+        with pytest.raises(OperationalError):
+            await refresh_token_service.revoke_refresh_token(db_session, token)
+    await db_session.rollback()
+
+    assert await refresh_token_service.get_refresh_token_by_token(db_session, token) is not None
+    assert await refresh_token_service.revoke_refresh_token(db_session, token) is True
+    assert await refresh_token_service.get_refresh_token_by_token(db_session, token) is None
+
+
+@pytest.mark.asyncio
+async def test_revogar_todos_invalida_o_cache_do_usuario(db_session: AsyncSession, contar_consultas):
+    user = await _usuario(db_session, "refresh.todos@exemplo.com")
+    tokens = [(await refresh_token_service.create_refresh_token(db_session, user.id))[0] for _ in range(2)]
+    for token in tokens:
+        assert await refresh_token_service.get_refresh_token_by_token(db_session, token) is not None
+
+    revogados, consultas = await contar_consultas(refresh_token_service.revoke_all_user_tokens(db_session, user.id))
+    assert revogados == 2 and consultas == 1
+    for token in tokens:
+        assert await refresh_token_service.get_refresh_token_by_token(db_session, token) is None
+    assert await refresh_token_service.revoke_all_user_tokens(db_session, user.id) == 0
+
+
+@pytest.mark.asyncio
+async def test_varredura_remove_em_lotes_expirados_e_revogados_antigos(db_session: AsyncSession):
+    user = await _usuario(db_session, "refresh.varredura@exemplo.com")
+    agora = datetime.now(timezone.utc)
+    antigo = agora - timedelta(days=30)
+
+    def token(nome: str, expira_em: datetime, criado_em: datetime, revogado: bool = False) -> RefreshToken:
+        return RefreshToken(usuario_id=user.id, token_hash=f"varredura-{nome}", expira_em=expira_em,
+                            criado_em=criado_em, revogado=revogado)
+
+    expirados = [token(f"expirado-{i}", agora - timedelta(hours=1), antigo) for i in range(5)]
+    db_session.add_all(expirados + [
+        token("revogado-antigo", agora + timedelta(days=1), antigo, revogado=True),
+        token("revogado-recente", agora + timedelta(days=1), agora, revogado=True),
+        token("valido", agora + timedelta(days=1), agora),
+    ])
+    await db_session.commit()
+
+    stats = refresh_token_service.token_sweep_stats
+    lotes, execucoes = stats.lotes, stats.execucoes
+    removidos = await refresh_token_service.sweep_refresh_tokens(db_session, lote=2, pausa=0)
+    assert removidos >= 6 and removidos == stats.removidos_execucao
+    assert stats.lotes - lotes >= 3 and stats.execucoes == execucoes + 1 and not stats.em_andamento
+
+    restantes = await db_session.scalars(select(RefreshToken.token_hash).where(RefreshToken.usuario_id == user.id))
+    assert sorted(restantes) == ["varredura-revogado-recente", "varredura-valido"]
+
+
+@pytest.mark.asyncio
+async def test_rotacao_troca_o_token_e_reuso_revoga_a_familia(db_session: AsyncSession):
+    user = await _usuario(db_session, "refresh.rotacao@exemplo.com")
+    token, original = await refresh_token_service.create_refresh_token(db_session, user.id)
+    outro, _ = await refresh_token_service.create_refresh_token(db_session, user.id)
+
+    novo, sucessor = await refresh_token_service.rotate_refresh_token(db_session, token)
+    assert novo != token and sucessor.familia == original.familia
+    assert await refresh_token_service.get_refresh_token_by_token(db_session, token) is None
+    assert (await refresh_token_service.get_refresh_token_by_token(db_session, novo)).id == sucessor.id
+
+    # reuso do token já trocado: a família toda cai, as outras sessões não
+    assert await refresh_token_service.rotate_refresh_token(db_session, token) is None
+    assert await refresh_token_service.get_refresh_token_by_token(db_session, novo) is None
+    assert await refresh_token_service.rotate_refresh_token(db_session, novo) is None
+    assert await refresh_token_service.get_refresh_token_by_token(db_session, outro) is not None
+    assert await refresh_token_service.rotate_refresh_token(db_session, "inexistente") is None
+
+
+@pytest.mark.asyncio
+async def test_rotacoes_simultaneas_emitem_um_unico_sucessor(db_session: AsyncSession):
+    user = await _usuario(db_session, "refresh.concorrente@exemplo.com")
+    token, original = await refresh_token_service.create_refresh_token(db_session, user.id)
+    Sessao = async_sessionmaker(db_session.bind, expire_on_commit=False, class_=AsyncSession)
+
+    async def rotacionar():
+        async with Sessao() as session:
+            return await refresh_token_service.rotate_refresh_token(session, token)
+
+    resultados = await asyncio.gather(*(rotacionar() for _ in range(8)))
+    vencedores = [r for r in resultados if r is not None]
+    assert len(vencedores) == 1
+
+    familia = (await db_session.execute(
+        select(RefreshToken.token_hash, RefreshToken.revogado).where(RefreshToken.familia == original.familia)
+    )).all()
+    # o original e um só sucessor, revogado pelo reuso das rotações perdedoras
+    assert len(familia) == 2 and all(revogado for _, revogado in familia)
+    assert await refresh_token_service.get_refresh_token_by_token(db_session, vencedores[0][0]) is None
+
+
+@pytest.mark.asyncio
+async def test_reuso_apos_varredura_ainda_revoga_a_familia(db_session: AsyncSession):
+    user = await _usuario(db_session, "refresh.varrido@exemplo.com")
+    token, original = await refresh_token_service.create_refresh_token(db_session, user.id)
+    # emitido há 8 dias: além da retenção de revogados, mas ainda não expirado
+    original.criado_em = datetime.now(timezone.utc) - timedelta(days=8)
+    await db_session.commit()
+
+    novo, _ = await refresh_token_service.rotate_refresh_token(db_session, token)
+    await refresh_token_service.sweep_refresh_tokens(db_session, pausa=0)
+    assert await db_session.scalar(select(RefreshToken.id).where(RefreshToken.id == original.id)) == original.id
+
+    assert await refresh_token_service.rotate_refresh_token(db_session, token) is None
+    assert await refresh_token_service.get_refresh_token_by_token(db_session, novo) is None
+
+
+def test_cache_recusa_leitura_anterior_a_revogacao():
+    agora = [1000.0]
+    cache = RefreshTokenCache(ttl=60, max_itens=10, relogio=lambda: agora[0])
+    dados = {"id": 1, "usuario_id": 7, "token_hash": "h1", "expira_em": datetime(2100, 1, 1), "criado_em": None}
+
+    lido_em = cache.now()
+    agora[0] += 1
+    cache.revoke_user(7)
+    cache.put(dados, lido_em)  # leu antes da revogação: não entra
+    assert cache.get("h1") is None
+
+    agora[0] += 1
+    cache.put(dados, cache.now())
+    assert cache.get("h1") == dados
+    agora[0] += 61  # ttl
+    assert cache.get("h1") is None
+
+    cache.put(dict(dados, expira_em=datetime.fromtimestamp(agora[0] + 5, timezone.utc)), cache.now())
+    agora[0] += 6  # vence com o token, antes do ttl
+    assert cache.get("h1") is None
+
+
+@pytest.mark.asyncio
+async def test_varredura_periodica_registra_erro_e_continua(db_session: AsyncSession, caplog):
+    rodadas = []
+
+    def sessoes():
+        rodadas.append(1)
+        if len(rodadas) == 1:
+            raise RuntimeError("banco indisponível")
+        if len(rodadas) == 3:
+            tarefa.cancel()
+        return AsyncSession(bind=db_session.bind)
+
+    tarefa = asyncio.create_task(refresh_token_service.run_token_sweeper(sessoes, intervalo=0))
+    with pytest.raises(asyncio.CancelledError):
+        await tarefa
+    assert len(rodadas) == 3
+    assert "banco indisponível" in caplog.text
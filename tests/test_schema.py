@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from sqlalchemy import MetaData, Table, create_engine, inspect, select
+
+from src.backend.db.database import Base
+from src.backend.db.schema import ensure_schema
+from src.backend.models import Paciente
+from src.backend.models.fila import FilaAtendimento
+from src.backend.models.refresh_token import RefreshToken
+
+# colunas que bancos anteriores não têm
+AUSENTES = {
+    "pacientes": {"nome_normalizado"},
+    "usuarios": {"nome_normalizado"},
+    "fila_atendimento": {"prioridade", "aluno_id", "iniciado_em"},
+    "refresh_tokens": {"familia", "substituido_em"},
+}
+
+
+def _schema_antigo() -> MetaData:
+    antigo = MetaData()
+    for table in Base.metadata.sorted_tables:
+        sem = AUSENTES.get(table.name, set())
+        Table(table.name, antigo, *(c._copy() for c in table.columns if c.name not in sem))
+    return antigo
+
+
+def test_banco_antigo_recebe_colunas_indices_e_autoincrement(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'antigo.db'}")
+    with engine.begin() as conn:
+        _schema_antigo().create_all(conn)
+        conn.exec_driver_sql(
+            "INSERT INTO pacientes (id, nome, cpf, \"dataNascimento\") VALUES (1, 'José Ávila', '1', '1980-01-01')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO fila_atendimento (id, paciente_id, tipo, status) VALUES (5, 1, 'triagem', 'aguardando')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO usuarios (id, nome, email, senha_hash, perfil, ativo) VALUES (1, 'Ana', 'a@x', 'x', 'admin', 1)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO refresh_tokens (usuario_id, token_hash, expira_em, criado_em, revogado)"
+            " VALUES (1, 'h1', '2100-01-01', '2025-01-01', 0)"
+        )
+
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        alteracoes = ensure_schema(conn)
+    assert {"pacientes.nome_normalizado", "fila_atendimento.prioridade", "refresh_tokens.familia"} <= set(alteracoes)
+    assert "fila_atendimento AUTOINCREMENT" in alteracoes
+
+    with engine.begin() as conn:
+        assert ensure_schema(conn) == []
+        assert conn.execute(select(Paciente.nome_normalizado)).scalar() == "jose avila"
+        assert conn.execute(select(FilaAtendimento.prioridade)).scalar() == 4
+        assert conn.execute(select(RefreshToken.familia)).scalar() == "h1"
+        indices = {ix["name"] for ix in inspect(conn).get_indexes("fila_atendimento")}
+        assert {"ix_fila_tipo_status_prioridade_criado", "uq_fila_paciente_tipo_ativo"} <= indices
+        # ids continuam depois do maior já usado
+        conn.exec_driver_sql("DELETE FROM fila_atendimento")
+        conn.exec_driver_sql("INSERT INTO fila_atendimento (paciente_id, tipo, status) VALUES (1, 'triagem', 'aguardando')")
+        assert conn.exec_driver_sql("SELECT id FROM fila_atendimento").scalar() == 6
+    engine.dispose()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.backend.core import security
+from src.backend.models import PerfilUsuario
+from src.backend.controllers import usuario_service
+
+
+@pytest.mark.asyncio
+async def test_hash_de_senha_nao_bloqueia_o_event_loop(db_session: AsyncSession):
+    user = await usuario_service.create_user(
+        db_session, nome="Senha Async", email="senha.async@exemplo.com", senha="Senha123", perfil=PerfilUsuario.admin,
+    )
+    assert security.verify_password("Senha123", user.senha_hash)
+    antes = security.password_hash_stats().chamadas
+
+    ticks = 0
+    parar = asyncio.Event()
+
+    async def relogio():
+        nonlocal ticks
+        while not parar.is_set():
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    tarefa = asyncio.create_task(relogio())
+    resultados = await asyncio.gather(
+        *(security.verify_password_async("Senha123", user.senha_hash) for _ in range(3)),
+        security.verify_password_async("errada", user.senha_hash),
+    )
+    parar.set()
+    await tarefa
+
+    assert resultados == [True, True, True, False]
+    # o loop seguiu rodando enquanto o bcrypt trabalhava nas threads
+    assert ticks >= 10
+    stats = security.password_hash_stats()
+    assert stats.chamadas - antes == 4
+    assert stats.em_execucao == 0
+    assert stats.pico_simultaneas >= 2  # as verificações se sobrepuseram
+    assert stats.hash_p50 is not None
+
+    assert await usuario_service.authenticate_user(db_session, "senha.async@exemplo.com", "Senha123") is not None
+    assert await usuario_service.authenticate_user(db_session, "senha.async@exemplo.com", "errada") is None
+
+
+@pytest.mark.asyncio
+async def test_login_regrava_hash_de_custo_ou_esquema_antigo(db_session: AsyncSession, monkeypatch):
+    # custos baixos para o teste; o contexto "antigo" usa custo menor
+    monkeypatch.setattr(security, "pwd_context", security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=4))
+    user = await usuario_service.create_user(
+        db_session, nome="Senha Rehash", email="senha.rehash@exemplo.com", senha="Senha123", perfil=PerfilUsuario.admin,
+    )
+    hash_antigo = user.senha_hash
+    assert hash_antigo.startswith("$2b$04$")
+
+    monkeypatch.setattr(security, "pwd_context", security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=5))
+    assert security.password_needs_rehash(hash_antigo)
+    assert await usuario_service.authenticate_user(db_session, "senha.rehash@exemplo.com", "Senha123") is not None
+    await usuario_service.wait_pending_rehashes()
+
+    db_session.expunge_all()
+    user = await usuario_service.get_user_by_email(db_session, "senha.rehash@exemplo.com")
+    assert user.senha_hash.startswith("$2b$05$")
+    assert not security.password_needs_rehash(user.senha_hash)
+    assert await usuario_service.authenticate_user(db_session, "senha.rehash@exemplo.com", "Senha123") is not None
+    await usuario_service.wait_pending_rehashes()
+    # hash atual: nada a regravar
+    db_session.expunge_all()
+    assert (await usuario_service.get_user_by_email(db_session, "senha.rehash@exemplo.com")).senha_hash == user.senha_hash
+
+
+def test_custo_acima_do_configurado_so_reduz_se_pedido():
+    forte = security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=5).hash("Senha123")
+    assert not security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=4).needs_update(forte)
+    assert security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=4, reduzir_custo=True).needs_update(forte)
+
+
+def test_esquemas_de_senha_validados():
+    with pytest.raises(ValueError):
+        security.build_pwd_context(schemes="md5_crypt")
+    contexto = security.build_pwd_context(schemes="bcrypt", bcrypt_rounds=4)
+    assert contexto.identify(contexto.hash("x")) == "bcrypt"
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from src.backend.core import security
+
+
+def test_claims_verificados_vem_do_cache(monkeypatch):
+    token = security.create_access_token(42)
+    antes = security.token_claims_stats()
+    assert security.decode_token(token)["sub"] == "42"
+
+    chamadas = []
+    original = security.jwt.decode
+    monkeypatch.setattr(security.jwt, "decode", lambda *a, **k: chamadas.append(1) or original(*a, **k))
+    for _ in range(3):
+        claims = security.decode_token(token)
+        claims["sub"] = "alterado"  # cópia: não contamina o cache
+    assert chamadas == []
+    assert security.decode_token(token)["sub"] == "42"
+
+    depois = security.token_claims_stats()
+    assert depois.acertos - antes.acertos == 4 and depois.faltas - antes.faltas == 1
+
+
+def test_token_invalido_ou_vencido_nao_entra_no_cache():
+    vencido = security.create_access_token(7, expires_delta=timedelta(seconds=-1))
+    itens = security.token_claims_stats().itens
+    assert security.decode_token(vencido) is None
+    assert security.decode_token("nao-e-um-jwt") is None
+    assert security.token_claims_stats().itens == itens
+
+
+def test_troca_da_secret_key_invalida_o_cache(monkeypatch):
+    token = security.create_access_token(99)
+    assert security.decode_token(token) is not None
+    monkeypatch.setattr(security.settings, "secret_key", "outra-chave")
+    assert security.decode_token(token) is None
+    assert security.decode_token(security.create_access_token(99)) is not None